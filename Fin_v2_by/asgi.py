@@ -3,6 +3,10 @@ ASGI config for Fin_v2_by project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this entry point (e.g. gunicorn with uvicorn workers) to keep
+the task event streams in fin_app_v2/events.py open; under WSGI they fall back to
+answering one batch per request and the browser reconnects.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
@@ -0,0 +1,84 @@
+"""
+Compare concurrent throughput of the sync read-only API against the async one.
+
+Start the app twice (or point at two deployments), e.g.
+
+    gunicorn Fin_v2_by.wsgi:application --bind 127.0.0.1:8000 --workers 2
+    gunicorn Fin_v2_by.asgi:application --worker-class uvicorn_worker.UvicornWorker --bind 127.0.0.1:8001 --workers 2
+
+and run
+
+    python benchmarks/api_throughput.py --sync http://127.0.0.1:8000 --async http://127.0.0.1:8001 --job 1
+
+Each endpoint is hit with --concurrency parallel clients for --requests requests; the sync
+server gets the plain paths, the async one the /api/async/ paths. Only the standard
+library is used so it can run from anywhere.
+"""
+import argparse
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ENDPOINTS = [
+    ('dashboard_stats', '/api/dashboard/stats/', '/api/async/dashboard/stats/'),
+    ('recent_projects', '/api/dashboard/recent-projects/', '/api/async/dashboard/recent-projects/'),
+    ('upcoming_deadlines', '/api/dashboard/upcoming-deadlines/', '/api/async/dashboard/upcoming-deadlines/'),
+    ('calendar_tasks', '/api/calendar/tasks/', '/api/async/calendar/tasks/'),
+    ('job_tasks', '/jobs/{job}/tasks/', '/api/async/jobs/{job}/tasks/'),
+    ('task_statistics', '/jobs/{job}/tasks/statistics/', '/api/async/jobs/{job}/tasks/statistics/'),
+]
+
+
+def fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, TimeoutError):
+        ok = False
+    return ok, time.perf_counter() - started
+
+
+def run(url, total, concurrency, timeout):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: fetch(url, timeout), range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in results)
+    return {
+        'rps': total / elapsed,
+        'errors': sum(1 for ok, _ in results if not ok),
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', dest='sync_url', required=True, help='base URL of the WSGI deployment')
+    parser.add_argument('--async', dest='async_url', required=True, help='base URL of the ASGI deployment')
+    parser.add_argument('--job', type=int, default=1, help='job id for the job task endpoints')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--only', help='comma separated endpoint names')
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    print(f"{'endpoint':<20} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for name, sync_path, async_path in ENDPOINTS:
+        if only and name not in only:
+            continue
+        for mode, base, path in (('sync', args.sync_url, sync_path), ('async', args.async_url, async_path)):
+            url = base.rstrip('/') + path.format(job=args.job)
+            result = run(url, args.requests, args.concurrency, args.timeout)
+            print(f"{name:<20} {mode:<6} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p95_ms']:>8.1f} {result['errors']:>7}")
+
+
+if __name__ == '__main__':
+    main()
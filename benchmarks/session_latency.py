@@ -0,0 +1,94 @@
+"""
+Per-request latency and query count of each session strategy (settings.SESSION_STRATEGY).
+
+Runs in-process against the configured database and cache, so point it at the real
+MySQL (and REDIS_URL for cached_db) to see the network round trips it saves:
+
+    python benchmarks/session_latency.py --job 1 --user 2 --requests 200
+
+For every engine a client portal session (client_job_id) and a logged-in session are
+created, then --path / --user-path are requested --requests times. Reported: mean and
+p95 milliseconds per request, and how many SQL queries touched django_session.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Fin_v2_by.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def measure(client, path, total):
+    latencies = []
+    session_queries = 0
+    for _ in range(total):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            client.get(path)
+            latencies.append(time.perf_counter() - started)
+        session_queries += sum('django_session' in query['sql'] for query in queries.captured_queries)
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'session_queries': session_queries / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--job', type=int, required=True, help='job id for the client portal session')
+    parser.add_argument('--user', type=int, help='user id for the logged-in session (skipped if omitted)')
+    parser.add_argument('--path', default='/client_progress/', help='client portal page to request')
+    parser.add_argument('--user-path', default='/developer_tasks/', help='page requested with the user session')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--only', help='comma separated engines (db,cached_db,signed_cookies)')
+    args = parser.parse_args()
+
+    only = set(args.only.split(',')) if args.only else None
+    user = User.objects.get(pk=args.user) if args.user else None
+    print(f"{'engine':<16} {'session':<8} {'mean ms':>8} {'p95 ms':>8} {'session queries/req':>20}")
+    for name, engine in ENGINES.items():
+        if only and name not in only:
+            continue
+        with override_settings(SESSION_ENGINE=engine):
+            client = Client()
+            session = client.session
+            session['client_job_id'] = args.job
+            session.save()
+            client.cookies['sessionid'] = session.session_key
+            client.get(args.path)  # Warm-up (fills the cache for cached_db)
+            runs = [('client', client, args.path)]
+
+            if user is not None:
+                user_client = Client()
+                user_client.force_login(user)
+                user_client.get(args.user_path)
+                runs.append(('user', user_client, args.user_path))
+
+            for label, run_client, path in runs:
+                result = measure(run_client, path, args.requests)
+                print(f"{name:<16} {label:<8} {result['mean_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                      f"{result['session_queries']:>20.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Monthly accounting periods. Closed months are read from AccountingPeriod snapshots
+(written by `manage.py close_period`); only the open months are aggregated live.
+
+Months are closed in order, so everything before live_since() is in the snapshots.
+The month a figure belongs to follows the report that shows it:
+
+- job income and task money: the month the job was created (monthly revenue chart,
+  calculate_income_balance)
+- developer money: the task's start_date; deductions: deduction_date (payment sheet)
+
+Closing a month freezes its figures as of that moment, the way an accounting period is
+closed: a later edit to data of a closed month (a task paid late, a task added to an old
+job) does not change the reports until the month is deliberately recomputed with
+`close_period --reopen`. Writes never touch the snapshots, so they stay valid.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+from django.db.models.functions import ExtractMonth
+from django.utils import timezone
+
+from .caching import bump_data_version, get_data_version
+from .models import AccountingPeriod, DeductionLog, Job, Task
+
+Assignment = Task.assigned_users.through
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def as_datetime(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def closed_through():
+    """First day of the last closed month, or None. Cached until the next close/reopen."""
+    key = f"accounting:closed_through:{get_data_version('accounting')}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached or None  # '' is "nothing closed"
+    last = AccountingPeriod.objects.filter(kind=AccountingPeriod.KIND_TOTAL).aggregate(last=Max('month'))['last']
+    cache.set(key, last or '', None)
+    return last
+
+
+def live_since():
+    """First day of the first open month; None when nothing is closed yet."""
+    last = closed_through()
+    return next_month(last) if last else None
+
+
+# Live aggregates
+
+def _zero():
+    return {'amount': 0, 'earned': 0, 'paid': 0, 'deductions': 0}
+
+
+def _add(totals, user_id, row):
+    entry = totals.setdefault(user_id, _zero())
+    for name in entry:
+        entry[name] += row.get(name) or 0
+
+
+def live_developer_totals(developer_id=None, date_from=None, date_to=None, exclude=None):
+    """
+    {user_id: {'amount', 'earned', 'paid', 'deductions'}} computed from tasks (by
+    start_date) and deductions (by deduction_date) in [date_from, date_to], two GROUP BY
+    queries. `exclude` is a (first, end) month range left out, first may be None.
+    """
+    tasks = Q()
+    deductions = Q()
+    if date_from:
+        tasks &= Q(task__start_date__gte=date_from)
+        deductions &= Q(deduction_date__gte=as_datetime(date_from))
+    if date_to:
+        tasks &= Q(task__start_date__lte=date_to)
+        deductions &= Q(deduction_date__lt=as_datetime(date_to + timedelta(days=1)))
+    if exclude:
+        first, end = exclude
+        tasks &= ~Q(task__start_date__gte=first, task__start_date__lt=end) if first else ~Q(task__start_date__lt=end)
+        excluded = Q(deduction_date__lt=as_datetime(end))
+        if first:
+            excluded &= Q(deduction_date__gte=as_datetime(first))
+        deductions &= ~excluded
+    if developer_id:
+        tasks &= Q(user_id=developer_id)
+        deductions &= Q(developer_id=developer_id)
+
+    totals = {}
+    for row in (
+        Assignment.objects.filter(tasks)
+        .values('user_id')
+        .annotate(
+            amount=Sum('task__money_for_task'),
+            earned=Sum('task__money_for_task', filter=Q(task__progress=100)),
+            paid=Sum('task__money_for_task', filter=Q(task__paid=True)),
+        )
+        .order_by()
+    ):
+        _add(totals, row['user_id'], row)
+    for row in DeductionLog.objects.filter(deductions).values('developer_id').annotate(deductions=Sum('deduction_amount')).order_by():
+        _add(totals, row['developer_id'], row)
+    return totals
+
+
+def _closed_months_within(date_from, date_to):
+    """The (first, end) months of [date_from, date_to] that are whole and closed, or None."""
+    since = live_since()
+    if since is None:
+        return None
+    first = None
+    if date_from:
+        first = month_start(date_from)
+        if first != date_from:
+            first = next_month(first)
+    end = since
+    if date_to:
+        end = min(end, month_start(date_to + timedelta(days=1)))
+    if first is not None and first >= end:
+        return None
+    return first, end
+
+
+# Reports
+
+def developer_totals(developer_id=None, date_from=None, date_to=None):
+    """Payment sheet totals per developer: closed months from snapshots, the rest live."""
+    totals = {}
+    closed = _closed_months_within(date_from, date_to)
+    if closed:
+        first, end = closed
+        snapshots = AccountingPeriod.objects.filter(
+            kind=AccountingPeriod.KIND_DEVELOPER, developer__isnull=False, month__lt=end,
+        )
+        if first:
+            snapshots = snapshots.filter(month__gte=first)
+        if developer_id:
+            snapshots = snapshots.filter(developer_id=developer_id)
+        for row in (
+            snapshots.values('developer_id')
+            .annotate(
+                amount=Sum('task_money'), earned=Sum('earned_money'),
+                paid=Sum('paid_money'), deductions=Sum('deductions'),
+            )
+            .order_by()
+        ):
+            _add(totals, row['developer_id'], row)
+    for user_id, row in live_developer_totals(developer_id, date_from, date_to, exclude=closed).items():
+        _add(totals, user_id, row)
+    return totals
+
+
+def income_totals():
+    """All-time job income and task money (calculate_income_balance)."""
+    since = live_since()
+    snapshot = AccountingPeriod.objects.filter(kind=AccountingPeriod.KIND_TOTAL).aggregate(
+        income=Sum('income'), task_money=Sum('task_money'),
+    )
+    jobs = Job.objects.all()
+    tasks = Task.objects.all()
+    if since:
+        jobs = jobs.filter(created_at__gte=as_datetime(since))
+        tasks = tasks.filter(job__created_at__gte=as_datetime(since))
+    income = (snapshot['income'] or 0) + (jobs.aggregate(total=Sum('over_all_income'))['total'] or 0)
+    task_money = (snapshot['task_money'] or 0) + (tasks.aggregate(total=Sum('money_for_task'))['total'] or 0)
+    return income, task_money
+
+
+def monthly_revenue(year):
+    """{month number: (income, paid task money)} for `year`, by the month jobs were created."""
+    since = live_since()
+    revenue = {
+        row['month'].month: (row['income'], row['paid_money'])
+        for row in AccountingPeriod.objects.filter(
+            kind=AccountingPeriod.KIND_TOTAL, month__gte=date(year, 1, 1), month__lt=date(year + 1, 1, 1),
+        ).values('month', 'income', 'paid_money')
+    }
+    if since and since.year > year:
+        return revenue
+
+    jobs = Job.objects.filter(created_at__year=year)
+    tasks = Task.objects.filter(job__created_at__year=year, paid=True)
+    if since:
+        jobs = jobs.filter(created_at__gte=as_datetime(since))
+        tasks = tasks.filter(job__created_at__gte=as_datetime(since))
+    income_by_month = dict(
+        jobs.annotate(month=ExtractMonth('created_at'))
+        .values('month')
+        .annotate(total=Sum('over_all_income'))
+        .values_list('month', 'total')
+    )
+    # Expenses are money paid to developers on jobs created in that month
+    expenses_by_month = dict(
+        tasks.annotate(month=ExtractMonth('job__created_at'))
+        .values('month')
+        .annotate(total=Sum('money_for_task'))
+        .values_list('month', 'total')
+    )
+    for month in set(income_by_month) | set(expenses_by_month):
+        revenue[month] = (income_by_month.get(month) or 0, expenses_by_month.get(month) or 0)
+    return revenue
+
+
+# Closing
+
+def first_data_month():
+    """Month of the oldest job, task or deduction, or None when there is no data."""
+    found = [
+        Job.objects.aggregate(first=Min('created_at'))['first'],
+        Task.objects.aggregate(first=Min('start_date'))['first'],
+        DeductionLog.objects.aggregate(first=Min('deduction_date'))['first'],
+    ]
+    days = [timezone.localdate(value) if isinstance(value, datetime) else value for value in found if value]
+    return month_start(min(days)) if days else None
+
+
+@transaction.atomic
+def close_month(month):
+    """(Re)write the snapshot rows of `month`; returns how many rows were written."""
+    end = next_month(month)
+    AccountingPeriod.objects.filter(month=month).delete()
+
+    rows = []
+    total = AccountingPeriod(month=month, kind=AccountingPeriod.KIND_TOTAL)
+    jobs = (
+        Job.objects.filter(created_at__gte=as_datetime(month), created_at__lt=as_datetime(end))
+        .annotate(
+            task_money=Sum('tasks__money_for_task'),
+            earned_money=Sum('tasks__money_for_task', filter=Q(tasks__progress=100)),
+            paid_money=Sum('tasks__money_for_task', filter=Q(tasks__paid=True)),
+        )
+        .values_list('pk', 'over_all_income', 'task_money', 'earned_money', 'paid_money')
+    )
+    for job_id, income, task_money, earned_money, paid_money in jobs:
+        row = AccountingPeriod(
+            month=month, kind=AccountingPeriod.KIND_JOB, job_id=job_id, income=income,
+            task_money=task_money or 0, earned_money=earned_money or 0, paid_money=paid_money or 0,
+        )
+        rows.append(row)
+        total.income += row.income
+        total.task_money += row.task_money
+        total.earned_money += row.earned_money
+        total.paid_money += row.paid_money
+
+    for developer_id, figures in live_developer_totals(date_from=month, date_to=end - timedelta(days=1)).items():
+        rows.append(AccountingPeriod(
+            month=month, kind=AccountingPeriod.KIND_DEVELOPER, developer_id=developer_id,
+            task_money=figures['amount'], earned_money=figures['earned'],
+            paid_money=figures['paid'], deductions=figures['deductions'],
+        ))
+        total.deductions += figures['deductions']
+
+    rows.append(total)
+    AccountingPeriod.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def close_through(month):
+    """
+    Close every open month up to and including `month`, oldest first. The current month
+    can't be closed. Returns the months closed.
+    """
+    month = month_start(month)
+    if month >= month_start(timezone.localdate()):
+        raise ValueError("Only months before the current one can be closed")
+    current = live_since() or first_data_month()
+    closed = []
+    while current is not None and current <= month:
+        close_month(current)
+        closed.append(current)
+        current = next_month(current)
+    bump_data_version('accounting')
+    return closed
+
+
+def reopen_from(month):
+    """Drop the snapshots of `month` and every later month; returns rows deleted."""
+    deleted, _ = AccountingPeriod.objects.filter(month__gte=month_start(month)).delete()
+    bump_data_version('accounting')
+    return deleted
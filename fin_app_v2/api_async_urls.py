@@ -0,0 +1,21 @@
+from django.urls import path
+from . import api_async_views
+
+# Async twins of the read-only endpoints, same paths under /api/async/
+urlpatterns = [
+    # Dashboard APIs
+    path('api/async/dashboard/stats/', api_async_views.dashboard_stats, name='api_async_dashboard_stats'),
+    path('api/async/dashboard/recent-projects/', api_async_views.recent_projects, name='api_async_recent_projects'),
+    path('api/async/dashboard/upcoming-deadlines/', api_async_views.upcoming_deadlines, name='api_async_upcoming_deadlines'),
+
+    # Calendar API
+    path('api/async/calendar/tasks/', api_async_views.calendar_tasks, name='api_async_calendar_tasks'),
+
+    # Job task APIs
+    path('api/async/jobs/<int:job_id>/tasks/',
+         api_async_views.api_get_all_tasks,
+         name='api_async_get_all_tasks'),
+    path('api/async/jobs/<int:job_id>/tasks/statistics/',
+         api_async_views.api_get_task_statistics,
+         name='api_async_get_task_statistics'),
+]
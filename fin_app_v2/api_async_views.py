@@ -0,0 +1,151 @@
+"""
+Async versions of the read-only dashboard and task endpoints.
+
+They return the same payloads as their sync counterparts (api_views.py, api_task_views.py)
+and share their query builders, but run on Django's async ORM so a slow database round
+trip doesn't hold a worker. Served under /api/async/ (see api_async_urls.py); they only
+pay off when the project runs under ASGI (Procfile `asgi` process).
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from . import dashboard
+from .api_task_views import api_response, build_task_statistics, serialize_task, task_statistics_aggregates
+from .api_views import CALENDAR_CACHE_TIMEOUT, calendar_cache_key, calendar_params, calendar_rows, group_by_deadline
+from .caching import aget_data_version
+from .delta_sync import adeleted_ids, parse_updated_since, sync_cursor
+from .models import Job, Task
+from .serializers import JobSerializer, TaskSerializer
+
+
+@require_http_methods(["GET"])
+async def dashboard_stats(request):
+    """Async /api/dashboard/stats/"""
+    today = timezone.now().date()
+    status_counts = await Job.objects.aaggregate(**dashboard.project_status_aggregates(today))
+    job_totals = await Job.objects.aaggregate(**dashboard.job_total_aggregates(today))
+    task_totals = await Task.objects.aaggregate(**dashboard.task_total_aggregates())
+    user_count = await User.objects.acount()
+    return JsonResponse(dashboard.stats_data(
+        status_counts, dashboard.zero_nulls(job_totals), dashboard.zero_nulls(task_totals), user_count
+    ))
+
+
+@require_http_methods(["GET"])
+async def recent_projects(request):
+    """Async /api/dashboard/recent-projects/"""
+    # async iteration runs the prefetches too, so serializing below doesn't touch the DB
+    jobs = [job async for job in dashboard.recent_projects_queryset()]
+    return JsonResponse(JobSerializer(jobs, many=True).data, safe=False)
+
+
+@require_http_methods(["GET"])
+async def upcoming_deadlines(request):
+    """Async /api/dashboard/upcoming-deadlines/"""
+    tasks = [task async for task in dashboard.upcoming_deadlines_queryset(timezone.now().date())]
+    return JsonResponse(TaskSerializer(tasks, many=True).data, safe=False)
+
+
+@require_http_methods(["GET"])
+async def calendar_tasks(request):
+    """Async /api/calendar/tasks/ (same params and cache entries as the sync view)"""
+    try:
+        start, end, developer_id, job_id = calendar_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    today = timezone.now().date()
+    cache_key = calendar_cache_key(start, end, developer_id, job_id, today, await aget_data_version('tasks'))
+    tasks_by_date = await cache.aget(cache_key)
+    if tasks_by_date is None:
+        rows = [row async for row in calendar_rows(start, end, developer_id, job_id, today)]
+        tasks_by_date = group_by_deadline(rows)
+        await cache.aset(cache_key, tasks_by_date, CALENDAR_CACHE_TIMEOUT)
+    return JsonResponse(tasks_by_date)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def api_get_all_tasks(request, job_id):
+    """Async GET /api/jobs/{job_id}/tasks/ (supports ?updated_since= as well)"""
+    try:
+        try:
+            updated_since = parse_updated_since(request.GET.get('updated_since'))
+        except ValueError as e:
+            return api_response(
+                error="Invalid updated_since",
+                message=str(e),
+                status_code=400
+            )
+
+        job = await Job.objects.aget(id=job_id)
+        server_time = sync_cursor()
+
+        tasks = Task.objects.filter(job=job).select_related('confirmed_by').prefetch_related('assigned_users')
+        if updated_since:
+            tasks = tasks.filter(updated_at__gt=updated_since)
+        tasks_data = [serialize_task(task, job) async for task in tasks]
+
+        data = {
+            'job': {
+                'id': job.id,
+                'title': job.title,
+                'client_email': job.client_email,
+                'over_all_income': job.over_all_income
+            },
+            'tasks': tasks_data,
+            'total_tasks': len(tasks_data),
+            'server_time': server_time
+        }
+        if updated_since:
+            data['updated_since'] = updated_since.isoformat()
+            data['deleted_task_ids'] = await adeleted_ids('task', updated_since, job_id=job.id)
+
+        return api_response(
+            data=data,
+            message=f"Retrieved {len(tasks_data)} tasks for job '{job.title}'"
+        )
+
+    except Job.DoesNotExist:
+        return api_response(
+            error="Job not found",
+            message="The specified job does not exist",
+            status_code=404
+        )
+    except Exception as e:
+        return api_response(
+            error=str(e),
+            message="An error occurred while retrieving tasks",
+            status_code=500
+        )
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+async def api_get_task_statistics(request, job_id):
+    """Async GET /api/jobs/{job_id}/tasks/statistics/"""
+    try:
+        job = await Job.objects.aget(id=job_id)
+        totals = await Task.objects.filter(job=job).aaggregate(**task_statistics_aggregates())
+        statistics = build_task_statistics(job, totals)
+        return api_response(
+            data=statistics,
+            message=f"Statistics retrieved for job '{job.title}'"
+        )
+
+    except Job.DoesNotExist:
+        return api_response(
+            error="Job not found",
+            message="The specified job does not exist",
+            status_code=404
+        )
+    except Exception as e:
+        return api_response(
+            error=str(e),
+            message="An error occurred while retrieving statistics",
+            status_code=500
+        )
@@ -9,31 +9,24 @@ from django.utils.dateparse import parse_date
 import json
 
 from .models_crm import CrmJob
+from .crm_listing import annotated_crm_jobs, crm_job_listing, crm_job_queryset, get_annotated_crm_job
+from .serializers import CrmJobSerializer
+
+
+def crm_job_data(job_id):
+    """Serialized CrmJob with task/comment/file counts (one query)."""
+    return CrmJobSerializer(get_annotated_crm_job(job_id)).data
+
 
 @csrf_exempt
 @require_http_methods(["GET", "POST"])
 def api_get_all_jobs(request):
     if request.method == "GET":
-        jobs = CrmJob.objects.all()
-        jobs_data = []
-        for job in jobs:
-            jobs_data.append({
-                'id': job.id,
-                'title': job.title,
-                'client_email': job.client_email,
-                'over_all_income': job.over_all_income,
-                'created_at': job.created_at.isoformat() if hasattr(job, 'created_at') and job.created_at else None,
-                'full_name': job.full_name,
-                'phone_number': job.phone_number,
-                'position': job.position,
-                'client_company_name': job.client_company_name,
-                'client_company_phone': job.client_company_phone,
-                'client_company_address': job.client_company_address,
-                'client_website': job.client_website,
-                'project_count': job.crm_tasks.count(),
-                'task_count': job.crm_tasks.count(),
-            })
-        return JsonResponse(jobs_data, safe=False)
+        # Filters ?status=, ?company=, ?q=, ?ordering=. The paginated envelope is opt-in with
+        # ?page= / ?page_size=; without them the answer stays the bare list existing clients read
+        if 'page' in request.GET or 'page_size' in request.GET:
+            return JsonResponse(crm_job_listing(request.GET))
+        return JsonResponse(CrmJobSerializer(crm_job_queryset(request.GET), many=True).data, safe=False)
     elif request.method == "POST":
         try:
             data = json.loads(request.body)
@@ -60,45 +53,13 @@ def api_get_all_jobs(request):
             client_website=data.get('client_website', ''),
             status=data.get('status', 'active'),  # добавлено поле status
         )
-        job_data = {
-            'id': job.id,
-            'title': job.title,
-            'client_email': job.client_email,
-            'over_all_income': job.over_all_income,
-            'created_at': job.created_at.isoformat() if hasattr(job, 'created_at') and job.created_at else None,
-            'full_name': job.full_name,
-            'phone_number': job.phone_number,
-            'position': job.position,
-            'client_company_name': job.client_company_name,
-            'client_company_phone': job.client_company_phone,
-            'client_company_address': job.client_company_address,
-            'client_website': job.client_website,
-            'project_count': job.crm_tasks.count(),
-            'task_count': job.crm_tasks.count(),
-        }
-        return JsonResponse(job_data, status=201)
+        return JsonResponse(crm_job_data(job.id), status=201)
 
 @csrf_exempt
 @require_http_methods(["GET"])
 def api_get_job_detail(request, job_id):
-    job = get_object_or_404(CrmJob, id=job_id)
-    job_data = {
-        'id': job.id,
-        'title': job.title,
-        'client_email': job.client_email,
-        'over_all_income': job.over_all_income,
-        'created_at': job.created_at.isoformat() if hasattr(job, 'created_at') and job.created_at else None,
-        'full_name': job.full_name,
-        'phone_number': job.phone_number,
-        'position': job.position,
-        'client_company_name': job.client_company_name,
-        'client_company_phone': job.client_company_phone,
-        'client_company_address': job.client_company_address,
-        'client_website': job.client_website,
-        'project_count': job.crm_tasks.count(),
-        'task_count': job.crm_tasks.count(),
-    }
-    return JsonResponse(job_data)
+    job = get_object_or_404(annotated_crm_jobs(), id=job_id)
+    return JsonResponse(CrmJobSerializer(job).data)
 
 @csrf_exempt
 @require_http_methods(["PUT", "PATCH"])
@@ -117,23 +78,7 @@ def api_update_job(request, job_id):
         except ValueError:
             return JsonResponse({'error': 'over_all_income must be a number'}, status=400)
     job.save()
-    job_data = {
-        'id': job.id,
-        'title': job.title,
-        'client_email': job.client_email,
-        'over_all_income': job.over_all_income,
-        'created_at': job.created_at.isoformat() if hasattr(job, 'created_at') and job.created_at else None,
-        'full_name': job.full_name,
-        'phone_number': job.phone_number,
-        'position': job.position,
-        'client_company_name': job.client_company_name,
-        'client_company_phone': job.client_company_phone,
-        'client_company_address': job.client_company_address,
-        'client_website': job.client_website,
-        'project_count': job.crm_tasks.count(),
-        'task_count': job.crm_tasks.count(),
-    }
-    return JsonResponse(job_data)
+    return JsonResponse(crm_job_data(job.id))
 
 @csrf_exempt
 @require_http_methods(["DELETE"])
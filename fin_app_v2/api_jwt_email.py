@@ -1,9 +1,10 @@
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework.permissions import AllowAny
 from rest_framework import serializers
-from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.contrib.auth.models import update_last_login
 
 
 class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -15,20 +16,21 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
         self.fields.pop('username', None)  # удаляем поле username
 
     def validate(self, attrs):
-        email = attrs.get('email')
-        password = attrs.get('password')
-
-        try:
-            user = User.objects.get(email__iexact=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("No active account found with this email")
-
-        user = authenticate(username=user.username, password=password)
-        if user is None:
-            raise serializers.ValidationError("Invalid credentials")
-
-        attrs['username'] = user.username
-        return super().validate(attrs)
+        # EmailBackend finds the user with one indexed query; super().validate() would authenticate again
+        self.user = authenticate(
+            request=self.context.get('request'),
+            email=attrs.get('email'),
+            password=attrs.get('password'),
+        )
+        if self.user is None:
+            raise serializers.ValidationError("Invalid email or password")
+
+        refresh = self.get_token(self.user)
+        data = {'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+        return data
 
 
 class EmailTokenObtainPairView(TokenObtainPairView):
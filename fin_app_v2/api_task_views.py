@@ -5,12 +5,16 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Count, F, Q, Sum
 from django.utils.dateparse import parse_date
 import json
 from datetime import datetime
 
+from .concurrency import ConcurrencyConflict
 from .models import Task, Job
+from .delta_sync import parse_updated_since, sync_cursor, deleted_ids
+from .idempotency import idempotent
+from .task_operations import rebalance_task_percentages
 
 
 def api_response(data=None, message="Success", status_code=200, error=None):
@@ -26,68 +30,91 @@ def api_response(data=None, message="Success", status_code=200, error=None):
     return JsonResponse(response_data, status=status_code)
 
 
+def serialize_task(task, job):
+    """Task dict used by the job task listing (assignees and confirmed_by must be preloaded)."""
+    return {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'hours': task.hours,
+        'task_percentage': task.task_percentage,
+        'progress': task.progress,
+        'money_for_task': task.money_for_task,
+        'paid': task.paid,
+        'task_type': task.task_type,
+        'confirmed': task.confirmed,
+        'start_date': task.start_date.isoformat() if task.start_date else None,
+        'deadline': task.deadline.isoformat() if task.deadline else None,
+        'confirmation_date': task.confirmation_date.isoformat() if task.confirmation_date else None,
+        'confirmed_by': task.confirmed_by.username if task.confirmed_by else None,
+        'feedback': task.feedback,
+        'version': task.version,
+        'updated_at': task.updated_at.isoformat(),
+        'assigned_users': [
+            {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email
+            }
+            for user in task.assigned_users.all()
+        ],
+        'job': {
+            'id': job.id,
+            'title': job.title
+        }
+    }
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def api_get_all_tasks(request, job_id):
     """
     GET /api/jobs/{job_id}/tasks/
     Get all tasks for a specific job
+
+    Optional query params:
+    - updated_since: ISO 8601 timestamp or epoch seconds; only tasks changed after it are
+      returned, together with the ids of tasks deleted since then
     """
     try:
+        try:
+            updated_since = parse_updated_since(request.GET.get('updated_since'))
+        except ValueError as e:
+            return api_response(
+                error="Invalid updated_since",
+                message=str(e),
+                status_code=400
+            )
+
         # Verify job exists
         job = get_object_or_404(Job, id=job_id)
+        server_time = sync_cursor()
 
         # Get all tasks for this job
-        tasks = Task.objects.filter(job=job).select_related('job').prefetch_related('assigned_users')
+        tasks = Task.objects.filter(job=job).select_related('job', 'confirmed_by').prefetch_related('assigned_users')
+        if updated_since:
+            tasks = tasks.filter(updated_at__gt=updated_since)
 
         # Serialize tasks data
-        tasks_data = []
-        for task in tasks:
-            # Get assigned users
-            assigned_users = [
-                {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email
-                }
-                for user in task.assigned_users.all()
-            ]
-
-            task_data = {
-                'id': task.id,
-                'title': task.title,
-                'description': task.description,
-                'hours': task.hours,
-                'task_percentage': task.task_percentage,
-                'progress': task.progress,
-                'money_for_task': task.money_for_task,
-                'paid': task.paid,
-                'task_type': task.task_type,
-                'confirmed': task.confirmed,
-                'start_date': task.start_date.isoformat() if task.start_date else None,
-                'deadline': task.deadline.isoformat() if task.deadline else None,
-                'confirmation_date': task.confirmation_date.isoformat() if task.confirmation_date else None,
-                'confirmed_by': task.confirmed_by.username if task.confirmed_by else None,
-                'feedback': task.feedback,
-                'assigned_users': assigned_users,
-                'job': {
-                    'id': job.id,
-                    'title': job.title
-                }
-            }
-            tasks_data.append(task_data)
+        tasks_data = [serialize_task(task, job) for task in tasks]
 
-        return api_response(
-            data={
-                'job': {
-                    'id': job.id,
-                    'title': job.title,
-                    'client_email': job.client_email,
-                    'over_all_income': job.over_all_income
-                },
-                'tasks': tasks_data,
-                'total_tasks': len(tasks_data)
+        data = {
+            'job': {
+                'id': job.id,
+                'title': job.title,
+                'client_email': job.client_email,
+                'over_all_income': job.over_all_income
             },
+            'tasks': tasks_data,
+            'total_tasks': len(tasks_data),
+            'server_time': server_time
+        }
+        if updated_since:
+            data['updated_since'] = updated_since.isoformat()
+            data['deleted_task_ids'] = deleted_ids('task', updated_since, job_id=job.id)
+
+        return api_response(
+            data=data,
             message=f"Retrieved {len(tasks_data)} tasks for job '{job.title}'"
         )
 
@@ -173,6 +200,7 @@ def api_get_task_detail(request, job_id, task_id):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@idempotent
 def api_create_task(request, job_id):
     """
     POST /api/jobs/{job_id}/tasks/
@@ -189,6 +217,9 @@ def api_create_task(request, job_id):
     - deadline: string (YYYY-MM-DD format)
     - assigned_user_ids: array of user IDs
     - progress: integer (0-100) - default: 0
+
+    Send an Idempotency-Key header to make retries safe: a repeated key returns the
+    stored response instead of creating the task again.
     """
     try:
         # Verify job exists
@@ -319,10 +350,8 @@ def api_create_task(request, job_id):
                 task.assigned_users.set(assigned_users)
 
             # Update percentages for all tasks in the job
-            all_tasks = Task.objects.filter(job=job)
-            for task_obj in all_tasks:
-                task_obj.task_percentage = (task_obj.hours / total_hours) * 100
-                task_obj.save(update_fields=['task_percentage'])
+            rebalance_task_percentages(job.id)
+            task.refresh_from_db(fields=['task_percentage', 'updated_at', 'version'])
 
         # Return created task data
         assigned_users_data = [
@@ -348,6 +377,7 @@ def api_create_task(request, job_id):
             'start_date': task.start_date.isoformat() if task.start_date else None,
             'deadline': task.deadline.isoformat() if task.deadline else None,
             'feedback': task.feedback,
+            'version': task.version,
             'assigned_users': assigned_users_data,
             'job_id': job.id
         }
@@ -389,6 +419,8 @@ def api_update_task(request, job_id, task_id):
     - assigned_user_ids: array of user IDs
     - progress: integer (0-100)
     - feedback: string
+    - version: integer, the version the client last read; if the task has changed since,
+      nothing is saved and 409 is returned with the current task
     """
     try:
         # Verify job and task exist and are related
@@ -405,6 +437,16 @@ def api_update_task(request, job_id, task_id):
                 status_code=400
             )
 
+        if data.get('version') is not None:
+            try:
+                task.version = int(data['version'])
+            except (TypeError, ValueError):
+                return api_response(
+                    error="Invalid version",
+                    message="Version must be an integer",
+                    status_code=400
+                )
+
         # Track if hours changed for percentage recalculation
         hours_changed = False
         original_hours = task.hours
@@ -520,21 +562,28 @@ def api_update_task(request, job_id, task_id):
                 )
 
         # Save task and handle percentage recalculation
-        with transaction.atomic():
-            task.save()
-
-            # Update assigned users if provided
-            if 'assigned_user_ids' in data:
-                task.assigned_users.set(assigned_users)
-
-            # Recalculate percentages if hours changed
-            if hours_changed:
-                all_tasks = Task.objects.filter(job=job)
-                total_hours = all_tasks.aggregate(Sum('hours'))['hours__sum'] or 1
-
-                for task_obj in all_tasks:
-                    task_obj.task_percentage = (task_obj.hours / total_hours) * 100
-                    task_obj.save(update_fields=['task_percentage'])
+        try:
+            with transaction.atomic():
+                task.save()
+
+                # Update assigned users if provided
+                if 'assigned_user_ids' in data:
+                    task.assigned_users.set(assigned_users)
+
+                # Recalculate percentages if hours changed
+                if hours_changed:
+                    rebalance_task_percentages(job.id)
+                    task.refresh_from_db(fields=['task_percentage', 'updated_at', 'version'])
+        except ConcurrencyConflict as conflict:
+            current = Task.objects.select_related('confirmed_by').prefetch_related('assigned_users').filter(
+                pk=task.pk
+            ).first()
+            return api_response(
+                data=serialize_task(current, job) if current else None,
+                error="Version conflict",
+                message=str(conflict),
+                status_code=409
+            )
 
         # Return updated task data
         assigned_users_data = [
@@ -562,6 +611,7 @@ def api_update_task(request, job_id, task_id):
             'confirmation_date': task.confirmation_date.isoformat() if task.confirmation_date else None,
             'confirmed_by': task.confirmed_by.username if task.confirmed_by else None,
             'feedback': task.feedback,
+            'version': task.version,
             'assigned_users': assigned_users_data,
             'job_id': job.id
         }
@@ -606,13 +656,7 @@ def api_delete_task(request, job_id, task_id):
             task.delete()
 
             # Recalculate percentages for remaining tasks
-            remaining_tasks = Task.objects.filter(job=job)
-            total_hours = remaining_tasks.aggregate(Sum('hours'))['hours__sum']
-
-            if total_hours and total_hours > 0:
-                for remaining_task in remaining_tasks:
-                    remaining_task.task_percentage = (remaining_task.hours / total_hours) * 100
-                    remaining_task.save(update_fields=['task_percentage'])
+            rebalance_task_percentages(job.id)
 
         return api_response(
             data={
@@ -636,6 +680,65 @@ def api_delete_task(request, job_id, task_id):
         )
 
 
+def task_statistics_aggregates():
+    return {
+        'total_tasks': Count('id'),
+        'simple_tasks': Count('id', filter=Q(task_type='SIMPLE')),
+        'patpis_tasks': Count('id', filter=Q(task_type='PATPIS')),
+        'monthly_tasks': Count('id', filter=Q(task_type='MONTHLY')),
+        'completed_tasks': Count('id', filter=Q(progress=100)),
+        'in_progress_tasks': Count('id', filter=Q(progress__gt=0, progress__lt=100)),
+        'pending_tasks': Count('id', filter=Q(progress=0)),
+        'confirmed_tasks': Count('id', filter=Q(confirmed=True)),
+        'paid_tasks': Count('id', filter=Q(paid=True)),
+        'total_task_money': Sum('money_for_task'),
+        'paid_money': Sum('money_for_task', filter=Q(paid=True)),
+        'total_hours': Sum('hours'),
+        'weighted_progress': Sum(F('progress') * F('task_percentage')),
+        'total_weight': Sum('task_percentage'),
+    }
+
+
+def build_task_statistics(job, totals):
+    """Statistics payload from the task_statistics_aggregates() result for `job`."""
+    totals = {key: value or 0 for key, value in totals.items()}
+    # Same figure as Job.get_overall_progress()
+    overall_progress = round(totals['weighted_progress'] / totals['total_weight']) if totals['total_weight'] else 0
+    return {
+        'job': {
+            'id': job.id,
+            'title': job.title,
+            'overall_progress': overall_progress,
+            'total_income': job.over_all_income
+        },
+        'task_counts': {
+            'total_tasks': totals['total_tasks'],
+            'simple_tasks': totals['simple_tasks'],
+            'patpis_tasks': totals['patpis_tasks'],
+            'monthly_tasks': totals['monthly_tasks']
+        },
+        'progress_status': {
+            'completed_tasks': totals['completed_tasks'],
+            'in_progress_tasks': totals['in_progress_tasks'],
+            'pending_tasks': totals['pending_tasks']
+        },
+        'confirmation_status': {
+            'confirmed_tasks': totals['confirmed_tasks'],
+            'paid_tasks': totals['paid_tasks'],
+            'unconfirmed_tasks': totals['total_tasks'] - totals['confirmed_tasks']
+        },
+        'financial_summary': {
+            'total_task_money': totals['total_task_money'],
+            'paid_money': totals['paid_money'],
+            'unpaid_money': totals['total_task_money'] - totals['paid_money'],
+            'remaining_job_budget': job.over_all_income - totals['total_task_money']
+        },
+        'hours_summary': {
+            'total_hours': totals['total_hours']
+        }
+    }
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def api_get_task_statistics(request, job_id):
@@ -647,67 +750,9 @@ def api_get_task_statistics(request, job_id):
         # Verify job exists
         job = get_object_or_404(Job, id=job_id)
 
-        # Get task statistics
-        tasks = Task.objects.filter(job=job)
-
-        # Count tasks by type
-        simple_tasks = tasks.filter(task_type='SIMPLE').count()
-        patpis_tasks = tasks.filter(task_type='PATPIS').count()
-        monthly_tasks = tasks.filter(task_type='MONTHLY').count()
-
-        # Count tasks by progress status
-        completed_tasks = tasks.filter(progress=100).count()
-        in_progress_tasks = tasks.filter(progress__gt=0, progress__lt=100).count()
-        pending_tasks = tasks.filter(progress=0).count()
-
-        # Count confirmed tasks
-        confirmed_tasks = tasks.filter(confirmed=True).count()
-        paid_tasks = tasks.filter(paid=True).count()
-
-        # Calculate financial statistics
-        total_task_money = tasks.aggregate(Sum('money_for_task'))['money_for_task__sum'] or 0
-        paid_money = tasks.filter(paid=True).aggregate(Sum('money_for_task'))['money_for_task__sum'] or 0
-        unpaid_money = total_task_money - paid_money
-
-        # Calculate total hours
-        total_hours = tasks.aggregate(Sum('hours'))['hours__sum'] or 0
-
-        # Get job overall progress
-        overall_progress = job.get_overall_progress() if hasattr(job, 'get_overall_progress') else 0
-
-        statistics = {
-            'job': {
-                'id': job.id,
-                'title': job.title,
-                'overall_progress': overall_progress,
-                'total_income': job.over_all_income
-            },
-            'task_counts': {
-                'total_tasks': tasks.count(),
-                'simple_tasks': simple_tasks,
-                'patpis_tasks': patpis_tasks,
-                'monthly_tasks': monthly_tasks
-            },
-            'progress_status': {
-                'completed_tasks': completed_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'pending_tasks': pending_tasks
-            },
-            'confirmation_status': {
-                'confirmed_tasks': confirmed_tasks,
-                'paid_tasks': paid_tasks,
-                'unconfirmed_tasks': tasks.count() - confirmed_tasks
-            },
-            'financial_summary': {
-                'total_task_money': total_task_money,
-                'paid_money': paid_money,
-                'unpaid_money': unpaid_money,
-                'remaining_job_budget': job.over_all_income - total_task_money
-            },
-            'hours_summary': {
-                'total_hours': total_hours
-            }
-        }
+        # All counts and sums in one aggregate query
+        totals = Task.objects.filter(job=job).aggregate(**task_statistics_aggregates())
+        statistics = build_task_statistics(job, totals)
 
         return api_response(
             data=statistics,
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import api_views
+from . import api_views, events
 from .api_jwt_email import EmailTokenObtainPairView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 urlpatterns = [
@@ -11,18 +11,31 @@ urlpatterns = [
     # Job APIs
     path('api/jobs/', api_views.JobListCreateView.as_view(), name='api_job_list'),
     path('api/jobs/<int:pk>/', api_views.JobDetailView.as_view(), name='api_job_detail'),
+    path('api/jobs/<int:job_id>/burndown/', api_views.job_burndown, name='api_job_burndown'),
 
     # Task APIs
     path('api/tasks/', api_views.TaskListCreateView.as_view(), name='api_task_list'),
     path('api/tasks/<int:pk>/', api_views.TaskDetailView.as_view(), name='api_task_detail'),
     path('api/developer/tasks/', api_views.DeveloperTasksView.as_view(), name='api_developer_tasks'),
 
+    # Background jobs
+    path('api/background-jobs/<int:pk>/', api_views.BackgroundJobDetailView.as_view(), name='api_background_job'),
+
     # Dashboard APIs
     path('api/dashboard/stats/', api_views.dashboard_stats, name='api_dashboard_stats'),
     path('api/dashboard/monthly-revenue/', api_views.monthly_revenue_chart, name='api_monthly_revenue'),
+    path('api/dashboard/earnings-pivot/', api_views.earnings_pivot, name='api_earnings_pivot'),
+    path('api/dashboard/workload/', api_views.developer_workload, name='api_developer_workload'),
+    path('api/dashboard/overdue/', api_views.overdue_monitor, name='api_overdue_monitor'),
     path('api/dashboard/project-distribution/', api_views.project_status_distribution, name='api_project_distribution'),
     path('api/dashboard/recent-projects/', api_views.recent_projects, name='api_recent_projects'),
     path('api/dashboard/upcoming-deadlines/', api_views.upcoming_deadlines, name='api_upcoming_deadlines'),
+    path('api/dashboard/bundle/', api_views.dashboard_bundle, name='api_dashboard_bundle'),
+
+    # Task change streams (text/event-stream)
+    path('api/events/tasks/', events.all_task_events, name='api_task_events'),
+    path('api/events/jobs/<int:job_id>/', events.job_task_events, name='api_job_task_events'),
+    path('api/events/developers/<int:developer_id>/', events.developer_task_events, name='api_developer_task_events'),
 
 
 
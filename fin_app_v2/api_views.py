@@ -5,17 +5,31 @@ from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db.models import Sum, Count, Q, F
 from django.utils import timezone
-from datetime import timedelta
-from .models import Job, Task, DeductionLog, calculate_income_balance
+from django.utils.dateparse import parse_date
+from datetime import date, timedelta
+from .models import Job, Task, DeductionLog, DeletedRecord, BackgroundJob, calculate_income_balance
 from .serializers import (
     JobSerializer, TaskSerializer, UserSerializer,
-    DeductionLogSerializer, DashboardStatsSerializer
+    DeductionLogSerializer, DashboardStatsSerializer, BackgroundJobSerializer
 )
 from rest_framework import viewsets
+from . import dashboard
+from . import deadline_buckets as buckets
+from . import deadline_classifier as deadlines
+from . import earnings_pivot as pivot
+from . import job_rollups
+from . import overdue_monitor as overdue
+from . import workload
 from .models_crm import CrmJob, CrmTask, CrmTaskComment, CrmTaskFile
 from .serializers import CrmJobSerializer, CrmTaskSerializer, CrmTaskCommentSerializer, CrmTaskFileSerializer
+from .delta_sync import DeltaSyncListMixin
+from .caching import get_data_version
+from .concurrency import ConcurrencyConflict
+from .querysets import queryset_for_serializer, with_assignment
+from .crm_listing import CrmJobPagination, annotated_crm_jobs, crm_job_queryset, get_annotated_crm_job
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -25,14 +39,28 @@ class IsAdminUser(permissions.BasePermission):
         return request.user.is_authenticated and request.user.email == 'Admin@dbr.org'
 
 
+class VersionConflictMixin:
+    """Answer 409 with the current object when an update was based on a stale `version`."""
+
+    def handle_exception(self, exc):
+        if isinstance(exc, ConcurrencyConflict):
+            current = self.get_queryset().filter(pk=exc.instance.pk).first()
+            return Response(
+                {'error': str(exc), 'current': self.get_serializer(current).data if current else None},
+                status=status.HTTP_409_CONFLICT
+            )
+        return super().handle_exception(exc)
+
+
 # Job API Views
-class JobListCreateView(generics.ListCreateAPIView):
+class JobListCreateView(DeltaSyncListMixin, generics.ListCreateAPIView):
     queryset = Job.objects.all()
     serializer_class = JobSerializer
     permission_classes = [permissions.AllowAny]
+    delta_model_name = 'job'
 
     def get_queryset(self):
-        queryset = Job.objects.all()
+        queryset = queryset_for_serializer(self.get_serializer_class())
         # Filter by status if provided
         status_filter = self.request.query_params.get('status', None)
         if status_filter == 'completed':
@@ -48,9 +76,17 @@ class JobListCreateView(generics.ListCreateAPIView):
 
         return queryset.order_by('-created_at')
 
+    def get_changed_filter(self, since):
+        # Jobs embed their tasks and task aggregates, so task edits and deletions change them too
+        return (
+            super().get_changed_filter(since)
+            | Q(pk__in=Task.objects.filter(updated_at__gt=since).values('job_id'))
+            | Q(pk__in=DeletedRecord.objects.filter(model_name='task', deleted_at__gt=since).values('job_id'))
+        )
 
-class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Job.objects.all()
+
+class JobDetailView(VersionConflictMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = queryset_for_serializer(JobSerializer)
     serializer_class = JobSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -65,12 +101,17 @@ class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 # Task API Views
-class TaskListCreateView(generics.ListCreateAPIView):
+class TaskListCreateView(DeltaSyncListMixin, generics.ListCreateAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.AllowAny]
+    delta_model_name = 'task'
+
+    def get_deleted_filters(self):
+        job_id = self.request.query_params.get('job', None)
+        return {'job_id': job_id} if job_id else {}
 
     def get_queryset(self):
-        queryset = Task.objects.select_related('job').prefetch_related('assigned_users')
+        queryset = queryset_for_serializer(self.get_serializer_class())
 
         # Filter by job if provided
         job_id = self.request.query_params.get('job', None)
@@ -105,217 +146,317 @@ class TaskListCreateView(generics.ListCreateAPIView):
         return queryset.order_by('deadline')
 
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Task.objects.all()
+class TaskDetailView(VersionConflictMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        queryset = queryset_for_serializer(self.get_serializer_class())
+        if self.request.method in ('PUT', 'PATCH'):
+            queryset = with_assignment(queryset, self.request.user)
+        return queryset
+
     def update(self, request, *args, **kwargs):
-        # Check if user can update this task
+        # Check if user can update this task (EXISTS subquery, assignees aren't loaded)
         task = self.get_object()
-        if (request.user not in task.assigned_users.all() and
-                request.user.email != 'Admin@dbr.org'):
+        if not task.is_assigned and request.user.email != 'Admin@dbr.org':
             return Response(
                 {'error': 'Permission denied'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        return super().update(request, *args, **kwargs)
+
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(task, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        if getattr(task, '_prefetched_objects_cache', None):
+            task._prefetched_objects_cache = {}
+        return Response(serializer.data)
 
 
 # Developer Task Views
-class DeveloperTasksView(generics.ListAPIView):
+class DeveloperTasksView(DeltaSyncListMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.AllowAny]
+    # Tasks that left this developer's list: unassigned from them, or deleted
+    delta_model_name = 'assignment'
+
+    def get_deleted_filters(self):
+        return {'user_id': self.request.user.pk}
 
     def get_queryset(self):
-        return Task.objects.filter(
+        return queryset_for_serializer(self.get_serializer_class()).filter(
             assigned_users=self.request.user
-        ).select_related('job').order_by('deadline')
+        ).order_by('deadline')
+
+
+# Background job status (see background.py); views that answer 202 point here
+class BackgroundJobDetailView(generics.RetrieveAPIView):
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.email == 'Admin@dbr.org':
+            return BackgroundJob.objects.all()
+        return BackgroundJob.objects.filter(created_by=self.request.user)
 
 
 # Dashboard API Views
+# The widget logic lives in dashboard.py so the bundle endpoint can share it.
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def dashboard_stats(request):
     """Get dashboard statistics"""
-    today = timezone.now().date()
-    current_month = today.month
-    current_year = today.year
-
-    # Basic project stats
-    total_projects = Job.objects.count()
-
-    # Project status counts
-    in_progress_projects = Job.objects.filter(
-        tasks__progress__gt=0, tasks__progress__lt=100
-    ).distinct().count()
-
-    completed_projects = Job.objects.filter(
-        tasks__progress=100
-    ).distinct().count()
-
-    overdue_projects = Job.objects.filter(
-        tasks__deadline__lt=today, tasks__progress__lt=100
-    ).distinct().count()
-
-    # Financial data
-    total_revenue = Job.objects.aggregate(
-        total=Sum('over_all_income')
-    )['total'] or 0
-
-    monthly_income = Job.objects.filter(
-        created_at__year=current_year,
-        created_at__month=current_month
-    ).aggregate(total=Sum('over_all_income'))['total'] or 0
-
-    # Get income balance
-    balance_data = calculate_income_balance()
-    income_balance = balance_data['income_balance']
-
-    # Task and user counts
-    total_customers = User.objects.count()
-    total_transactions = Task.objects.filter(paid=True).count()
-    total_products = Task.objects.count()
-
-    stats = {
-        'total_projects': total_projects,
-        'in_progress_projects': in_progress_projects,
-        'completed_projects': completed_projects,
-        'overdue_projects': overdue_projects,
-        'total_revenue': total_revenue,
-        'total_customers': total_customers,
-        'total_transactions': total_transactions,
-        'total_products': total_products,
-        'monthly_income': monthly_income,
-        'income_balance': income_balance,
-    }
-
-    serializer = DashboardStatsSerializer(stats)
-    return Response(serializer.data)
+    return Response(dashboard.stats_widget(dashboard.DashboardContext(request.query_params)))
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
 def monthly_revenue_chart(request):
     """Get monthly revenue data for charts"""
-    from datetime import datetime
-    import calendar
+    return Response(dashboard.monthly_revenue_widget(dashboard.DashboardContext(request.query_params)))
 
-    # Get current year or specified year
-    year = int(request.query_params.get('year', timezone.now().year))
 
-    monthly_data = []
-    for month in range(1, 13):
-        # Get jobs created in this month
-        jobs_income = Job.objects.filter(
-            created_at__year=year,
-            created_at__month=month
-        ).aggregate(Sum('over_all_income'))['over_all_income__sum'] or 0
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def project_status_distribution(request):
+    """Get project status distribution for pie chart"""
+    return Response(dashboard.project_distribution_widget(dashboard.DashboardContext(request.query_params)))
 
-        # Get expenses (money paid to developers)
-        expenses = Task.objects.filter(
-            job__created_at__year=year,
-            job__created_at__month=month,
-            paid=True
-        ).aggregate(Sum('money_for_task'))['money_for_task__sum'] or 0
 
-        profit = jobs_income - expenses
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def recent_projects(request):
+    """Get recent projects for dashboard"""
+    return Response(dashboard.recent_projects_widget(dashboard.DashboardContext(request.query_params)))
 
-        monthly_data.append({
-            'month': calendar.month_abbr[month],
-            'income': jobs_income,
-            'expenses': expenses,
-            'profit': profit
-        })
 
-    return Response(monthly_data)
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def upcoming_deadlines(request):
+    """Get upcoming task deadlines"""
+    return Response(dashboard.upcoming_deadlines_widget(dashboard.DashboardContext(request.query_params)))
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def project_status_distribution(request):
-    """Get project status distribution for pie chart"""
-    today = timezone.now().date()
+def dashboard_bundle(request):
+    """
+    Several dashboard widgets in one round trip: ?widgets=stats,monthly_revenue,...
+    (all widgets when omitted). Includes per-widget timings in milliseconds.
+    """
+    requested = request.query_params.get('widgets')
+    names = [name.strip() for name in requested.split(',') if name.strip()] if requested else list(dashboard.WIDGETS)
+    unknown = [name for name in names if name not in dashboard.WIDGETS]
+    if unknown:
+        return Response(
+            {'error': f"Unknown widgets: {', '.join(unknown)}", 'available': list(dashboard.WIDGETS)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(dashboard.build_bundle(list(dict.fromkeys(names)), request.query_params))
 
-    # Count projects by status
-    in_progress = Job.objects.filter(
-        tasks__progress__gt=0, tasks__progress__lt=100
-    ).distinct().count()
 
-    completed = Job.objects.filter(
-        tasks__progress=100
-    ).distinct().count()
+# Calendar API Views
+CALENDAR_MAX_RANGE_DAYS = 400
+CALENDAR_CACHE_TIMEOUT = 300  # Safety net for per-process caches; the data version does the real invalidation
 
-    overdue = Job.objects.filter(
-        tasks__deadline__lt=today, tasks__progress__lt=100
-    ).distinct().count()
 
-    data = [
-        {'status': 'В ходе выполнения', 'count': in_progress, 'percentage': 58.33},
-        {'status': 'Законченный', 'count': completed, 'percentage': 25},
-        {'status': 'Незаконченный', 'count': overdue, 'percentage': 8}
-    ]
+def _calendar_range(params):
+    """Resolve start/end dates from ?start=&end= or the legacy ?year=&month= params."""
+    import calendar
 
-    return Response(data)
+    if params.get('start') or params.get('end'):
+        start = parse_date(params.get('start') or '')
+        end = parse_date(params.get('end') or '')
+        if not start or not end:
+            raise ValueError('start and end must both be dates in YYYY-MM-DD format')
+    else:
+        year = int(params.get('year', timezone.now().year))
+        month = int(params.get('month', timezone.now().month))
+        start = date(year, month, 1)
+        end = date(year, month, calendar.monthrange(year, month)[1])
+
+    if start > end:
+        raise ValueError('start must not be after end')
+    if (end - start).days > CALENDAR_MAX_RANGE_DAYS:
+        raise ValueError(f'Date range cannot exceed {CALENDAR_MAX_RANGE_DAYS} days')
+    return start, end
+
+
+def calendar_cache_key(start, end, developer_id, job_id, today, version):
+    return 'calendar:{}:{}:{}:{}:{}:{}'.format(
+        start.isoformat(), end.isoformat(), developer_id, job_id, today.isoformat(), version
+    )
+
+
+def calendar_rows(start, end, developer_id, job_id, today):
+    tasks = Task.objects.filter(deadline__gte=start, deadline__lte=end)
+    if developer_id:
+        tasks = tasks.filter(assigned_users__id=developer_id)
+    if job_id:
+        tasks = tasks.filter(job_id=job_id)
+
+    return tasks.annotate(
+        job_title=F('job__title'),
+        # Same rules as TaskSerializer.get_status_color()
+        status_color=deadlines.status_case(today, completed=True, due_days=1),
+    ).values(
+        'id', 'title', 'progress', 'deadline', 'job_id', 'job_title', 'status_color'
+    ).order_by('deadline', 'id')
+
+
+def group_by_deadline(rows):
+    tasks_by_date = {}
+    for row in rows:
+        date_key = row.pop('deadline').strftime('%Y-%m-%d')
+        tasks_by_date.setdefault(date_key, []).append(row)
+    return tasks_by_date
 
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def recent_projects(request):
-    """Get recent projects for dashboard"""
-    recent_jobs = Job.objects.order_by('-created_at')[:5]
-    serializer = JobSerializer(recent_jobs, many=True)
-    return Response(serializer.data)
+def calendar_params(params):
+    """(start, end, developer_id, job_id) from the query string; raises ValueError."""
+    start, end = _calendar_range(params)
+    developer_id = params.get('developer') or None
+    job_id = params.get('job') or None
+    developer_id = int(developer_id) if developer_id else None
+    job_id = int(job_id) if job_id else None
+    return start, end, developer_id, job_id
 
 
 @api_view(['GET'])
 @permission_classes([permissions.AllowAny])
-def upcoming_deadlines(request):
-    """Get upcoming task deadlines"""
+def calendar_tasks(request):
+    """
+    Get tasks for calendar view, grouped by deadline date.
+    Accepts ?start=&end= (or ?year=&month=) and optional ?developer= / ?job= ids.
+    """
+    try:
+        start, end, developer_id, job_id = calendar_params(request.query_params)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
     today = timezone.now().date()
-    upcoming_tasks = Task.objects.filter(
-        progress__lt=100,
-        deadline__gte=today
-    ).select_related('job').order_by('deadline')[:10]
+    cache_key = calendar_cache_key(start, end, developer_id, job_id, today, get_data_version('tasks'))
+    tasks_by_date = cache.get(cache_key)
+    if tasks_by_date is not None:
+        return Response(tasks_by_date)
 
-    serializer = TaskSerializer(upcoming_tasks, many=True)
-    return Response(serializer.data)
+    tasks_by_date = group_by_deadline(calendar_rows(start, end, developer_id, job_id, today))
+    cache.set(cache_key, tasks_by_date, CALENDAR_CACHE_TIMEOUT)
+    return Response(tasks_by_date)
 
 
-# Calendar API Views
 @api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def calendar_tasks(request):
-    """Get tasks for calendar view"""
-    year = int(request.query_params.get('year', timezone.now().year))
-    month = int(request.query_params.get('month', timezone.now().month))
+@permission_classes([IsAdminUser])
+def earnings_pivot(request):
+    """
+    Earned / paid / deducted per developer per month for ?start=&end= (YYYY-MM-DD),
+    in the columnar layout described in earnings_pivot.py.
+    """
+    start = parse_date(request.query_params.get('start') or '')
+    end = parse_date(request.query_params.get('end') or '')
+    if not start or not end:
+        return Response({'error': 'start and end must both be dates in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days > pivot.MAX_RANGE_DAYS:
+        return Response({'error': f'Date range cannot exceed {pivot.MAX_RANGE_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+    cache_key = pivot.pivot_cache_key(start, end, get_data_version('tasks'), get_data_version('deductions'))
+    data = cache.get(cache_key)
+    if data is None:
+        data = pivot.earnings_pivot(start, end)
+        cache.set(cache_key, data, pivot.CACHE_TIMEOUT)
+    return Response(data)
 
-    # Get tasks for the specified month
-    tasks = Task.objects.filter(
-        deadline__year=year,
-        deadline__month=month
-    ).select_related('job')
 
-    # Group tasks by date
-    tasks_by_date = {}
-    for task in tasks:
-        date_key = task.deadline.strftime('%Y-%m-%d')
-        if date_key not in tasks_by_date:
-            tasks_by_date[date_key] = []
-        tasks_by_date[date_key].append({
-            'id': task.id,
-            'title': task.title,
-            'progress': task.progress,
-            'job_title': task.job.title,
-            'status_color': TaskSerializer().get_status_color(task)
-        })
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def developer_workload(request):
+    """
+    Planned hours per developer per week for ?start=&end= (YYYY-MM-DD, widened to whole
+    weeks), each task's hours spread evenly over start_date..deadline (see workload.py).
+    ?remaining=1 counts only the part of each task that isn't done yet.
+    """
+    start = parse_date(request.query_params.get('start') or '')
+    end = parse_date(request.query_params.get('end') or '')
+    if not start or not end:
+        return Response({'error': 'start and end must both be dates in YYYY-MM-DD format'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    start, end = workload.week_range(start, end)
+    if (end - start).days + 1 > workload.MAX_WEEKS * 7:
+        return Response({'error': f'Range cannot exceed {workload.MAX_WEEKS} weeks'}, status=status.HTTP_400_BAD_REQUEST)
+    remaining = request.query_params.get('remaining') in ('1', 'true')
+
+    cache_key = workload.workload_cache_key(start, end, remaining, get_data_version('tasks'))
+    data = cache.get(cache_key)
+    if data is None:
+        data = workload.workload_matrix(start, end, remaining=remaining)
+        cache.set(cache_key, data, workload.CACHE_TIMEOUT)
+    return Response(data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def overdue_monitor(request):
+    """
+    Overdue tasks page by page (?cursor=, ?page_size=) with the per-job / per-developer
+    summary of the overdue_tasks page; ?job= and ?developer= narrow both.
+    """
+    today = buckets.ensure_buckets_fresh()
+    filters = overdue.parse_filters(request.query_params)
+    page = overdue.overdue_page(overdue.overdue_queryset(filters), request.query_params)
+    return Response({
+        'summary': overdue.overdue_summary(filters),
+        'tasks': [overdue.task_row(task, today) for task in page['tasks']],
+        'next_cursor': page['next_cursor'],
+    })
 
-    return Response(tasks_by_date)
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def job_burndown(request, job_id):
+    """
+    Daily weighted progress of a job from the JobProgressDaily rollups.
+    Optional ?start=&end= (YYYY-MM-DD); defaults to the last 12 months.
+    """
+    if not Job.objects.filter(pk=job_id).exists():
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    today = timezone.localdate()
+    end = parse_date(request.query_params.get('end') or '') or today
+    start = parse_date(request.query_params.get('start') or '') or end - timedelta(days=job_rollups.BURNDOWN_MAX_DAYS - 1)
+    if start > end:
+        return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= job_rollups.BURNDOWN_MAX_DAYS:
+        return Response({'error': f'Date range cannot exceed {job_rollups.BURNDOWN_MAX_DAYS} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+    points = job_rollups.burndown(job_id, start, end)
+    return Response({
+        'job_id': job_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'points': points,
+        'average_velocity': job_rollups.average_velocity(points),
+    })
 
 
 # CRM API Views
-class CrmJobViewSet(viewsets.ModelViewSet):
-    queryset = CrmJob.objects.all()
+class AnnotatedCrmJobWriteMixin:
+    """Answer creates/updates with the job re-read with the counts CrmJobSerializer expects."""
+
+    def perform_create(self, serializer):
+        serializer.save()
+        serializer.instance = get_annotated_crm_job(serializer.instance.pk)
+
+    def perform_update(self, serializer):
+        serializer.save()
+        serializer.instance = get_annotated_crm_job(serializer.instance.pk)
+
+
+class CrmJobViewSet(AnnotatedCrmJobWriteMixin, viewsets.ModelViewSet):
+    queryset = annotated_crm_jobs()
     serializer_class = CrmJobSerializer
 
 
@@ -334,10 +475,18 @@ class CrmTaskFileViewSet(viewsets.ModelViewSet):
     serializer_class = CrmTaskFileSerializer
 
 
-class CrmJobListCreateView(generics.ListCreateAPIView):
-    queryset = CrmJob.objects.all()
+class CrmJobListCreateView(AnnotatedCrmJobWriteMixin, DeltaSyncListMixin, generics.ListCreateAPIView):
+    """
+    Paginated CRM job listing with task/comment/file counts.
+    Supports ?status=, ?company=, ?q=, ?ordering= and ?page=/?page_size=.
+    """
     serializer_class = CrmJobSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = CrmJobPagination
+    delta_model_name = 'crmjob'
+
+    def get_queryset(self):
+        return crm_job_queryset(self.request.query_params)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -348,7 +497,7 @@ class CrmJobListCreateView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class CrmJobDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = CrmJob.objects.all()
+class CrmJobDetailView(AnnotatedCrmJobWriteMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = annotated_crm_jobs()
     serializer_class = CrmJobSerializer
     permission_classes = [permissions.AllowAny]
\ No newline at end of file
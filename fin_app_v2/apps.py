@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FinAppV2Config(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fin_app_v2'
+
+    def ready(self):
+        from . import signals  # noqa: F401
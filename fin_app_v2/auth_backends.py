@@ -0,0 +1,58 @@
+"""
+Email login for all portals and the JWT endpoint: authenticate(request, email=..., password=...).
+
+The user is found with one `WHERE LOWER(email) = ?` query, which uses the functional
+index added in migration 0011. Emails with no account are remembered in the cache for
+AUTH_NEGATIVE_CACHE_SECONDS so credential-stuffing with unknown addresses doesn't reach
+the DB; saving a user clears its entry (signals.py).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db.models.functions import Lower
+
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+
+def unknown_email_key(email):
+    return 'auth:unknown-email:' + hashlib.sha1(normalize_email(email).encode()).hexdigest()
+
+
+def forget_unknown_email(email):
+    cache.delete(unknown_email_key(email))
+
+
+class EmailBackend(ModelBackend):
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None  # Username logins are left to ModelBackend
+
+        UserModel = get_user_model()
+        email = normalize_email(email)
+        cache_seconds = getattr(settings, 'AUTH_NEGATIVE_CACHE_SECONDS', 60)
+        if cache_seconds and cache.get(unknown_email_key(email)):
+            candidates = []
+        else:
+            candidates = list(
+                UserModel._default_manager.alias(email_lower=Lower('email'))
+                .filter(email_lower=email)
+                .order_by('pk')
+            )
+            if not candidates and cache_seconds:
+                cache.set(unknown_email_key(email), True, cache_seconds)
+
+        if not candidates:
+            # Run the hasher anyway so unknown emails take as long as wrong passwords
+            UserModel().set_password(password)
+            return None
+
+        # auth_user.email isn't unique; the first account whose password matches wins
+        for user in candidates:
+            if user.check_password(password) and self.user_can_authenticate(user):
+                return user
+        return None
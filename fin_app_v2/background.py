@@ -0,0 +1,173 @@
+"""
+Small DB-backed job queue for heavy write operations; no broker needed.
+
+Views enqueue a BackgroundJob row and answer 202 with its status URL; the
+`run_background_jobs` management command claims queued rows with
+SELECT ... FOR UPDATE SKIP LOCKED (so several workers can run side by side),
+runs the registered handler and records progress, result or error. Failed jobs
+are retried with exponential backoff until `max_attempts`.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import task_operations
+from .models import BackgroundJob, Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def background_task(name):
+    """Register `func(report, **payload)` as the handler for jobs called `name`."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, user=None, max_attempts=3):
+    if name not in _registry:
+        raise ValueError(f"Unknown background job: {name}")
+    return BackgroundJob.objects.create(
+        name=name,
+        payload=payload or {},
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts,
+    )
+
+
+def wants_async(request):
+    """True when the client asked for a 202 (`Prefer: respond-async` or ?async=1 / async=1 in the form)."""
+    if 'respond-async' in request.headers.get('Prefer', ''):
+        return True
+    return (request.GET.get('async') or request.POST.get('async')) in ('1', 'true')
+
+
+def job_status(job):
+    from .serializers import BackgroundJobSerializer
+    return BackgroundJobSerializer(job).data
+
+
+def accepted_response(job):
+    """202 Accepted pointing at the job's status endpoint."""
+    response = JsonResponse(job_status(job), status=202)
+    response['Location'] = reverse('api_background_job', args=[job.pk])
+    return response
+
+
+def accepted_batch_response(jobs):
+    """202 Accepted for a request that queued several jobs: {'job_ids': [...], 'jobs': [statuses]}."""
+    return JsonResponse({
+        'job_ids': [job.pk for job in jobs],
+        'jobs': [job_status(job) for job in jobs],
+    }, status=202)
+
+
+# Worker side
+
+def _reporter(job):
+    def report(percent, message=''):
+        # Written straight away, so it is only visible to pollers for work outside a transaction
+        BackgroundJob.objects.filter(pk=job.pk).update(progress=max(0, min(100, percent)), message=message[:255])
+    return report
+
+
+def claim_next_job():
+    """Lock and mark the next due job as running; None when the queue is empty."""
+    with transaction.atomic():
+        job = (
+            BackgroundJob.objects.select_for_update(skip_locked=True)
+            .filter(status=BackgroundJob.STATUS_QUEUED, run_after__lte=timezone.now())
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = BackgroundJob.STATUS_RUNNING
+        job.attempts += 1
+        job.progress = 0
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'progress', 'started_at'])
+    return job
+
+
+def run_job(job):
+    handler = _registry.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {job.name}")
+        result = handler(_reporter(job), **job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception("Background job %s failed (attempt %s/%s)", job.pk, job.attempts, job.max_attempts)
+        if handler is not None and job.attempts < job.max_attempts:
+            delay = getattr(settings, 'BACKGROUND_JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+            BackgroundJob.objects.filter(pk=job.pk).update(
+                status=BackgroundJob.STATUS_QUEUED,
+                run_after=timezone.now() + timedelta(seconds=delay),
+                error=error,
+                message=f"Повтор через {delay} с",
+            )
+        else:
+            BackgroundJob.objects.filter(pk=job.pk).update(
+                status=BackgroundJob.STATUS_FAILED,
+                error=error,
+                finished_at=timezone.now(),
+            )
+        return False
+
+    BackgroundJob.objects.filter(pk=job.pk).update(
+        status=BackgroundJob.STATUS_SUCCEEDED,
+        progress=100,
+        result=result,
+        error='',
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def requeue_stale_jobs():
+    """Put back jobs left 'running' by a worker that died; returns how many."""
+    stale_after = getattr(settings, 'BACKGROUND_JOB_STALE_AFTER', 30 * 60)
+    return BackgroundJob.objects.filter(
+        status=BackgroundJob.STATUS_RUNNING,
+        started_at__lt=timezone.now() - timedelta(seconds=stale_after),
+    ).update(status=BackgroundJob.STATUS_QUEUED, message="Перезапуск после сбоя воркера")
+
+
+# Handlers. Payloads are JSON, so dates travel as ISO strings and users as ids.
+
+@background_task('patpis_series')
+def _patpis_series(report, task_id, start_date, end_date):
+    task = Task.objects.get(pk=task_id)
+    # One transaction, so a failed rebalance doesn't leave a series behind for the retry to create again
+    with transaction.atomic():
+        created = task_operations.create_patpis_series(task, parse_date(start_date), parse_date(end_date), report)
+        task_operations.rebalance_task_percentages(task.job_id)
+    return {'job_id': task.job_id, 'created_tasks': created}
+
+
+@background_task('rebalance')
+def _rebalance(report, job_id):
+    return {'job_id': job_id, 'updated_tasks': task_operations.rebalance_task_percentages(job_id)}
+
+
+@background_task('delete_job')
+def _delete_job(report, job_id):
+    deleted = task_operations.delete_job_with_tasks(job_id, report)
+    return {'job_id': job_id, 'deleted_tasks': deleted}
+
+
+@background_task('confirm_tasks')
+def _confirm_tasks(report, task_ids, confirmed_by_id):
+    return {'confirmed': task_operations.confirm_tasks(task_ids, confirmed_by_id, report)}
+
@@ -0,0 +1,36 @@
+import time
+
+from django.core.cache import cache
+
+# Cached read endpoints put the current data version of their scope into the cache key,
+# so any write simply makes the old entries unreachable instead of deleting them one by one.
+# Versions are bumped from signals.py (and by hand after queryset .update() calls).
+DATA_VERSION_KEY = 'data_version:{scope}'
+
+
+def get_data_version(scope='tasks'):
+    key = DATA_VERSION_KEY.format(scope=scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed with a timestamp so a version lost to eviction never collides with an old one
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(*scopes):
+    for scope in scopes or ('tasks',):
+        key = DATA_VERSION_KEY.format(scope=scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+async def aget_data_version(scope='tasks'):
+    key = DATA_VERSION_KEY.format(scope=scope)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
@@ -0,0 +1,71 @@
+"""
+Optimistic concurrency for Task and Job edits.
+
+Every save of an existing row is an `UPDATE ... WHERE id = ? AND version = ?` that also
+bumps the version; if no row matches, somebody else changed it since it was read and
+ConcurrencyConflict is raised instead of silently overwriting their edit. Forms carry the
+version they were rendered with in a hidden field, API clients send it as `version`, so
+the check spans requests without holding any lock.
+"""
+from django import forms
+from django.db import models
+from django.db.models import F
+
+
+class ConcurrencyConflict(Exception):
+    """The row was changed (or deleted) since `instance` was read."""
+
+    def __init__(self, instance):
+        self.instance = instance
+        super().__init__(
+            f"{instance._meta.verbose_name.capitalize()} #{instance.pk} was changed by someone else"
+        )
+
+    def current(self):
+        """Fresh copy of the row, or None if it was deleted."""
+        return type(self.instance)._default_manager.filter(pk=self.instance.pk).first()
+
+
+class VersionedModel(models.Model):
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'version' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['version']
+        super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        expected = self.version
+        version_field = self._meta.get_field('version')
+        values = [
+            (field, model, expected + 1 if field is version_field else value)
+            for field, model, value in values
+        ]
+        if super()._do_update(base_qs.filter(version=expected), using, pk_val, values, update_fields, forced_update):
+            self.version = expected + 1
+            return True
+        if base_qs.filter(pk=pk_val).exists():
+            raise ConcurrencyConflict(self)
+        return False
+
+
+def next_version():
+    """For queryset .update()/bulk_update() writes, which bypass save()."""
+    return F('version') + 1
+
+
+class VersionFormMixin:
+    """Adds the hidden `version` field; a missing/empty value keeps the loaded one."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['version'] = forms.IntegerField(widget=forms.HiddenInput, required=False, min_value=1)
+        if self.instance.pk:
+            self.fields['version'].initial = self.instance.version
+
+    def clean_version(self):
+        return self.cleaned_data.get('version') or self.instance.version
@@ -0,0 +1,109 @@
+from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework.pagination import PageNumberPagination
+
+from .models_crm import CrmJob, CrmTask, CrmTaskComment, CrmTaskFile
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# ?ordering= accepts these (prefix with '-' for descending)
+ORDERING_FIELDS = {
+    'created_at', 'updated_at', 'title', 'over_all_income', 'status',
+    'client_company_name', 'task_count', 'comment_count', 'file_count',
+}
+DEFAULT_ORDERING = '-created_at'
+
+
+def _count_subquery(queryset, job_lookup):
+    # Correlated COUNT per job; cheaper than joining all three tables and counting DISTINCT
+    counts = (
+        queryset.filter(**{job_lookup: OuterRef('pk')})
+        .order_by()
+        .values(job_lookup)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def annotated_crm_jobs():
+    """CrmJob queryset with task, comment and file counts computed in the same query."""
+    return CrmJob.objects.annotate(
+        task_count=_count_subquery(CrmTask.objects.all(), 'job'),
+        comment_count=_count_subquery(CrmTaskComment.objects.all(), 'task__job'),
+        file_count=_count_subquery(CrmTaskFile.objects.all(), 'task__job'),
+    )
+
+
+def filter_crm_jobs(queryset, params):
+    """Apply ?status=, ?company= and free-text ?q= filters."""
+    status = params.get('status')
+    if status:
+        queryset = queryset.filter(status=status)
+
+    company = params.get('company')
+    if company:
+        queryset = queryset.filter(client_company_name__icontains=company)
+
+    text = (params.get('q') or params.get('search') or '').strip()
+    if text:
+        queryset = queryset.filter(
+            Q(title__icontains=text) |
+            Q(full_name__icontains=text) |
+            Q(client_email__icontains=text) |
+            Q(client_company_name__icontains=text) |
+            Q(phone_number__icontains=text)
+        )
+    return queryset
+
+
+def order_crm_jobs(queryset, ordering):
+    field = (ordering or '').lstrip('-')
+    if field not in ORDERING_FIELDS:
+        ordering = DEFAULT_ORDERING
+    # id as a tie-breaker keeps pages stable
+    return queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+
+
+def crm_job_queryset(params):
+    """Annotated, filtered and ordered CrmJob queryset for a listing request."""
+    queryset = filter_crm_jobs(annotated_crm_jobs(), params)
+    return order_crm_jobs(queryset, params.get('ordering'))
+
+
+def get_annotated_crm_job(pk):
+    return annotated_crm_jobs().get(pk=pk)
+
+
+def _page_size(params):
+    try:
+        page_size = int(params.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        page_size = DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def crm_job_listing(params):
+    """
+    Paginated listing for the plain Django endpoints. Rows are serialized with
+    CrmJobSerializer, the same as the DRF CrmJob views.
+    """
+    from .serializers import CrmJobSerializer
+
+    paginator = Paginator(crm_job_queryset(params), _page_size(params))
+    page = paginator.get_page(params.get('page'))
+    return {
+        'count': paginator.count,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'page_size': paginator.per_page,
+        'results': CrmJobSerializer(page.object_list, many=True).data,
+    }
+
+
+class CrmJobPagination(PageNumberPagination):
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
@@ -0,0 +1,227 @@
+import calendar
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from . import accounting
+from .models import Job, Task
+from .querysets import queryset_for_serializer
+from .serializers import DashboardStatsSerializer, JobSerializer, TaskSerializer
+
+logger = logging.getLogger(__name__)
+
+# What a failed widget reports in 'errors'; the details go to the log, not to the client
+WIDGET_ERROR = 'failed'
+
+
+class DashboardContext:
+    """
+    Per-request memo for intermediate results that several widgets need (status counts,
+    job/task totals). Safe to share between the bundle's worker threads: the first widget
+    to ask computes a value, the others wait for it.
+    """
+
+    def __init__(self, params=None):
+        self.params = params or {}
+        self.today = timezone.now().date()
+        self._values = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def shared(self, name, compute):
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._values:
+                self._values[name] = compute(self)
+            return self._values[name]
+
+    def project_status_counts(self):
+        return self.shared('project_status_counts', _project_status_counts)
+
+    def job_totals(self):
+        return self.shared('job_totals', _job_totals)
+
+    def task_totals(self):
+        return self.shared('task_totals', _task_totals)
+
+
+# Aggregate arguments are built separately so the async views (api_async_views.py)
+# can run the same queries with aaggregate()
+def project_status_aggregates(today):
+    # One pass over jobs ⟕ tasks instead of three DISTINCT count queries
+    return {
+        'in_progress': Count('id', filter=Q(tasks__progress__gt=0, tasks__progress__lt=100), distinct=True),
+        'completed': Count('id', filter=Q(tasks__progress=100), distinct=True),
+        'overdue': Count('id', filter=Q(tasks__deadline__lt=today, tasks__progress__lt=100), distinct=True),
+    }
+
+
+def job_total_aggregates(today):
+    return {
+        'count': Count('id'),
+        'income': Sum('over_all_income'),
+        'monthly_income': Sum('over_all_income', filter=Q(
+            created_at__year=today.year,
+            created_at__month=today.month,
+        )),
+    }
+
+
+def task_total_aggregates():
+    return {
+        'count': Count('id'),
+        'paid_count': Count('id', filter=Q(paid=True)),
+        'money': Sum('money_for_task'),
+    }
+
+
+def zero_nulls(totals):
+    return {key: value or 0 for key, value in totals.items()}
+
+
+def _project_status_counts(ctx):
+    return Job.objects.aggregate(**project_status_aggregates(ctx.today))
+
+
+def _job_totals(ctx):
+    return zero_nulls(Job.objects.aggregate(**job_total_aggregates(ctx.today)))
+
+
+def _task_totals(ctx):
+    return zero_nulls(Task.objects.aggregate(**task_total_aggregates()))
+
+
+def stats_data(status_counts, job_totals, task_totals, user_count):
+    stats = {
+        'total_projects': job_totals['count'],
+        'in_progress_projects': status_counts['in_progress'],
+        'completed_projects': status_counts['completed'],
+        'overdue_projects': status_counts['overdue'],
+        'total_revenue': job_totals['income'],
+        'total_customers': user_count,
+        'total_transactions': task_totals['paid_count'],
+        'total_products': task_totals['count'],
+        'monthly_income': job_totals['monthly_income'],
+        # Same figure as calculate_income_balance(), without re-running its two aggregates
+        'income_balance': job_totals['income'] - task_totals['money'],
+    }
+    return DashboardStatsSerializer(stats).data
+
+
+# Widgets. Each returns exactly what its stand-alone endpoint returns.
+
+def stats_widget(ctx):
+    return stats_data(
+        ctx.project_status_counts(), ctx.job_totals(), ctx.task_totals(), User.objects.count()
+    )
+
+
+def monthly_revenue_widget(ctx):
+    year = int(ctx.params.get('year', ctx.today.year))
+    # Closed months come from the AccountingPeriod snapshots, open ones are aggregated live
+    revenue = accounting.monthly_revenue(year)
+
+    monthly_data = []
+    for month in range(1, 13):
+        jobs_income, expenses = revenue.get(month, (0, 0))
+        monthly_data.append({
+            'month': calendar.month_abbr[month],
+            'income': jobs_income,
+            'expenses': expenses,
+            'profit': jobs_income - expenses
+        })
+    return monthly_data
+
+
+def project_distribution_widget(ctx):
+    counts = ctx.project_status_counts()
+    return [
+        {'status': 'В ходе выполнения', 'count': counts['in_progress'], 'percentage': 58.33},
+        {'status': 'Законченный', 'count': counts['completed'], 'percentage': 25},
+        {'status': 'Незаконченный', 'count': counts['overdue'], 'percentage': 8}
+    ]
+
+
+def recent_projects_queryset():
+    return queryset_for_serializer(JobSerializer).order_by('-created_at')[:5]
+
+
+def recent_projects_widget(ctx):
+    return JobSerializer(recent_projects_queryset(), many=True).data
+
+
+def upcoming_deadlines_queryset(today):
+    return queryset_for_serializer(TaskSerializer).filter(
+        progress__lt=100,
+        deadline__gte=today
+    ).order_by('deadline')[:10]
+
+
+def upcoming_deadlines_widget(ctx):
+    return TaskSerializer(upcoming_deadlines_queryset(ctx.today), many=True).data
+
+
+WIDGETS = {
+    'stats': stats_widget,
+    'monthly_revenue': monthly_revenue_widget,
+    'project_distribution': project_distribution_widget,
+    'recent_projects': recent_projects_widget,
+    'upcoming_deadlines': upcoming_deadlines_widget,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'DASHBOARD_BUNDLE_WORKERS', 4),
+                thread_name_prefix='dashboard-bundle',
+            )
+        return _executor
+
+
+def _timed(name, ctx):
+    started = time.perf_counter()
+    try:
+        return WIDGETS[name](ctx), None, time.perf_counter() - started
+    except Exception:
+        logger.exception("Dashboard widget %s failed", name)
+        return None, WIDGET_ERROR, time.perf_counter() - started
+    finally:
+        # Pool threads outlive the request, so don't let them hold DB connections
+        connections.close_all()
+
+
+def build_bundle(names, params=None):
+    """Compute the requested widgets concurrently on the shared bounded pool."""
+    ctx = DashboardContext(params)
+    started = time.perf_counter()
+    futures = {name: _get_executor().submit(_timed, name, ctx) for name in names}
+
+    widgets, timings, errors = {}, {}, {}
+    for name, future in futures.items():
+        data, error, elapsed = future.result()
+        timings[name] = round(elapsed * 1000, 2)
+        if error is None:
+            widgets[name] = data
+        else:
+            errors[name] = error
+
+    return {
+        'widgets': widgets,
+        'errors': errors,
+        'timings_ms': timings,
+        'total_ms': round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,105 @@
+"""
+Stored deadline buckets (Task.deadline_bucket).
+
+A task's bucket only depends on its deadline and the current date, so it is computed on
+save and refreshed for everyone once a day by `manage.py refresh_task_buckets`. Views then
+filter on an indexed equality (deadline_bucket='today') instead of date arithmetic.
+The bucket itself ignores progress; Task.is_overdue (deadline passed and progress < 100)
+is stored next to it and follows progress writes as well.
+"""
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, CharField, Q, Value, When
+from django.utils import timezone
+
+OVERDUE = 'overdue'
+TODAY = 'today'
+TOMORROW = 'tomorrow'
+DAYS_2_5 = 'days_2_5'
+DAYS_6_7 = 'days_6_7'
+DAYS_8_10 = 'days_8_10'
+LATER = 'later'
+NO_DEADLINE = 'none'
+
+# Boundaries cover the date filters the views use (0/1/5/7/10 days ahead). Colour
+# statuses come from deadline_classifier.py, whose thresholds are configurable.
+NEXT_WEEK = (DAYS_2_5, DAYS_6_7)  # 2-7 days left ("week" in all_developer_tasks)
+UPCOMING = (TODAY, TOMORROW, DAYS_2_5, DAYS_6_7, DAYS_8_10, LATER)  # deadline today or later
+
+LAST_REFRESH_KEY = 'task_buckets:refreshed_on'
+
+
+def bucket_for(deadline, today):
+    if deadline is None:
+        return NO_DEADLINE
+    days = (deadline - today).days
+    if days < 0:
+        return OVERDUE
+    if days == 0:
+        return TODAY
+    if days == 1:
+        return TOMORROW
+    if days <= 5:
+        return DAYS_2_5
+    if days <= 7:
+        return DAYS_6_7
+    if days <= 10:
+        return DAYS_8_10
+    return LATER
+
+
+def is_overdue(deadline, progress, today):
+    return deadline is not None and deadline < today and progress < 100
+
+
+def bucket_case(today):
+    """SQL version of bucket_for() for bulk refreshes."""
+    return Case(
+        When(deadline__isnull=True, then=Value(NO_DEADLINE)),
+        When(deadline__lt=today, then=Value(OVERDUE)),
+        When(deadline=today, then=Value(TODAY)),
+        When(deadline=today + timedelta(days=1), then=Value(TOMORROW)),
+        When(deadline__lte=today + timedelta(days=5), then=Value(DAYS_2_5)),
+        When(deadline__lte=today + timedelta(days=7), then=Value(DAYS_6_7)),
+        When(deadline__lte=today + timedelta(days=10), then=Value(DAYS_8_10)),
+        default=Value(LATER),
+        output_field=CharField(),
+    )
+
+
+def overdue_case(today):
+    return Case(
+        When(deadline__lt=today, progress__lt=100, then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
+
+def refresh_task_buckets(today=None, only_stale=True):
+    """Recompute buckets in one UPDATE; returns the number of rows written."""
+    from .models import Task
+
+    today = today or timezone.now().date()
+    tasks = Task.objects.all()
+    if only_stale:
+        tasks = tasks.filter(Q(bucket_date__lt=today) | Q(bucket_date__isnull=True))
+    # updated_at is left alone on purpose: buckets are derived data, not an edit
+    updated = tasks.update(
+        deadline_bucket=bucket_case(today),
+        is_overdue=overdue_case(today),
+        bucket_date=today,
+    )
+    cache.set(LAST_REFRESH_KEY, today.isoformat(), 24 * 60 * 60)
+    return updated
+
+
+def ensure_buckets_fresh():
+    """
+    Guard for views that filter on buckets: if the nightly refresh hasn't run yet today
+    (cron late or missing), bring stale rows up to date first. Costs a cache hit otherwise.
+    """
+    today = timezone.now().date()
+    if cache.get(LAST_REFRESH_KEY) != today.isoformat():
+        refresh_task_buckets(today)
+    return today
@@ -0,0 +1,98 @@
+"""
+The one set of deadline status rules (green / yellow / red / overdue ...) used by the
+views, the API and the templates.
+
+Thresholds are days left until the deadline, from DEADLINE_STATUS_THRESHOLDS:
+up to 'red' days is task_red, up to 'yellow' days is task_yellow, more is task_green.
+A deadline in the past is overdue. Two options cover the variants the pages show:
+
+- completed: progress 100 is 'completed' whatever the deadline
+- due_days: 1 names today's deadlines 'due_today', 2 also names tomorrow's 'due_tomorrow'
+
+status_case() is the SQL backend (annotate, or values() + Count for GROUP BY counts) and
+classifier() the Python one for objects already in memory; both give the same answer.
+The stored buckets in deadline_buckets.py are for filtering and don't follow thresholds.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Case, CharField, Q, Value, When
+
+COMPLETED = 'completed'
+OVERDUE = 'overdue'
+DUE_TODAY = 'due_today'
+DUE_TOMORROW = 'due_tomorrow'
+RED = 'task_red'
+YELLOW = 'task_yellow'
+GREEN = 'task_green'
+NO_DEADLINE = 'no_deadline'
+
+DEFAULT_THRESHOLDS = {'red': 5, 'yellow': 10}
+
+
+def thresholds():
+    return {**DEFAULT_THRESHOLDS, **getattr(settings, 'DEADLINE_STATUS_THRESHOLDS', {})}
+
+
+def _cutoffs(today):
+    """Last deadline that is still red, and still yellow."""
+    limits = thresholds()
+    return today + timedelta(days=limits['red']), today + timedelta(days=limits['yellow'])
+
+
+def classifier(today, completed=False, due_days=0):
+    """
+    A function (deadline, progress=0) -> status, with the cutoff dates worked out once, for
+    classifying lists: `classify = classifier(today); statuses = [classify(t.deadline, t.progress) for t in tasks]`.
+    """
+    red_until, yellow_until = _cutoffs(today)
+    tomorrow = today + timedelta(days=1)
+
+    def classify(deadline, progress=0):
+        if completed and progress == 100:
+            return COMPLETED
+        if deadline is None:
+            return NO_DEADLINE
+        if deadline < today:
+            return OVERDUE
+        if due_days >= 1 and deadline == today:
+            return DUE_TODAY
+        if due_days >= 2 and deadline == tomorrow:
+            return DUE_TOMORROW
+        if deadline <= red_until:
+            return RED
+        if deadline <= yellow_until:
+            return YELLOW
+        return GREEN
+
+    return classify
+
+
+def classify(deadline, progress, today, **options):
+    """Status of a single task; use classifier() for many."""
+    return classifier(today, **options)(deadline, progress)
+
+
+def status_case(today, completed=False, due_days=0, prefix=''):
+    """
+    SQL version of classifier(). `prefix` reaches the task fields through a relation,
+    e.g. 'task__' from the assignment table or 'developer_tasks__' from User.
+    """
+    red_until, yellow_until = _cutoffs(today)
+    deadline = prefix + 'deadline'
+    whens = []
+    if completed:
+        whens.append(When(Q(**{prefix + 'progress': 100}), then=Value(COMPLETED)))
+    whens += [
+        When(Q(**{deadline + '__isnull': True}), then=Value(NO_DEADLINE)),
+        When(Q(**{deadline + '__lt': today}), then=Value(OVERDUE)),
+    ]
+    if due_days >= 1:
+        whens.append(When(Q(**{deadline: today}), then=Value(DUE_TODAY)))
+    if due_days >= 2:
+        whens.append(When(Q(**{deadline: today + timedelta(days=1)}), then=Value(DUE_TOMORROW)))
+    whens += [
+        When(Q(**{deadline + '__lte': red_until}), then=Value(RED)),
+        When(Q(**{deadline + '__lte': yellow_until}), then=Value(YELLOW)),
+    ]
+    return Case(*whens, default=Value(GREEN), output_field=CharField())
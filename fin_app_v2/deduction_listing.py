@@ -0,0 +1,107 @@
+"""
+Shared query layer for the deduction log pages and the CSV export.
+
+Logs are read newest first with keyset pagination on (deduction_date, id) (keyset.py).
+Date filters are plain ranges on deduction_date (a month becomes [1st, 1st of next
+month)) so they can use the index instead of extracting year/month from every row.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .keyset import keyset_page
+from .models import DeductionLog
+from .payment_export import stream_csv
+
+CSV_COLUMNS = ['ID', 'Дата', 'Разработчик', 'Сумма, USD', 'Кто списал']
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _month_range(value):
+    try:
+        year, month = map(int, value.split('-'))
+        start = datetime(year, month, 1)
+    except ValueError:
+        return None, None
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    return timezone.make_aware(start), timezone.make_aware(end)
+
+
+def parse_filters(params):
+    """
+    Filters understood by every log page: ?user= (developer id), ?month=YYYY-MM,
+    ?start_date= / ?end_date= (inclusive days), ?amount=, ?username= (who deducted).
+    Values that don't parse are ignored.
+    """
+    filters = {}
+    developer = params.get('user') or params.get('developer')
+    if developer and developer.isdigit():
+        filters['developer_id'] = int(developer)
+    amount = params.get('amount')
+    if amount and amount.isdigit():
+        filters['deduction_amount'] = int(amount)
+    if params.get('username'):
+        filters['deducted_by__username__icontains'] = params['username']
+
+    lower, upper = [], []
+    if params.get('month'):
+        start, end = _month_range(params['month'])
+        if start:
+            lower.append(start)
+            upper.append(end)
+    try:
+        start_date = parse_date(params.get('start_date') or '')
+        end_date = parse_date(params.get('end_date') or '')
+    except ValueError:
+        start_date = end_date = None
+    if start_date:
+        lower.append(_start_of_day(start_date))
+    if end_date:
+        upper.append(_start_of_day(end_date + timedelta(days=1)))
+    if lower:
+        filters['deduction_date__gte'] = max(lower)
+    if upper:
+        filters['deduction_date__lt'] = min(upper)
+    return filters
+
+
+def deduction_log_queryset(filters=None, **extra):
+    """Filtered logs with developer and deducted_by joined (both are shown and used by __str__)."""
+    return DeductionLog.objects.select_related('developer', 'deducted_by').filter(**(filters or {}), **extra)
+
+
+def deduction_log_page(queryset, params):
+    """One page of logs, newest first: keyset.keyset_page() with the rows under 'logs'."""
+    return keyset_page(queryset, params, 'deduction_date', parse_datetime, descending=True, name='logs')
+
+
+def monthly_totals(queryset):
+    """[{'month', 'total', 'count'}, ...] newest month first, one GROUP BY query."""
+    return list(
+        queryset.order_by()
+        .annotate(month=TruncMonth('deduction_date'))
+        .values('month')
+        .annotate(total=Sum('deduction_amount'), count=Count('id'))
+        .order_by('-month')
+    )
+
+
+def csv_rows(queryset):
+    yield CSV_COLUMNS
+    rows = (
+        queryset.order_by('-deduction_date', '-id')
+        .values_list('id', 'deduction_date', 'developer__username', 'deduction_amount', 'deducted_by__username')
+        .iterator(chunk_size=2000)
+    )
+    for pk, deduction_date, developer, amount, deducted_by in rows:
+        yield [pk, timezone.localtime(deduction_date).strftime('%Y-%m-%d %H:%M:%S'), developer, amount, deducted_by]
+
+
+def stream_deduction_csv(queryset):
+    return stream_csv(csv_rows(queryset))
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import DeletedRecord
+
+# Clients send back `server_time` as their next `updated_since`. It is taken a little
+# before the query runs so rows committed by slower concurrent transactions are not missed;
+# the overlap only means a few rows may be sent twice.
+SYNC_OVERLAP = timedelta(seconds=2)
+
+
+def tombstone_ttl():
+    """How long DeletedRecord rows are kept (manage.py purge_deleted_records)."""
+    return timedelta(seconds=getattr(settings, 'DELETED_RECORD_TTL', 30 * 24 * 60 * 60))
+
+
+def parse_updated_since(value):
+    """
+    Parse an `updated_since` value: an ISO 8601 timestamp or Unix epoch seconds.
+    Returns None for an empty value and raises ValueError for garbage, and for a cursor
+    older than the kept tombstones: its deletions may be gone, so the client has to reload.
+    """
+    if value in (None, ''):
+        return None
+    try:
+        parsed = datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        parsed = parse_datetime(value.replace(' ', '+'))  # '+' arrives as a space in query strings
+        if parsed is None:
+            raise ValueError(f"Invalid updated_since value: {value}")
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    if parsed < timezone.now() - tombstone_ttl():
+        raise ValueError("updated_since is older than the kept deletions; reload the full list")
+    return parsed
+
+
+def sync_cursor():
+    """Timestamp to hand back to the client as its next `updated_since`."""
+    return (timezone.now() - SYNC_OVERLAP).isoformat()
+
+
+def deleted_ids(model_name, since, **filters):
+    """Ids of `model_name` rows deleted after `since` (optionally limited, e.g. by job_id)."""
+    return list(
+        DeletedRecord.objects.filter(model_name=model_name, deleted_at__gt=since, **filters)
+        .values_list('object_id', flat=True)
+        .distinct()
+    )
+
+
+async def adeleted_ids(model_name, since, **filters):
+    queryset = (
+        DeletedRecord.objects.filter(model_name=model_name, deleted_at__gt=since, **filters)
+        .values_list('object_id', flat=True)
+        .distinct()
+    )
+    return [pk async for pk in queryset]
+
+
+def purge_expired():
+    """Delete tombstones past DELETED_RECORD_TTL; returns how many."""
+    deleted, _ = DeletedRecord.objects.filter(deleted_at__lte=timezone.now() - tombstone_ttl()).delete()
+    return deleted
+
+
+class DeltaSyncListMixin:
+    """
+    Adds `?updated_since=<ts>` to a DRF list view. When present, the response is
+    {'results': [changed rows], 'deleted_ids': [...], 'server_time': ...} instead of the
+    normal (paginated) listing.
+    """
+    delta_model_name = None
+
+    def get_updated_since(self):
+        try:
+            return parse_updated_since(self.request.query_params.get('updated_since'))
+        except ValueError as e:
+            raise ValidationError({'updated_since': str(e)})
+
+    def get_deleted_filters(self):
+        return {}
+
+    def get_changed_filter(self, since):
+        """Q for the rows whose representation changed after `since`."""
+        return Q(updated_at__gt=since)
+
+    def list(self, request, *args, **kwargs):
+        since = self.get_updated_since()
+        if since is None:
+            return super().list(request, *args, **kwargs)
+
+        server_time = sync_cursor()
+        queryset = self.filter_queryset(self.get_queryset()).filter(self.get_changed_filter(since))
+        serializer = self.get_serializer(queryset, many=True)
+        results = serializer.data
+        # A row removed and put back since `since` (e.g. unassigned, then reassigned) is current
+        current = {row['id'] for row in results}
+        return Response({
+            'results': results,
+            'deleted_ids': [
+                pk for pk in deleted_ids(self.delta_model_name, since, **self.get_deleted_filters())
+                if pk not in current
+            ],
+            'server_time': server_time,
+        })
+
@@ -0,0 +1,96 @@
+"""
+Developer × month earnings matrix: earned and paid money of tasks by confirmation_date,
+deductions by deduction_date.
+
+Both sides are grouped by (developer, month) with conditional sums and glued together
+with UNION ALL, so the whole matrix is one query. The response is columnar:
+
+    {"months": ["2026-01", ...], "developers": [3, 7], "usernames": ["ann", "bob"],
+     "earned": [[...per month], ...per developer], "paid": [...], "deducted": [...]}
+"""
+from datetime import timedelta
+
+from django.db.models import IntegerField, Q, Sum, Value
+from django.db.models.functions import TruncMonth
+
+from .accounting import as_datetime, month_start, next_month
+from .models import DeductionLog, Task
+
+MAX_RANGE_DAYS = 5 * 366
+CACHE_TIMEOUT = 600  # Safety net; the data versions do the real invalidation
+
+Assignment = Task.assigned_users.through
+ZERO = Value(0, output_field=IntegerField())
+
+
+def month_keys(start, end):
+    keys = []
+    month = month_start(start)
+    while month <= end:
+        keys.append(month.strftime('%Y-%m'))
+        month = next_month(month)
+    return keys
+
+
+def pivot_query(start, end):
+    """(developer_id, username, month, earned, paid, deducted) rows, one per side and cell."""
+    since, until = as_datetime(start), as_datetime(end + timedelta(days=1))
+    tasks = (
+        Assignment.objects.filter(
+            task__confirmation_date__gte=since, task__confirmation_date__lt=until,
+        )
+        .annotate(month=TruncMonth('task__confirmation_date'))
+        .values('user_id', 'user__username', 'month')
+        .annotate(
+            earned=Sum('task__money_for_task', filter=Q(task__progress=100)),
+            paid=Sum('task__money_for_task', filter=Q(task__paid=True)),
+            deducted=Sum(ZERO),
+        )
+        .values_list('user_id', 'user__username', 'month', 'earned', 'paid', 'deducted')
+        .order_by()
+    )
+    deductions = (
+        DeductionLog.objects.filter(deduction_date__gte=since, deduction_date__lt=until)
+        .annotate(month=TruncMonth('deduction_date'))
+        .values('developer_id', 'developer__username', 'month')
+        .annotate(earned=Sum(ZERO), paid=Sum(ZERO), deducted=Sum('deduction_amount'))
+        .values_list('developer_id', 'developer__username', 'month', 'earned', 'paid', 'deducted')
+        .order_by()
+    )
+    return tasks.union(deductions, all=True)
+
+
+def earnings_pivot(start, end):
+    months = month_keys(start, end)
+    column = {key: index for index, key in enumerate(months)}
+    developers, usernames = [], []
+    matrix = {'earned': [], 'paid': [], 'deducted': []}
+    row_of = {}
+
+    for developer_id, username, month, earned, paid, deducted in pivot_query(start, end):
+        row = row_of.get(developer_id)
+        if row is None:
+            row = row_of[developer_id] = len(developers)
+            developers.append(developer_id)
+            usernames.append(username)
+            for values in matrix.values():
+                values.append([0] * len(months))
+        cell = column[month.strftime('%Y-%m')]
+        matrix['earned'][row][cell] += earned or 0
+        matrix['paid'][row][cell] += paid or 0
+        matrix['deducted'][row][cell] += deducted or 0
+
+    # Stable developer order regardless of how the database returned the rows
+    order = sorted(range(len(developers)), key=developers.__getitem__)
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'months': months,
+        'developers': [developers[i] for i in order],
+        'usernames': [usernames[i] for i in order],
+        **{name: [values[i] for i in order] for name, values in matrix.items()},
+    }
+
+
+def pivot_cache_key(start, end, tasks_version, deductions_version):
+    return f'earnings_pivot:{start.isoformat()}:{end.isoformat()}:{tasks_version}:{deductions_version}'
@@ -0,0 +1,195 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.utils import timezone
+
+from . import deadline_classifier as deadlines
+from .delta_sync import SYNC_OVERLAP, deleted_ids, parse_updated_since
+from .models import Job, Task
+from .querysets import assignment_exists
+
+# Task fields pushed to dashboards; after the first event for a task only changed ones are sent
+TASK_EVENT_FIELDS = (
+    'job_id', 'title', 'task_type', 'hours', 'progress', 'task_percentage', 'deadline',
+    'feedback', 'money_for_task', 'paid', 'confirmed', 'version',
+)
+# What the client portal sees of its job's tasks (plus a deadline 'status', see client_fields)
+CLIENT_TASK_EVENT_FIELDS = ('title', 'progress', 'deadline')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class TaskEventSource:
+    """
+    Polls Task.updated_at and the DeletedRecord tombstones for one scope (a job, a developer,
+    all tasks) and turns what changed into compact diffs. The only state is the updated_at
+    cursor plus the last values sent for tasks seen on this connection, so (re)connecting
+    never reads the whole scope: the first event for a task carries all its fields, later
+    ones only what moved, e.g. {'id': .., 'progress': ..}.
+
+    `removed_model` and `removed_filters` pick the tombstones that mean "gone from this
+    scope": deleted tasks of a job, or 'assignment' tombstones of one developer.
+    `fields` are the Task fields sent; `client_fields` switches to the client portal
+    projection, which adds the deadline status (deadline_classifier) and nothing internal.
+    """
+
+    def __init__(self, tasks, removed_model='task', client_fields=False, **removed_filters):
+        self.tasks = tasks
+        self.removed_model = removed_model
+        self.removed_filters = removed_filters
+        self.fields = CLIENT_TASK_EVENT_FIELDS if client_fields else TASK_EVENT_FIELDS
+        self.client_fields = client_fields
+        self.sent = {}
+        self.cursor = None
+
+    def start(self, since):
+        """The client already has everything not changed after `since`."""
+        self.cursor = since
+
+    def poll(self):
+        """Return {'changed': [...], 'removed': [...]} since the last poll, or None."""
+        since, self.cursor = self.cursor, timezone.now() - SYNC_OVERLAP
+        changed = []
+
+        rows = self.tasks.filter(updated_at__gt=since).values('id', *self.fields)
+        current = {row.pop('id'): row for row in rows}
+        if self.client_fields:
+            classify = deadlines.classifier(timezone.localdate(), completed=True)
+            for row in current.values():
+                row['status'] = classify(row['deadline'], row['progress'])
+        for pk, row in current.items():
+            previous = self.sent.get(pk)
+            if previous is None:
+                diff = row
+            else:
+                diff = {field: value for field, value in row.items() if previous[field] != value}
+            self.sent[pk] = row
+            if diff:
+                changed.append({'id': pk, **diff})
+
+        # A task removed and then put back within the window is in scope, not removed
+        removed = [
+            pk for pk in deleted_ids(self.removed_model, since, **self.removed_filters)
+            if pk not in current
+        ]
+        for pk in removed:
+            self.sent.pop(pk, None)
+
+        if not changed and not removed:
+            return None
+        return {'changed': changed, 'removed': removed}
+
+
+def format_event(data=None, event=None, event_id=None, retry=None):
+    lines = []
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _stream(source):
+    poll_seconds = _setting('EVENT_STREAM_POLL_SECONDS', 2)
+    heartbeat_seconds = _setting('EVENT_STREAM_HEARTBEAT_SECONDS', 15)
+    loop = asyncio.get_running_loop()
+    # Streams end on their own so proxies/workers are not held forever; EventSource reconnects
+    # with Last-Event-ID and resumes from the cursor
+    deadline = loop.time() + _setting('EVENT_STREAM_MAX_SECONDS', 120)
+
+    yield format_event(retry=_setting('EVENT_STREAM_RETRY_MS', 3000), event_id=source.cursor.isoformat())
+    idle = 0
+    while loop.time() < deadline:
+        await asyncio.sleep(poll_seconds)
+        payload = await sync_to_async(source.poll)()
+        if payload:
+            idle = 0
+            yield format_event(payload, event='tasks', event_id=source.cursor.isoformat())
+        else:
+            idle += poll_seconds
+            if idle >= heartbeat_seconds:
+                idle = 0
+                yield format_event(event_id=source.cursor.isoformat())
+
+
+def _single_batch(source):
+    # Under WSGI a long-lived response would pin a worker, so answer with whatever changed
+    # and let the browser reconnect after `retry` (long polling over the same protocol)
+    payload = source.poll()
+    yield format_event(retry=_setting('EVENT_STREAM_RETRY_MS', 3000), event_id=source.cursor.isoformat())
+    if payload:
+        yield format_event(payload, event='tasks', event_id=source.cursor.isoformat())
+
+
+async def _event_response(request, source):
+    # Resume from Last-Event-ID on reconnect, or from ?since= (page render time) on first connect
+    try:
+        since = parse_updated_since(
+            request.headers.get('Last-Event-ID') or request.GET.get('since')
+        ) or timezone.now()
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    await sync_to_async(source.start)(since)
+    if isinstance(request, ASGIRequest):
+        body = _stream(source)
+    else:
+        body = _single_batch(source)
+    response = StreamingHttpResponse(body, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
+
+
+def _is_admin(user):
+    return user.is_authenticated and user.email == 'Admin@dbr.org'
+
+
+async def job_task_events(request, job_id):
+    """Task changes of one job, for the client portal (own job only) and admins."""
+    user = await request.auser()
+    if not _is_admin(user) and await request.session.aget('client_job_id') != job_id:
+        return HttpResponseForbidden("You are not authorized to access this job.")
+    if not await Job.objects.filter(pk=job_id).aexists():
+        raise Http404("Job not found")
+
+    # Clients get the portal projection: no money, payment or internal feedback fields
+    source = TaskEventSource(Task.objects.filter(job_id=job_id), client_fields=not _is_admin(user), job_id=job_id)
+    return await _event_response(request, source)
+
+
+async def developer_task_events(request, developer_id):
+    """Task changes of the tasks assigned to a developer (the developer or an admin)."""
+    user = await request.auser()
+    if not user.is_authenticated or (user.pk != developer_id and not _is_admin(user)):
+        return HttpResponseForbidden("You are not authorized to access these tasks.")
+    try:
+        developer = await User.objects.aget(pk=developer_id)
+    except User.DoesNotExist:
+        raise Http404("Developer not found")
+
+    source = TaskEventSource(
+        Task.objects.filter(assignment_exists(developer)), removed_model='assignment', user_id=developer.pk
+    )
+    return await _event_response(request, source)
+
+
+async def all_task_events(request):
+    """Every task change, for the admin dashboard."""
+    user = await request.auser()
+    if not _is_admin(user):
+        return HttpResponseForbidden("You are not authorized to access this page.")
+
+    return await _event_response(request, TaskEventSource(Task.objects.all()))
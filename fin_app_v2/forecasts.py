@@ -0,0 +1,107 @@
+"""
+Job completion forecasts (JobForecast), written in batch by `manage.py forecast_jobs`.
+
+The velocity of a job is the mean daily gain of its weighted progress over the last
+FORECAST_WINDOW_DAYS days of JobProgressDaily rollups (days without a row repeat the
+previous value). The expected date extrapolates the remaining progress at that velocity;
+the band uses the velocity ± CONFIDENCE_Z standard errors of the daily gains, so jobs
+that move in bursts get a wider band than steady ones.
+
+Reading all unfinished jobs takes two queries (current figures, rollup history) and the
+results are upserted in one statement; pages only read the stored row.
+"""
+import math
+from datetime import timedelta
+from statistics import fmean, stdev
+
+from django.conf import settings
+from django.utils import timezone
+
+from .job_rollups import job_figures
+from .models import JobForecast, JobProgressDaily
+from .querysets import bulk_upsert
+
+CONFIDENCE_Z = 1.28  # About an 80% band
+MAX_HORIZON_DAYS = 3650  # Further out than this is reported as no date
+
+
+def _finish_date(today, remaining, velocity):
+    if velocity <= 0:
+        return None
+    days = math.ceil(remaining / velocity)
+    return today + timedelta(days=days) if days <= MAX_HORIZON_DAYS else None
+
+
+def daily_series(rows, today, progress):
+    """Forward-filled daily progress from the first rollup row to today (today = `progress`)."""
+    if not rows:
+        return [progress]
+    by_day = dict(rows)
+    by_day[today] = progress
+    series = []
+    day, last = rows[0][0], rows[0][1]
+    while day <= today:
+        last = by_day.get(day, last)
+        series.append(last)
+        day += timedelta(days=1)
+    return series
+
+
+def forecast(series, today, min_days):
+    """Field values of a JobForecast for a daily progress series ending today."""
+    progress = series[-1]
+    gains = [b - a for a, b in zip(series, series[1:])]
+    values = {
+        'progress': progress, 'velocity': 0, 'basis_days': len(gains),
+        'expected_date': None, 'earliest_date': None, 'latest_date': None,
+    }
+    if len(gains) < max(min_days, 2):
+        return values
+    velocity = fmean(gains)
+    spread = CONFIDENCE_Z * stdev(gains) / math.sqrt(len(gains))
+    remaining = 100 - progress
+    values.update(
+        velocity=velocity,
+        expected_date=_finish_date(today, remaining, velocity),
+        earliest_date=_finish_date(today, remaining, velocity + spread),
+        latest_date=_finish_date(today, remaining, velocity - spread),
+    )
+    return values
+
+
+def refresh_forecasts(window_days=None, min_days=None):
+    """
+    Rewrite the forecast of every unfinished job that has tasks and drop the forecasts of
+    the others. Returns how many forecasts were written.
+    """
+    window_days = window_days or getattr(settings, 'FORECAST_WINDOW_DAYS', 28)
+    min_days = min_days or getattr(settings, 'FORECAST_MIN_DAYS', 3)
+    today = timezone.localdate()
+
+    active = {
+        job_id: progress
+        for job_id, (progress, total, done) in job_figures().items()
+        if total and progress < 100
+    }
+    history = {}
+    for job_id, day, progress in (
+        JobProgressDaily.objects.filter(job_id__in=list(active), day__gte=today - timedelta(days=window_days), day__lt=today)
+        .order_by('job_id', 'day')
+        .values_list('job_id', 'day', 'progress')
+        .iterator(chunk_size=2000)
+    ):
+        history.setdefault(job_id, []).append((day, progress))
+
+    rows = [
+        JobForecast(job_id=job_id, **forecast(daily_series(history.get(job_id, []), today, progress), today, min_days))
+        for job_id, progress in active.items()
+    ]
+    bulk_upsert(
+        JobForecast, rows,
+        unique_fields=['job'],
+        update_fields=[
+            'progress', 'velocity', 'basis_days', 'expected_date', 'earliest_date', 'latest_date', 'computed_at',
+        ],
+    )
+    JobForecast.objects.exclude(job_id__in=list(active)).delete()
+    return len(rows)
@@ -4,14 +4,15 @@
 from django import forms
 from django.contrib.auth.models import User
 from django.forms import inlineformset_factory
+from .concurrency import VersionFormMixin
 from .models import Job, Task
 
 
 # Job form to create or update a job
-class JobForm(forms.ModelForm):
+class JobForm(VersionFormMixin, forms.ModelForm):
     class Meta:
         model = Job
-        fields = ['title', 'client_email', 'client_password', 'over_all_income']  # Include all necessary fields
+        fields = ['title', 'client_email', 'client_password', 'over_all_income', 'version']  # Include all necessary fields
 
     def __init__(self, *args, **kwargs):
         super(JobForm, self).__init__(*args, **kwargs)
@@ -23,7 +24,7 @@ class JobForm(forms.ModelForm):
 
 
 # Task form to create or update individual tasks
-class TaskForm(forms.ModelForm):
+class TaskForm(VersionFormMixin, forms.ModelForm):
     assigned_users = forms.ModelMultipleChoiceField(
         queryset=User.objects.filter(is_staff=True),
         widget=forms.SelectMultiple(attrs={'class': 'form-control'}),
@@ -49,7 +50,7 @@ class TaskForm(forms.ModelForm):
 
     class Meta:
         model = Task
-        fields = ['title', 'description', 'assigned_users', 'hours', 'deadline', 'money_for_task', 'task_type']
+        fields = ['title', 'description', 'assigned_users', 'hours', 'deadline', 'money_for_task', 'task_type', 'version']
 
     def __init__(self, *args, **kwargs):
         super(TaskForm, self).__init__(*args, **kwargs)
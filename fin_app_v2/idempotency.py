@@ -0,0 +1,154 @@
+"""
+Idempotency keys for mutating POST endpoints.
+
+A client sends `Idempotency-Key: <uuid>` (or an `idempotency_key` form field, see the
+`{% idempotency_key_input %}` tag). The first request with a key runs the view and stores
+its response in IdempotencyRecord; a retry with the same key gets that response back
+without running the view again. A retry that arrives while the first request is still
+running gets 409, the same key with a different request body gets 422.
+"""
+import hashlib
+import json
+import zlib
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+FORM_FIELD = 'idempotency_key'
+MAX_KEY_LENGTH = 255
+# A placeholder older than this belongs to a request that died; let the retry run
+IN_PROGRESS_TIMEOUT = timedelta(minutes=10)
+
+
+def get_key(request):
+    return request.headers.get(HEADER) or request.POST.get(FORM_FIELD) or None
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, so a reused key with a different body is caught."""
+    digest = hashlib.sha256(f"{request.method} {request.path}\n".encode())
+    if request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        # Multipart boundaries and CSRF tokens change between browser retries
+        fields = sorted(
+            (name, values) for name, values in request.POST.lists()
+            if name not in ('csrfmiddlewaretoken', FORM_FIELD)
+        )
+        digest.update(json.dumps(fields).encode())
+    else:
+        digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _expires_at(now):
+    return now + timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+
+
+def _in_progress():
+    response = JsonResponse({'error': "Request with this key is being processed, retry shortly"}, status=409)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(request, record):
+    response = HttpResponse(
+        zlib.decompress(bytes(record.body)) if record.body else b'',
+        status=record.status_code,
+        content_type=record.content_type or None,
+    )
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    if record.status_code in (301, 302, 303):
+        messages.info(request, "Этот запрос уже был выполнен.", fail_silently=True)
+    return response
+
+
+def _store(record, response):
+    record.status_code = response.status_code
+    record.content_type = response.get('Content-Type', '')[:100]
+    record.location = response.get('Location', '')[:500]
+    # Redirects only need their target
+    record.body = zlib.compress(response.content) if response.content and not record.location else b''
+    record.save(update_fields=['status_code', 'content_type', 'location', 'body'])
+
+
+def idempotent(view_func):
+    """
+    Replay the stored response for a repeated Idempotency-Key. Apply it outside
+    @transaction.atomic so the placeholder row is visible to concurrent retries.
+    Requests without a key are handled as before.
+    """
+    scope_name = f"{view_func.__module__}.{view_func.__name__}"
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = get_key(request) if request.method == 'POST' else None
+        if not key:
+            return view_func(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse({'error': f"{HEADER} is longer than {MAX_KEY_LENGTH} characters"}, status=400)
+
+        user_id = request.user.pk if request.user.is_authenticated else 0
+        scope = f"{scope_name}:{user_id}"[:150]
+        fingerprint = request_fingerprint(request)
+        now = timezone.now()
+
+        try:
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    scope=scope,
+                    key=key,
+                    request_hash=fingerprint,
+                    expires_at=_expires_at(now),
+                )
+        except IntegrityError:
+            record = IdempotencyRecord.objects.filter(scope=scope, key=key).first()
+            if record is None:
+                return _in_progress()
+            expired = record.expires_at <= now
+            orphaned = record.status_code is None and record.created_at < now - IN_PROGRESS_TIMEOUT
+            if not (expired or orphaned):
+                if record.request_hash != fingerprint:
+                    return JsonResponse({'error': f"{HEADER} was already used for a different request"}, status=422)
+                if record.status_code is None:
+                    return _in_progress()
+                return _replay(request, record)
+            # Take over the stale row (conditional, so only one retry wins)
+            taken = IdempotencyRecord.objects.filter(pk=record.pk, created_at=record.created_at).update(
+                request_hash=fingerprint,
+                status_code=None,
+                body=b'',
+                created_at=now,
+                expires_at=_expires_at(now),
+            )
+            if not taken:
+                return _in_progress()
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            # Nothing was stored, so the client may retry with the same key
+            IdempotencyRecord.objects.filter(pk=record.pk).delete()
+            raise
+
+        if response.status_code >= 500 or isinstance(response, StreamingHttpResponse):
+            IdempotencyRecord.objects.filter(pk=record.pk).delete()
+        else:
+            _store(record, response)
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    """Delete records past their TTL; returns how many."""
+    deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
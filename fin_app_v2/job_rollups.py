@@ -0,0 +1,93 @@
+"""
+Daily per-job progress rollups (JobProgressDaily) for burndown charts.
+
+Today's row of a job is rewritten whenever progress of one of its tasks changes (after
+the progress events are committed, see progress_events.py), and `manage.py
+rollup_job_progress` writes a row for every job just after midnight so days without
+changes still get a point. A burndown is then one range read on (job, day).
+"""
+from datetime import timedelta
+
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Job, JobProgressDaily, Task
+from .querysets import bulk_upsert
+
+BURNDOWN_MAX_DAYS = 366
+VELOCITY_WINDOW_DAYS = 14  # Days averaged for the velocity summary
+
+
+def job_figures(job_ids=None):
+    """{job_id: (progress, tasks_total, tasks_done)} from one grouped query over tasks."""
+    tasks = Task.objects.all() if job_ids is None else Task.objects.filter(job_id__in=job_ids)
+    rows = (
+        tasks.values('job_id')
+        .annotate(
+            weighted=Sum(F('progress') * F('task_percentage')),
+            weight=Sum('task_percentage'),
+            total=Count('id'),
+            done=Count('id', filter=Q(progress=100)),
+        )
+        .order_by()
+    )
+    return {
+        row['job_id']: ((row['weighted'] or 0) / row['weight'] if row['weight'] else 0, row['total'], row['done'])
+        for row in rows
+    }
+
+
+def refresh_jobs(job_ids=None, day=None):
+    """Upsert the rollup row of `day` (today) for the given jobs (all jobs when None)."""
+    day = day or timezone.localdate()
+    figures = job_figures(job_ids)
+    # Jobs without tasks still get a point; ids of jobs that are gone (deleted, or queued
+    # by a transaction that rolled back) are dropped
+    jobs = Job.objects.all() if job_ids is None else Job.objects.filter(pk__in=list(job_ids))
+    job_ids = jobs.values_list('id', flat=True)
+    rows = []
+    for job_id in job_ids:
+        progress, total, done = figures.get(job_id, (0, 0, 0))
+        rows.append(JobProgressDaily(job_id=job_id, day=day, progress=progress, tasks_total=total, tasks_done=done))
+    bulk_upsert(
+        JobProgressDaily, rows,
+        unique_fields=['job', 'day'],
+        update_fields=['progress', 'tasks_total', 'tasks_done', 'updated_at'],
+    )
+    return len(rows)
+
+
+def burndown(job_id, start, end):
+    """
+    Daily points [{'date', 'progress', 'remaining', 'velocity'}] for start..end. Days
+    without a row repeat the previous point; velocity is progress gained since the day before.
+    """
+    rows = list(
+        JobProgressDaily.objects.filter(job_id=job_id, day__gte=start, day__lte=end)
+        .order_by('day')
+        .values_list('day', 'progress')
+    )
+    points = []
+    if not rows:
+        return points
+    by_day = dict(rows)
+    day, last = rows[0][0], None
+    while day <= rows[-1][0]:
+        progress = by_day.get(day, last)
+        points.append({
+            'date': day.isoformat(),
+            'progress': round(progress, 2),
+            'remaining': round(100 - progress, 2),
+            'velocity': round(progress - last, 2) if last is not None else 0,
+        })
+        last = progress
+        day += timedelta(days=1)
+    return points
+
+
+def average_velocity(points, window=VELOCITY_WINDOW_DAYS):
+    """Mean progress points per day over the last `window` days of a burndown."""
+    recent = points[-(window + 1):]
+    if len(recent) < 2:
+        return 0
+    return round((recent[-1]['progress'] - recent[0]['progress']) / (len(recent) - 1), 2)
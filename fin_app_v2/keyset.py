@@ -0,0 +1,74 @@
+"""
+Keyset pagination on (a value column, id), shared by the deduction log pages and the
+overdue task monitor.
+
+The next page starts after the last row of the current one: `?cursor=` encodes that
+row's (value, id), so deep pages cost the same as the first one. Pages carry the
+request's GET parameters with the cursor replaced (`next_query`/`first_query`), ready
+for a link.
+"""
+import base64
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(value, pk):
+    raw = f"{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse):
+    """(value, id) from a cursor, `parse` turning the value back (parse_date, parse_datetime); None if invalid."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        value_part, pk = raw.rsplit('|', 1)
+        value = parse(value_part)
+        return (value, int(pk)) if value else None
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_size(params):
+    try:
+        size = int(params.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset, params, field, parse, descending=False, name='rows'):
+    """
+    One page of `queryset` ordered by (`field`, id), newest first with `descending`.
+    Returns {name: [rows], 'has_next', 'next_cursor', 'next_query', 'first_query', 'is_first_page'}.
+    """
+    size = page_size(params)
+    direction = 'lt' if descending else 'gt'
+    prefix = '-' if descending else ''
+    queryset = queryset.order_by(prefix + field, prefix + 'id')
+    position = decode_cursor(params.get('cursor') or '', parse)
+    if position:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__{direction}': value}) | Q(**{field: value, f'id__{direction}': pk})
+        )
+    rows = list(queryset[:size + 1])
+    has_next = len(rows) > size
+    rows = rows[:size]
+    next_cursor = encode_cursor(getattr(rows[-1], field), rows[-1].pk) if has_next else None
+
+    query = params.copy()
+    query.pop('cursor', None)
+    first_query = query.urlencode()
+    if next_cursor:
+        query['cursor'] = next_cursor
+    return {
+        name: rows,
+        'has_next': has_next,
+        'next_cursor': next_cursor,
+        'next_query': query.urlencode() if next_cursor else None,
+        'first_query': first_query,
+        'is_first_page': position is None,
+    }
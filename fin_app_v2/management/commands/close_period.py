@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from fin_app_v2 import accounting
+
+
+def _month(value):
+    try:
+        return datetime.strptime(value, '%Y-%m').date()
+    except ValueError:
+        raise CommandError(f"Expected YYYY-MM, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot closed months into AccountingPeriod (by default every open month before the "
+        "current one). Schedule it on the 1st of the month (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', help="Close open months up to this one (YYYY-MM)")
+        parser.add_argument('--reopen', help="Drop the snapshots of this month (YYYY-MM) and all later ones first")
+
+    def handle(self, *args, **options):
+        if options['reopen']:
+            deleted = accounting.reopen_from(_month(options['reopen']))
+            self.stdout.write(f"Reopened from {options['reopen']} ({deleted} snapshot row(s) deleted)")
+
+        if options['through']:
+            through = _month(options['through'])
+        else:
+            # The month before the current one
+            through = accounting.month_start(timezone.localdate().replace(day=1) - timedelta(days=1))
+        try:
+            closed = accounting.close_through(through)
+        except ValueError as e:
+            raise CommandError(str(e))
+        if closed:
+            self.stdout.write(f"Closed {len(closed)} month(s): {closed[0]:%Y-%m} .. {closed[-1]:%Y-%m}")
+        else:
+            self.stdout.write("Nothing to close")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.progress_events import compact
+
+
+class Command(BaseCommand):
+    help = (
+        "Downsample TaskProgressEvent history older than PROGRESS_EVENTS_FULL_DAYS to one event "
+        "per task and day. Schedule it nightly (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help="Keep full history for this many days (default: setting)")
+
+    def handle(self, *args, **options):
+        deleted = compact(full_days=options['days'])
+        self.stdout.write(f"Deleted {deleted} progress event(s)")
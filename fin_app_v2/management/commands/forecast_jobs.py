@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.forecasts import refresh_forecasts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the completion forecast of every unfinished job from its recent progress "
+        "rollups. Schedule it nightly after rollup_job_progress (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=int, help="Days of history to use (default FORECAST_WINDOW_DAYS)")
+
+    def handle(self, *args, **options):
+        written = refresh_forecasts(window_days=options['window'])
+        self.stdout.write(f"Wrote forecasts for {written} job(s)")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.delta_sync import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete delta-sync tombstones (DeletedRecord) past DELETED_RECORD_TTL. Schedule it daily (cron)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Deleted {purge_expired()} expired deletion record(s)")
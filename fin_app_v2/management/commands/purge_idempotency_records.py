@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete stored Idempotency-Key responses past IDEMPOTENCY_KEY_TTL. Schedule it daily (cron)."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Deleted {purge_expired()} expired idempotency record(s)")
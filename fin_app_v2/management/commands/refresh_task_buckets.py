@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.deadline_buckets import refresh_task_buckets
+
+
+class Command(BaseCommand):
+    help = "Recompute Task.deadline_bucket / is_overdue for the new day. Schedule it just after midnight (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rewrite every task, not only those computed before today")
+
+    def handle(self, *args, **options):
+        updated = refresh_task_buckets(only_stale=not options['all'])
+        self.stdout.write(f"Updated buckets for {updated} task(s)")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from fin_app_v2.job_rollups import refresh_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Write today's JobProgressDaily row for every job, so burndowns get a point for days "
+        "without progress changes. Schedule it just after midnight (cron)."
+    )
+
+    def handle(self, *args, **options):
+        written = refresh_jobs()
+        self.stdout.write(f"Wrote progress rollups for {written} job(s)")
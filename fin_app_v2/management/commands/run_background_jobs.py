@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from fin_app_v2.background import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued BackgroundJob rows (Procfile `worker` process). Safe to start several."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit when the queue is empty")
+        parser.add_argument('--max-jobs', type=int, default=0, help="Exit after this many jobs (0 = no limit)")
+        parser.add_argument(
+            '--sleep', type=float, default=getattr(settings, 'BACKGROUND_JOB_POLL_SECONDS', 2),
+            help="Seconds to wait when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        processed = 0
+        last_stale_check = 0
+        while True:
+            close_old_connections()
+
+            if time.monotonic() - last_stale_check > 60:
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale job(s)")
+                last_stale_check = time.monotonic()
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f"Running {job.name} #{job.pk} (attempt {job.attempts}/{job.max_attempts})")
+            ok = run_job(job)
+            self.stdout.write(f"{'Finished' if ok else 'Failed'} {job.name} #{job.pk}")
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0007_background_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='bucket_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='deadline_bucket',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='is_overdue',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0008_task_deadline_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth_user belongs to django.contrib.auth, so the index is created directly instead of
+# through the model state. Used by auth_backends.EmailBackend (WHERE LOWER(email) = ?).
+INDEX = models.Index(Lower('email'), name='auth_user_email_lower_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('fin_app_v2', '0010_idempotency_record'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
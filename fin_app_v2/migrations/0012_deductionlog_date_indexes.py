@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0011_user_email_lower_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='deductionlog',
+            index=models.Index(fields=['deduction_date', 'id'], name='fin_app_v2__deducti_6b35b0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deductionlog',
+            index=models.Index(fields=['developer', 'deduction_date'], name='fin_app_v2__develop_53464d_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0012_deductionlog_date_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('kind', models.CharField(choices=[('total', 'Итого за месяц'), ('job', 'Проект'), ('developer', 'Разработчик')], max_length=16)),
+                ('income', models.BigIntegerField(default=0)),
+                ('task_money', models.BigIntegerField(default=0)),
+                ('earned_money', models.BigIntegerField(default=0)),
+                ('paid_money', models.BigIntegerField(default=0)),
+                ('deductions', models.BigIntegerField(default=0)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+                ('developer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='accounting_periods', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='accounting_periods', to='fin_app_v2.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'month'], name='fin_app_v2__kind_48eacc_idx')],
+            },
+        ),
+    ]
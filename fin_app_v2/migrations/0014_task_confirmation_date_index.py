@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0013_accounting_period'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='confirmation_date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
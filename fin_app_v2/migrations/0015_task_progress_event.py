@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0014_task_confirmation_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress', models.PositiveSmallIntegerField()),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='progress_events', to='fin_app_v2.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['task', 'recorded_at'], name='fin_app_v2__task_id_9dfab7_idx'), models.Index(fields=['recorded_at'], name='fin_app_v2__recorde_99bec1_idx')],
+            },
+        ),
+    ]
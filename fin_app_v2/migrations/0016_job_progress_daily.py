@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0015_task_progress_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobProgressDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('progress', models.FloatField(default=0)),
+                ('tasks_total', models.PositiveIntegerField(default=0)),
+                ('tasks_done', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_days', to='fin_app_v2.job')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job', 'day'), name='unique_job_progress_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0016_job_progress_daily'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress', models.FloatField(default=0)),
+                ('velocity', models.FloatField(default=0)),
+                ('basis_days', models.PositiveSmallIntegerField(default=0)),
+                ('expected_date', models.DateField(blank=True, null=True)),
+                ('earliest_date', models.DateField(blank=True, null=True)),
+                ('latest_date', models.DateField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('job', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='fin_app_v2.job')),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0017_job_forecast'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['is_overdue', 'deadline', 'id'], name='fin_app_v2__is_over_3aa92e_idx'),
+        ),
+    ]
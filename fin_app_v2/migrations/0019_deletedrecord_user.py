@@ -0,0 +1,22 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fin_app_v2', '0018_task_overdue_deadline_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletedrecord',
+            name='user_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='deletedrecord',
+            index=models.Index(fields=['model_name', 'user_id', 'deleted_at'], name='fin_app_v2__model_n_2e0f11_idx'),
+        ),
+    ]
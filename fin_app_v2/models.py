@@ -2,13 +2,17 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .concurrency import VersionedModel
 
-class Job(models.Model):
+class Job(VersionedModel):
     title = models.CharField(max_length=100)
     client_email = models.EmailField(unique=True)
     client_password = models.CharField(max_length=100)
     over_all_income = models.PositiveIntegerField(default=0)  # Total income for the job
     created_at = models.DateTimeField(auto_now_add=True)  # Add this field
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Used by delta-sync clients
     def __str__(self):
         return self.title
 
@@ -32,7 +36,7 @@ class Job(models.Model):
 
 # Добавьте в модель Task в models.py
 
-class Task(models.Model):
+class Task(VersionedModel):
     TASK_TYPE_CHOICES = [
         ('SIMPLE', 'Простая задача'),
         ('PATPIS', 'Повторяющаяся задача')
@@ -57,7 +61,7 @@ class Task(models.Model):
     )
     # Новые поля для подтверждения задач
     confirmed = models.BooleanField(default=False)
-    confirmation_date = models.DateTimeField(null=True, blank=True)
+    confirmation_date = models.DateTimeField(null=True, blank=True, db_index=True)  # Earnings pivot ranges
     confirmed_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -65,10 +69,43 @@ class Task(models.Model):
         blank=True,
         related_name='confirmed_tasks'
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Used by delta-sync clients
+    # Precomputed from deadline/progress (see deadline_buckets.py), refreshed nightly
+    deadline_bucket = models.CharField(max_length=16, blank=True, default='', db_index=True)
+    is_overdue = models.BooleanField(default=False, db_index=True)
+    bucket_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Overdue monitor keyset pagination (overdue_monitor.py)
+            models.Index(fields=['is_overdue', 'deadline', 'id']),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Compared on save to decide whether a TaskProgressEvent is due
+        instance._loaded_progress = instance.__dict__.get('progress')
+        return instance
+
+    def save(self, *args, **kwargs):
+        from .deadline_buckets import bucket_for, is_overdue
+        from .progress_events import record_changes
+
+        today = timezone.now().date()
+        self.deadline_bucket = bucket_for(self.deadline, today)
+        self.is_overdue = is_overdue(self.deadline, self.progress, today)
+        self.bucket_date = today
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'deadline', 'progress'} & set(update_fields):
+            kwargs['update_fields'] = list(update_fields) + ['deadline_bucket', 'is_overdue', 'bucket_date']
+        super().save(*args, **kwargs)
+        if update_fields is None or 'progress' in update_fields:
+            record_changes([self], using=kwargs.get('using') or self._state.db)
+
     def check_and_pay_developer(self):
         # Оплата производится только после подтверждения администратором
         if self.progress == 100 and self.confirmed and not self.paid:
@@ -84,17 +121,81 @@ class DeductionLog(models.Model):
     deduction_amount = models.PositiveIntegerField()
     deduction_date = models.DateTimeField(auto_now_add=True)  # Automatically logs the date and time of deduction
 
+    class Meta:
+        indexes = [
+            # Keyset pagination and date ranges (deduction_listing.py), overall and per developer
+            models.Index(fields=['deduction_date', 'id']),
+            models.Index(fields=['developer', 'deduction_date']),
+        ]
+
     def __str__(self):
         return f"{self.deducted_by.username} deducted {self.deduction_amount} USD from {self.developer.username} on {self.deduction_date}"
 
+class DeletedRecord(models.Model):
+    """
+    Tombstone for a deleted Task/Job/CrmJob so delta-sync clients can drop it.
+    model_name 'assignment' marks a task leaving one developer's list (unassigned or
+    deleted): object_id is the task, user_id the developer.
+    """
+    model_name = models.CharField(max_length=32)
+    object_id = models.PositiveBigIntegerField()
+    job_id = models.PositiveBigIntegerField(null=True, blank=True)  # Parent job of a deleted task
+    user_id = models.PositiveBigIntegerField(null=True, blank=True)  # Developer of a removed assignment
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'deleted_at']),
+            models.Index(fields=['model_name', 'user_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id} deleted on {self.deleted_at}"
+
+
+class BackgroundJob(models.Model):
+    """A queued heavy operation, run by `manage.py run_background_jobs` (see background.py)."""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_SUCCEEDED, 'Выполнено'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    name = models.CharField(max_length=64)  # Registered operation, see background.py
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)  # 0-100
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # Pushed back between retries
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
 from django.db.models import Sum
 
 def calculate_income_balance():
-    # Sum all money_for_task from Task model
-    total_task_money = Task.objects.aggregate(Sum('money_for_task'))['money_for_task__sum'] or 0
+    from .accounting import income_totals
 
-    # Sum all over_all_income from Job model
-    total_job_income = Job.objects.aggregate(Sum('over_all_income'))['over_all_income__sum'] or 0
+    # Job income and task money; closed months come from the AccountingPeriod snapshots
+    total_job_income, total_task_money = income_totals()
 
     # Calculate the remaining balance
     income_balance = total_job_income - total_task_money
@@ -159,3 +260,112 @@ def create_monthly_recurring_tasks(self):
                 new_task.assigned_users.add(user)
 
 
+
+
+class IdempotencyRecord(models.Model):
+    """Stored response for an Idempotency-Key, replayed on retries (see idempotency.py)."""
+    scope = models.CharField(max_length=150)  # View and user the key belongs to
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # Null while the first request runs
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=500, blank=True)
+    body = models.BinaryField(blank=True)  # zlib-compressed
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key}"
+
+
+class AccountingPeriod(models.Model):
+    """
+    Frozen figures of a closed month, written by `manage.py close_period` (see accounting.py).
+    Every closed month has one 'total' row plus a row per job created in it and per
+    developer with tasks or deductions in it.
+    """
+    KIND_TOTAL = 'total'
+    KIND_JOB = 'job'
+    KIND_DEVELOPER = 'developer'
+    KIND_CHOICES = [
+        (KIND_TOTAL, 'Итого за месяц'),
+        (KIND_JOB, 'Проект'),
+        (KIND_DEVELOPER, 'Разработчик'),
+    ]
+
+    month = models.DateField()  # First day of the month
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    # Set null rather than cascade: a closed month keeps its figures when a job/user is deleted
+    job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True, related_name='accounting_periods')
+    developer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='accounting_periods')
+    income = models.BigIntegerField(default=0)  # Job.over_all_income
+    task_money = models.BigIntegerField(default=0)
+    earned_money = models.BigIntegerField(default=0)  # Tasks at 100%
+    paid_money = models.BigIntegerField(default=0)
+    deductions = models.BigIntegerField(default=0)
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'month']),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.kind} {self.job_id or self.developer_id or ''}".strip()
+
+
+class TaskProgressEvent(models.Model):
+    """One Task.progress change; append-only, see progress_events.py."""
+    # The (task, recorded_at) index below also serves the foreign key
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='progress_events', db_index=False)
+    progress = models.PositiveSmallIntegerField()  # 0-100
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'recorded_at']),
+            models.Index(fields=['recorded_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.task_id}: {self.progress}% at {self.recorded_at}"
+
+
+class JobProgressDaily(models.Model):
+    """Weighted progress of a job at the end of a day; the burndown source (see job_rollups.py)."""
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='progress_days')
+    day = models.DateField()
+    progress = models.FloatField(default=0)  # Same figure as Job.get_overall_progress(), unrounded
+    tasks_total = models.PositiveIntegerField(default=0)
+    tasks_done = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Also the index for burndown range reads
+            models.UniqueConstraint(fields=['job', 'day'], name='unique_job_progress_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} {self.day}: {self.progress:.1f}%"
+
+
+class JobForecast(models.Model):
+    """Estimated completion date of an unfinished job, rewritten nightly (see forecasts.py)."""
+    job = models.OneToOneField(Job, on_delete=models.CASCADE, related_name='forecast')
+    progress = models.FloatField(default=0)  # Weighted progress when the forecast was made
+    velocity = models.FloatField(default=0)  # Mean progress points per day over the window
+    basis_days = models.PositiveSmallIntegerField(default=0)  # Days of history behind `velocity`
+    # None when there's too little history or no progress to extrapolate from
+    expected_date = models.DateField(null=True, blank=True)
+    earliest_date = models.DateField(null=True, blank=True)
+    latest_date = models.DateField(null=True, blank=True)  # None: the slow end of the band never finishes
+    computed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.job_id}: {self.expected_date or '—'}"
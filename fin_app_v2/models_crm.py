@@ -21,6 +21,7 @@ class CrmJob(models.Model):
         ("inactive", "Неактивен"),
     ]
     status = models.CharField("Статус", max_length=8, choices=STATUS_CHOICES, default="active")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.title
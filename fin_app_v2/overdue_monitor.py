@@ -0,0 +1,104 @@
+"""
+Overdue task monitor: the overdue_tasks page and its JSON variant (/api/dashboard/overdue/).
+
+Tasks are listed most overdue first with keyset pagination on (deadline, id) (keyset.py),
+so a crunch with thousands of overdue tasks still reads and renders one page. The summary header (overdue count and money at risk per job and per developer)
+is a single query: tasks grouped by job UNION ALL assignments grouped by developer.
+A task with several assignees counts in full for each of them.
+"""
+from django.contrib.auth.models import User
+from django.db.models import CharField, Count, Min, Prefetch, Sum, Value
+from django.utils.dateparse import parse_date
+
+from .keyset import keyset_page
+from .models import Task
+
+Assignment = Task.assigned_users.through
+
+
+def parse_filters(params):
+    """?job= and ?developer= ids narrow both the list and the summary; bad values are ignored."""
+    filters = {}
+    for name in ('job', 'developer'):
+        value = params.get(name)
+        if value and value.isdigit():
+            filters[name] = int(value)
+    return filters
+
+
+def overdue_queryset(filters):
+    tasks = Task.objects.filter(is_overdue=True)
+    if 'job' in filters:
+        tasks = tasks.filter(job_id=filters['job'])
+    if 'developer' in filters:
+        tasks = tasks.filter(assigned_users=filters['developer'])
+    return tasks
+
+
+def summary_query(filters):
+    """(kind, id, name, count, money, oldest deadline) rows, kind being 'job' or 'developer'."""
+    jobs = (
+        overdue_queryset(filters)
+        .annotate(kind=Value('job', output_field=CharField()))
+        .values('kind', 'job_id', 'job__title')
+        .annotate(count=Count('id'), money=Sum('money_for_task'), oldest=Min('deadline'))
+        .values_list('kind', 'job_id', 'job__title', 'count', 'money', 'oldest')
+        .order_by()
+    )
+    assignments = Assignment.objects.filter(task__is_overdue=True)
+    if 'job' in filters:
+        assignments = assignments.filter(task__job_id=filters['job'])
+    if 'developer' in filters:
+        assignments = assignments.filter(user_id=filters['developer'])
+    developers = (
+        assignments.annotate(kind=Value('developer', output_field=CharField()))
+        .values('kind', 'user_id', 'user__username')
+        .annotate(count=Count('id'), money=Sum('task__money_for_task'), oldest=Min('task__deadline'))
+        .values_list('kind', 'user_id', 'user__username', 'count', 'money', 'oldest')
+        .order_by()
+    )
+    return jobs.union(developers, all=True)
+
+
+def overdue_summary(filters):
+    """{'total': {'count', 'money'}, 'jobs': [...], 'developers': [...]}, biggest money at risk first."""
+    groups = {'job': [], 'developer': []}
+    for kind, pk, name, count, money, oldest in summary_query(filters):
+        groups[kind].append({'id': pk, 'name': name, 'count': count, 'money': money or 0, 'oldest_deadline': oldest})
+    for rows in groups.values():
+        rows.sort(key=lambda row: (-row['money'], -row['count'], row['id']))
+    return {
+        # Every task has a job, so the job rows add up to the distinct overdue tasks
+        'total': {
+            'count': sum(row['count'] for row in groups['job']),
+            'money': sum(row['money'] for row in groups['job']),
+        },
+        'jobs': groups['job'],
+        'developers': groups['developer'],
+    }
+
+
+def overdue_page(queryset, params):
+    """
+    One page of overdue tasks, oldest deadline first, with job and assignees loaded:
+    keyset.keyset_page() with the rows under 'tasks'.
+    """
+    queryset = queryset.select_related('job').prefetch_related(
+        Prefetch('assigned_users', queryset=User.objects.only('id', 'username'))
+    )
+    return keyset_page(queryset, params, 'deadline', parse_date, name='tasks')
+
+
+def task_row(task, today):
+    """JSON shape of a listed task."""
+    return {
+        'id': task.id,
+        'title': task.title,
+        'job_id': task.job_id,
+        'job_title': task.job.title,
+        'progress': task.progress,
+        'money_for_task': task.money_for_task,
+        'deadline': task.deadline.isoformat(),
+        'days_overdue': (today - task.deadline).days,
+        'assignees': [{'id': user.id, 'username': user.username} for user in task.assigned_users.all()],
+    }
@@ -0,0 +1,209 @@
+"""
+Payment sheet export (CSV / XLSX) for all developers over a date range.
+
+Everything is streamed: per-developer totals come from grouped queries (closed months
+from the AccountingPeriod snapshots, see accounting.py), task rows from one joined query
+read with .iterator(), and rows are written out as they are produced. Memory stays flat
+however long the history is; only the totals (a few numbers per developer) are held.
+
+Tasks are picked by start_date, deductions by deduction_date.
+"""
+import csv
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+from . import accounting
+from .models import Task
+
+ITERATOR_CHUNK_SIZE = 2000
+ROWS_PER_CHUNK = 500  # Rows written before the buffered output is handed to the response
+
+COLUMNS = [
+    'Разработчик', 'Email', 'Проект', 'Задача', 'Тип', 'Дата начала', 'Дедлайн',
+    'Прогресс, %', 'Оплата за задачу', 'Заработано', 'Оплачено', 'Вычеты', 'Баланс',
+]
+TOTAL_LABEL = 'Итого'
+# Totals of a developer with task rows but nothing in developer_totals() (e.g. assigned
+# to a task of a month closed before the assignment)
+NO_TOTALS = {'amount': 0, 'earned': 0, 'paid': 0, 'deductions': 0}
+
+Assignment = Task.assigned_users.through
+
+
+def _task_filter(date_from, date_to, prefix=''):
+    q = Q()
+    if date_from:
+        q &= Q(**{f'{prefix}start_date__gte': date_from})
+    if date_to:
+        q &= Q(**{f'{prefix}start_date__lte': date_to})
+    return q
+
+
+def _assignments(developer_id, date_from, date_to):
+    assignments = Assignment.objects.filter(_task_filter(date_from, date_to, 'task__'))
+    if developer_id:
+        assignments = assignments.filter(user_id=developer_id)
+    return assignments
+
+
+def _total_row(username, email, total):
+    return [
+        username, email, TOTAL_LABEL, None, None, None, None, None, total['amount'],
+        total['earned'], total['paid'], total['deductions'], total['paid'] - total['deductions'],
+    ]
+
+
+def payment_rows(developer_id=None, date_from=None, date_to=None):
+    """
+    Header, then for every developer with tasks or deductions in the range: one row per
+    task and a total row, in user id order. The totals (one entry per developer) are read
+    up front; only the task rows are streamed, so a single result set is open at a time.
+    """
+    totals = accounting.developer_totals(developer_id, date_from, date_to)
+    developers = {
+        pk: (username, email)
+        for pk, username, email in User.objects.filter(pk__in=list(totals)).values_list('pk', 'username', 'email')
+    }
+    task_rows = (
+        _assignments(developer_id, date_from, date_to)
+        .order_by('user_id', 'task__job_id', 'task_id')
+        .values_list(
+            'user_id', 'user__username', 'user__email', 'task__job__title', 'task__title', 'task__task_type',
+            'task__start_date', 'task__deadline', 'task__progress', 'task__money_for_task', 'task__paid',
+        )
+        .iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+    )
+
+    yield COLUMNS
+    # Developers with totals but no task rows (deductions only) go in between, by id
+    without_tasks = iter(sorted(developers))
+    waiting = next(without_tasks, None)
+    current = None
+    for user_id, username, email, job_title, title, task_type, start_date, deadline, progress, money, paid in task_rows:
+        if user_id != current:
+            if current is not None:
+                yield _total_row(*current_name, totals.get(current, NO_TOTALS))
+            while waiting is not None and waiting <= user_id:
+                if waiting != user_id:
+                    yield _total_row(*developers[waiting], totals[waiting])
+                waiting = next(without_tasks, None)
+            current, current_name = user_id, (username, email)
+        yield [
+            username, email, job_title, title, task_type, start_date, deadline, progress, money,
+            money if progress == 100 else 0, money if paid else 0, None, None,
+        ]
+    if current is not None:
+        yield _total_row(*current_name, totals.get(current, NO_TOTALS))
+    while waiting is not None:
+        yield _total_row(*developers[waiting], totals[waiting])
+        waiting = next(without_tasks, None)
+
+
+class _Buffer:
+    """Write target that keeps what was written until the generator takes it."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data) if not isinstance(data, str) else data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(c.encode() if isinstance(c, str) else c for c in self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_csv(rows):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    yield '\ufeff'.encode()  # BOM so Excel opens the Cyrillic headers as UTF-8
+    for count, row in enumerate(rows, 1):
+        writer.writerow(['' if value is None else value for value in row])
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+# Minimal SpreadsheetML package: one sheet with inline strings and no styles, written
+# through zipfile onto a non-seekable buffer so the archive can be streamed.
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Payments" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(rows):
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode())
+                if count % ROWS_PER_CHUNK == 0:
+                    yield buffer.drain()
+            sheet.write(_SHEET_TAIL.encode())
+    yield buffer.drain()
+
+
+FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,121 @@
+"""
+Append-only history of Task.progress, for velocity reports.
+
+Task.save() and update_tasks_progress() call record_changes(); only tasks whose progress
+actually changed since they were loaded get an event, so the log never holds the same
+value twice in a row. Each call's events are written with one bulk_create when the
+surrounding transaction commits (immediately in autocommit), then today's
+JobProgressDaily rollup of the affected jobs is refreshed; a rolled-back transaction or
+savepoint drops its events together with the change.
+
+`manage.py compact_progress_events` thins out old history to the last value of each day
+(PROGRESS_EVENTS_FULL_DAYS, default 90).
+"""
+import threading
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .job_rollups import refresh_jobs
+from .models import TaskProgressEvent
+
+_local = threading.local()
+
+
+def _write_events(events, using):
+    TaskProgressEvent.objects.using(using).bulk_create(events, batch_size=500)
+
+
+def _refresh_pending_jobs():
+    """
+    Refresh today's rollup of every job queued so far. The first callback after a commit
+    does the work for all of them and later ones find nothing left; ids queued by a
+    rolled-back transaction just get recomputed from the database with the next commit.
+    """
+    job_ids = getattr(_local, 'job_ids', None)
+    if job_ids:
+        _local.job_ids = set()
+        # Today's burndown point of the affected jobs (job_rollups.py)
+        refresh_jobs(job_ids)
+
+
+def _queue(events, job_ids, using):
+    """
+    Write `events` when the surrounding transaction commits (right away in autocommit).
+    Each call registers its own on_commit callback, so rolling back a savepoint drops
+    exactly the events recorded inside it.
+    """
+    transaction.on_commit(partial(_write_events, events, using), using=using)
+    _local.job_ids = getattr(_local, 'job_ids', set()) | set(job_ids)
+    # A failing rollup is logged by Django and never breaks the task save that triggered it
+    transaction.on_commit(_refresh_pending_jobs, using=using, robust=True)
+
+
+def record_changes(tasks, using=DEFAULT_DB_ALIAS):
+    """Queue an event for every task whose progress differs from what was loaded/saved last."""
+    now = timezone.now()
+    changed = []
+    job_ids = set()
+    for task in tasks:
+        if 'progress' not in task.__dict__:  # Deferred, so not being written
+            continue
+        if getattr(task, '_loaded_progress', None) != task.progress:
+            changed.append(TaskProgressEvent(task_id=task.pk, progress=task.progress, recorded_at=now))
+            task._loaded_progress = task.progress
+            job_ids.add(task.job_id)
+    if changed:
+        _queue(changed, job_ids, using)
+
+
+def compact(full_days=None, batch_size=1000):
+    """
+    For events older than `full_days`, keep only the last event of each task and day, then
+    drop the ones that repeat the previous kept value. Returns how many were deleted.
+    """
+    if full_days is None:
+        full_days = getattr(settings, 'PROGRESS_EVENTS_FULL_DAYS', 90)
+    cutoff = timezone.now() - timedelta(days=full_days)
+    old = TaskProgressEvent.objects.filter(recorded_at__lt=cutoff)
+
+    deleted = 0
+    task_ids = old.order_by('task_id').values_list('task_id', flat=True).distinct()
+    last_task_id = 0
+    while True:
+        batch = list(task_ids.filter(task_id__gt=last_task_id)[:batch_size])
+        if not batch:
+            break
+        last_task_id = batch[-1]
+
+        rows = (
+            old.filter(task_id__in=batch)
+            .order_by('task_id', 'recorded_at', 'id')
+            .values_list('id', 'task_id', 'recorded_at', 'progress')
+        )
+        drop = []
+        previous = None  # (id, task_id, day, progress) of the candidate to keep
+        kept_value = {}
+        for event_id, task_id, recorded_at, progress in rows.iterator(chunk_size=2000):
+            day = timezone.localtime(recorded_at).date()
+            if previous and previous[1] == task_id and previous[2] == day:
+                drop.append(previous[0])  # A later event of the same day supersedes it
+            elif previous:
+                drop.extend(_settle(previous, kept_value))
+            previous = (event_id, task_id, day, progress)
+        if previous:
+            drop.extend(_settle(previous, kept_value))
+
+        for start in range(0, len(drop), batch_size):
+            deleted += TaskProgressEvent.objects.filter(id__in=drop[start:start + batch_size]).delete()[0]
+    return deleted
+
+
+def _settle(candidate, kept_value):
+    """Keep a day's last event unless it repeats the task's previous kept value."""
+    event_id, task_id, _, progress = candidate
+    if kept_value.get(task_id) == progress:
+        return [event_id]
+    kept_value[task_id] = progress
+    return []
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+from django.db import connections, router
+from django.db.models import Exists, OuterRef
+from rest_framework import serializers
+
+from .models import Task
+
+
+@lru_cache(maxsize=None)
+def serializer_relations(serializer_class, prefix=''):
+    """
+    Work out which relations a serializer reads, as (select_related, prefetch_related)
+    lookup tuples: nested many=True serializers and many-related fields need a prefetch,
+    nested single serializers and dotted sources ('job.title') need a join.
+    """
+    select, prefetch = [], []
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        lookup = prefix + field.source.replace('.', '__')
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append(lookup)
+            _, child_prefetch = serializer_relations(type(field.child), lookup + '__')
+            # Children of a reverse-FK prefetch already get their parent cached, so only
+            # nested prefetches are worth following
+            prefetch.extend(child_prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(lookup)
+        elif isinstance(field, serializers.BaseSerializer):
+            select.append(lookup)
+        elif '.' in field.source:
+            select.append(lookup.rsplit('__', 1)[0])
+    return tuple(dict.fromkeys(select)), tuple(dict.fromkeys(prefetch))
+
+
+def queryset_for_serializer(serializer_class, queryset=None):
+    """Apply the select_related/prefetch_related a serializer needs to avoid N+1 queries."""
+    if queryset is None:
+        queryset = serializer_class.Meta.model.objects.all()
+    select, prefetch = serializer_relations(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+def assignment_exists(user):
+    """EXISTS subquery that is true when `user` is assigned to the outer Task row."""
+    return Exists(
+        Task.assigned_users.through.objects.filter(task_id=OuterRef('pk'), user_id=user.pk)
+    )
+
+
+def with_assignment(queryset, user):
+    """Annotate tasks with `is_assigned` for `user` instead of loading all assignees."""
+    return queryset.annotate(is_assigned=assignment_exists(user))
+
+
+def bulk_upsert(model, rows, unique_fields, update_fields, batch_size=500):
+    """
+    bulk_create(update_conflicts=True) that also runs on backends without a conflict
+    target (MySQL): there the upsert applies to whichever unique key clashes, so
+    unique_fields is only passed where the backend accepts it.
+    """
+    using = router.db_for_write(model)
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    if connections[using].features.supports_update_conflicts_with_target:
+        options['unique_fields'] = unique_fields
+    return model.objects.using(using).bulk_create(rows, batch_size=batch_size, **options)
@@ -3,7 +3,9 @@
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Job, Task, DeductionLog
+from django.db.models import prefetch_related_objects
+from .models import Job, JobForecast, Task, DeductionLog, BackgroundJob
+from . import deadline_classifier as deadlines
 from .models_crm import CrmJob, CrmTask, CrmTaskComment, CrmTaskFile
 
 
@@ -13,7 +15,20 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class VersionedSerializerMixin:
+    """
+    `version` (concurrency.VersionedModel) is output only when creating, as new rows start
+    at 1. On update it is the version the client read, which save() checks.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.instance is None:
+            fields['version'].read_only = True
+        return fields
+
+
+class TaskSerializer(VersionedSerializerMixin, serializers.ModelSerializer):
     assigned_users = UserSerializer(many=True, read_only=True)
     assigned_user_ids = serializers.ListField(
         child=serializers.IntegerField(), write_only=True, required=False
@@ -30,9 +45,9 @@ class TaskSerializer(serializers.ModelSerializer):
             'start_date', 'deadline', 'feedback', 'confirmed',
             'confirmation_date', 'confirmed_by', 'assigned_users',
             'assigned_user_ids', 'job', 'job_title', 'days_until_deadline',
-            'status_color'
+            'status_color', 'updated_at', 'version'
         ]
-        read_only_fields = ['start_date', 'confirmation_date', 'confirmed_by']
+        read_only_fields = ['start_date', 'confirmation_date', 'confirmed_by', 'updated_at']
 
     def get_days_until_deadline(self, obj):
         if obj.deadline:
@@ -42,24 +57,11 @@ class TaskSerializer(serializers.ModelSerializer):
         return None
 
     def get_status_color(self, obj):
-        if obj.deadline:
+        # One classifier per serializer, so a many=True list works out the cutoffs once
+        if not hasattr(self, '_classify_deadline'):
             from django.utils import timezone
-            today = timezone.now().date()
-            days_until = (obj.deadline - today).days
-
-            if obj.progress == 100:
-                return 'completed'
-            elif days_until < 0:
-                return 'overdue'
-            elif days_until == 0:
-                return 'due_today'
-            elif days_until <= 5:
-                return 'task_red'
-            elif days_until <= 10:
-                return 'task_yellow'
-            else:
-                return 'task_green'
-        return 'no_deadline'
+            self._classify_deadline = deadlines.classifier(timezone.now().date(), completed=True, due_days=1)
+        return self._classify_deadline(obj.deadline, obj.progress)
 
     def create(self, validated_data):
         assigned_user_ids = validated_data.pop('assigned_user_ids', [])
@@ -85,8 +87,15 @@ class TaskSerializer(serializers.ModelSerializer):
         return instance
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobForecastSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = JobForecast
+        fields = ['expected_date', 'earliest_date', 'latest_date', 'velocity', 'basis_days', 'computed_at']
+
+
+class JobSerializer(VersionedSerializerMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
+    forecast = JobForecastSerializer(read_only=True)  # Stored nightly, null until the first run
     overall_progress = serializers.SerializerMethodField()
     total_tasks = serializers.SerializerMethodField()
     completed_tasks = serializers.SerializerMethodField()
@@ -98,27 +107,41 @@ class JobSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'title', 'client_email', 'over_all_income',
             'created_at', 'tasks', 'overall_progress', 'total_tasks',
-            'completed_tasks', 'overdue_tasks', 'remaining_income'
+            'completed_tasks', 'overdue_tasks', 'remaining_income', 'forecast', 'updated_at', 'version'
         ]
-        read_only_fields = ['created_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def to_representation(self, instance):
+        # The nested tasks, the progress and the counts below all read instance.tasks.all().
+        # Views pass querysets built with queryset_for_serializer(); anything else (e.g. the
+        # instance just saved by create/update) gets the same prefetches here, once, instead
+        # of a query per field. Async callers must prefetch, as there is no DB access here then.
+        if 'tasks' not in getattr(instance, '_prefetched_objects_cache', {}):
+            from .querysets import serializer_relations
+            prefetch_related_objects([instance], *serializer_relations(type(self))[1])
+        return super().to_representation(instance)
 
     def get_overall_progress(self, obj):
         return obj.get_overall_progress()
 
     def get_total_tasks(self, obj):
-        return obj.tasks.count()
+        return len(obj.tasks.all())
 
     def get_completed_tasks(self, obj):
-        return obj.tasks.filter(progress=100).count()
+        return sum(1 for task in obj.tasks.all() if task.progress == 100)
 
     def get_overdue_tasks(self, obj):
-        from django.utils import timezone
-        today = timezone.now().date()
-        return obj.tasks.filter(deadline__lt=today, progress__lt=100).count()
+        # Same rule as everywhere else (deadline_classifier), one classifier per serializer
+        if not hasattr(self, '_classify_deadline'):
+            from django.utils import timezone
+            self._classify_deadline = deadlines.classifier(timezone.now().date(), completed=True)
+        return sum(
+            1 for task in obj.tasks.all()
+            if self._classify_deadline(task.deadline, task.progress) == deadlines.OVERDUE
+        )
 
     def get_remaining_income(self, obj):
-        from django.db.models import Sum
-        total_task_payment = obj.tasks.aggregate(Sum('money_for_task'))['money_for_task__sum'] or 0
+        total_task_payment = sum(task.money_for_task for task in obj.tasks.all())
         return obj.over_all_income - total_task_payment
 
 
@@ -148,7 +171,23 @@ class DashboardStatsSerializer(serializers.Serializer):
     income_balance = serializers.DecimalField(max_digits=10, decimal_places=2)
 
 
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'id', 'name', 'status', 'progress', 'message', 'result', 'error',
+            'attempts', 'max_attempts', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
 class CrmJobSerializer(serializers.ModelSerializer):
+    # Counts come from crm_listing.annotated_crm_jobs(); serialize annotated instances only
+    task_count = serializers.IntegerField(read_only=True)
+    project_count = serializers.IntegerField(source='task_count', read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+    file_count = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = CrmJob
         fields = [
@@ -156,9 +195,10 @@ class CrmJobSerializer(serializers.ModelSerializer):
             'full_name', 'phone_number', 'position',
             'client_company_name', 'client_company_phone',
             'client_company_address', 'client_website',
-            'status'  # добавлено поле статус
+            'status',  # добавлено поле статус
+            'updated_at', 'project_count', 'task_count', 'comment_count', 'file_count'
         ]
-        read_only_fields = ['created_at']
+        read_only_fields = ['created_at', 'updated_at']
 
 
 class CrmTaskSerializer(serializers.ModelSerializer):
@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .auth_backends import forget_unknown_email
+from .caching import bump_data_version
+from .models import DeductionLog, Job, Task, DeletedRecord
+from .models_crm import CrmJob
+
+
+# Invalidate version-keyed caches (see caching.py)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def bump_tasks_version(sender, **kwargs):
+    bump_data_version('tasks')
+
+
+@receiver(post_save, sender=DeductionLog)
+@receiver(post_delete, sender=DeductionLog)
+def bump_deductions_version(sender, **kwargs):
+    bump_data_version('deductions')
+
+
+# Tombstones for delta-sync clients (see delta_sync.py)
+def record_assignment_removals(pairs):
+    """'assignment' tombstones for (task_id, user_id) pairs: the task left that developer's list."""
+    DeletedRecord.objects.bulk_create([
+        DeletedRecord(model_name='assignment', object_id=task_id, user_id=user_id)
+        for task_id, user_id in pairs
+    ])
+
+
+@receiver(pre_delete, sender=Task)
+def remember_task_assignees(sender, instance, **kwargs):
+    # The assignment rows are gone by post_delete (and their deletion sends no signals)
+    instance._assignee_ids = list(instance.assigned_users.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Task)
+def record_task_deletion(sender, instance, **kwargs):
+    DeletedRecord.objects.create(model_name='task', object_id=instance.pk, job_id=instance.job_id)
+    record_assignment_removals((instance.pk, user_id) for user_id in getattr(instance, '_assignee_ids', ()))
+
+
+@receiver(post_delete, sender=Job)
+def record_job_deletion(sender, instance, **kwargs):
+    DeletedRecord.objects.create(model_name='job', object_id=instance.pk, job_id=instance.pk)
+
+
+@receiver(post_delete, sender=CrmJob)
+def record_crm_job_deletion(sender, instance, **kwargs):
+    DeletedRecord.objects.create(model_name='crmjob', object_id=instance.pk)
+
+
+@receiver(m2m_changed, sender=Task.assigned_users.through)
+def touch_task_on_assignment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Assignee changes don't go through Task.save(), so bump updated_at by hand."""
+    if action in ('post_remove', 'pre_clear'):
+        if action == 'pre_clear':
+            # pk_set is None for clear(), so read what is about to go
+            related = instance.developer_tasks if reverse else instance.assigned_users
+            pk_set = set(related.values_list('id', flat=True))
+        if reverse:
+            record_assignment_removals((task_id, instance.pk) for task_id in pk_set)
+        else:
+            record_assignment_removals((instance.pk, user_id) for user_id in pk_set)
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    bump_data_version('tasks')
+    if reverse:
+        # instance is a User; pk_set holds task ids (None for clear)
+        if action == 'post_clear' or not pk_set:
+            return
+        Task.objects.filter(pk__in=pk_set).update(updated_at=timezone.now())
+    else:
+        Task.objects.filter(pk=instance.pk).update(updated_at=timezone.now())
+
+
+# A new/changed email may now belong to an account (see auth_backends.py)
+@receiver(post_save, sender=User)
+def clear_unknown_email_cache(sender, instance, **kwargs):
+    forget_unknown_email(instance.email)
@@ -0,0 +1,235 @@
+"""
+Heavy task/job write operations, shared by the views (inline) and the background
+worker (background.py). Each accepts an optional `report(percent, message)` callback.
+"""
+import calendar
+
+from dateutil.relativedelta import relativedelta
+from django.db import transaction
+from django.utils import timezone
+
+from .caching import bump_data_version
+from .concurrency import next_version
+from .deadline_buckets import is_overdue
+from .models import Job, Task
+from .progress_events import record_changes
+from .querysets import assignment_exists
+
+PATPIS_MAX_MONTHS = 100  # Safety limit for a generated series
+DELETE_CHUNK_SIZE = 200
+PROGRESS_BATCH_LIMIT = 200  # Max entries per batched progress update
+
+
+def _noop(percent, message=''):
+    pass
+
+
+def rebalance_task_percentages(job_id):
+    """
+    Set every task's weight to its share of the job's hours. Only rows whose weight
+    changes are written, in one bulk UPDATE. Returns the number of updated tasks.
+    """
+    rows = list(Task.objects.filter(job_id=job_id).values_list('id', 'hours', 'task_percentage'))
+    total_hours = sum(hours for _, hours, _ in rows)
+    if total_hours <= 0:
+        return 0
+
+    now = timezone.now()
+    changed = []
+    for pk, hours, current in rows:
+        percentage = round(hours / total_hours * 100)
+        if percentage != current:
+            changed.append(Task(id=pk, task_percentage=percentage, updated_at=now, version=next_version()))
+
+    if changed:
+        Task.objects.bulk_update(changed, ['task_percentage', 'updated_at', 'version'], batch_size=500)
+        bump_data_version('tasks')
+    return len(changed)
+
+
+def patpis_base_title(title):
+    if '(' in title and ')' in title:
+        return title[:title.rfind('(')].strip()
+    return title
+
+
+def patpis_title(base_title, day):
+    return f"{base_title} ({day.strftime('%B %Y')})"
+
+
+def patpis_series_dates(start_date, end_date):
+    """Monthly deadlines after `start_date` up to `end_date`, on the same day of month."""
+    day_of_month = start_date.day
+    current_date = start_date + relativedelta(months=1)
+    dates = []
+    while current_date <= end_date and len(dates) < PATPIS_MAX_MONTHS:
+        # Adjust day for month length
+        max_day = calendar.monthrange(current_date.year, current_date.month)[1]
+        target_date = current_date.replace(day=min(day_of_month, max_day))
+        if target_date > end_date:
+            break
+        dates.append(target_date)
+        current_date = current_date + relativedelta(months=1)
+    return dates
+
+
+@transaction.atomic
+def create_patpis_series(task, start_date, end_date, report=_noop):
+    """
+    Create the monthly copies of PATPIS `task` (its first occurrence) until `end_date`,
+    with the same assignees. Returns the number of tasks created.
+    """
+    if not (start_date and end_date and start_date < end_date):
+        return 0
+
+    dates = patpis_series_dates(start_date, end_date)
+    base_title = patpis_base_title(task.title)
+    assigned_user_ids = list(task.assigned_users.values_list('id', flat=True))
+
+    created = []
+    for index, target_date in enumerate(dates, 1):
+        recurring_task = Task(
+            job_id=task.job_id,
+            title=patpis_title(base_title, target_date),
+            hours=task.hours,
+            description=task.description,
+            task_percentage=task.task_percentage,
+            money_for_task=task.money_for_task,
+            task_type='PATPIS',
+            deadline=target_date
+        )
+        # Saved one by one: bulk_create doesn't return ids on MySQL and the assignments need them
+        recurring_task.save()
+        created.append(recurring_task.id)
+        report(int(index * 90 / len(dates)), f"Создано {index} из {len(dates)} задач")
+
+    # All assignments in one INSERT instead of an add() per task and user
+    Through = Task.assigned_users.through
+    Through.objects.bulk_create([
+        Through(task_id=task_id, user_id=user_id)
+        for task_id in created
+        for user_id in assigned_user_ids
+    ])
+    return len(created)
+
+
+def delete_job_with_tasks(job_id, report=_noop):
+    """Delete a job, its tasks first in chunks so progress can be reported."""
+    task_ids = list(Task.objects.filter(job_id=job_id).values_list('id', flat=True))
+    for start in range(0, len(task_ids), DELETE_CHUNK_SIZE):
+        with transaction.atomic():
+            Task.objects.filter(id__in=task_ids[start:start + DELETE_CHUNK_SIZE]).delete()
+        done = min(start + DELETE_CHUNK_SIZE, len(task_ids))
+        report(int(done * 95 / len(task_ids)), f"Удалено {done} из {len(task_ids)} задач")
+
+    Job.objects.filter(id=job_id).delete()
+    return len(task_ids)
+
+
+@transaction.atomic
+def confirm_tasks(task_ids, confirmed_by_id, report=_noop):
+    """
+    Confirm the finished, unconfirmed tasks among `task_ids` and mark them paid
+    (what check_and_pay_developer() does for a single task). Returns the number confirmed.
+    """
+    now_time = timezone.now()
+    ids = list(
+        Task.objects.select_for_update()
+        .filter(id__in=task_ids, progress=100, confirmed=False)
+        .values_list('id', flat=True)
+    )
+    if not ids:
+        return 0
+
+    # Массовое обновление всех задач за один запрос
+    Task.objects.filter(id__in=ids).update(
+        confirmed=True,
+        confirmation_date=now_time,
+        confirmed_by_id=confirmed_by_id,
+        updated_at=now_time,
+        version=next_version()
+    )
+    report(50, "Задачи подтверждены")
+    Task.objects.filter(id__in=ids, paid=False).update(paid=True, updated_at=now_time, version=next_version())
+    bump_data_version('tasks')
+    return len(ids)
+
+
+def task_progress_state(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'progress': task.progress,
+        'feedback': task.feedback,
+        'paid': task.paid,
+        'confirmed': task.confirmed,
+        'is_overdue': task.is_overdue,
+        'version': task.version,
+        'updated_at': task.updated_at.isoformat(),
+    }
+
+
+@transaction.atomic
+def update_tasks_progress(user, entries):
+    """
+    Apply many `{task_id, progress, feedback[, version]}` entries for the developer `user`.
+    `progress`/`feedback` may be omitted to leave the value as is. Tasks the user is
+    not assigned to (or that don't exist), and tasks whose `version` no longer matches,
+    are reported in `errors` and skipped.
+    Returns (list of new task states, list of errors).
+    """
+    errors = []
+    changes = {}
+    expected_versions = {}
+    for entry in entries:
+        try:
+            task_id = int(entry['task_id'])
+            progress = entry.get('progress')
+            if progress is not None:
+                progress = int(progress)
+                if not (0 <= progress <= 100):
+                    raise ValueError("Progress must be between 0 and 100")
+            version = int(entry['version']) if entry.get('version') is not None else None
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append({'task_id': entry.get('task_id') if isinstance(entry, dict) else None, 'error': str(e)})
+            continue
+        if version is not None:
+            expected_versions[task_id] = version
+        # Later entries for the same task win
+        changes.setdefault(task_id, {}).update(
+            {key: value for key, value in (('progress', progress), ('feedback', entry.get('feedback'))) if value is not None}
+        )
+
+    # Permission check and row fetch in one query
+    tasks = {
+        task.id: task
+        for task in Task.objects.select_for_update().filter(id__in=changes).filter(assignment_exists(user))
+    }
+    for task_id in changes:
+        if task_id not in tasks:
+            errors.append({'task_id': task_id, 'error': "Task not found or not assigned to you"})
+        elif expected_versions.get(task_id, tasks[task_id].version) != tasks[task_id].version:
+            # Rows are locked, so comparing here is as good as UPDATE ... WHERE version = ?
+            task = tasks.pop(task_id)
+            errors.append({'task_id': task_id, 'error': "Task was changed by someone else", 'current': task_progress_state(task)})
+
+    now_time = timezone.now()
+    today = now_time.date()
+    for task_id, task in tasks.items():
+        for field, value in changes[task_id].items():
+            setattr(task, field, value)
+        # Same rule as check_and_pay_developer()
+        if task.progress == 100 and task.confirmed and not task.paid:
+            task.paid = True
+        task.is_overdue = is_overdue(task.deadline, task.progress, today)
+        task.updated_at = now_time
+        task.version += 1
+
+    if tasks:
+        Task.objects.bulk_update(
+            tasks.values(), ['progress', 'feedback', 'paid', 'is_overdue', 'updated_at', 'version'], batch_size=500
+        )
+        # bulk_update skips post_save, so invalidate the cached rollups and log progress here
+        bump_data_version('tasks')
+        record_changes(tasks.values())
+    return [task_progress_state(tasks[task_id]) for task_id in changes if task_id in tasks], errors
@@ -0,0 +1,14 @@
+import uuid
+
+from django import template
+from django.utils.html import format_html
+
+from fin_app_v2.idempotency import FORM_FIELD
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_key_input():
+    """Hidden field with a fresh key per rendered form, so resubmits of the same form are replayed."""
+    return format_html('<input type="hidden" name="{}" value="{}">', FORM_FIELD, uuid.uuid4().hex)
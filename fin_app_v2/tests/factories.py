@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.http import QueryDict
+from django.utils import timezone
+
+from ..models import Job, Task
+
+
+def make_job(title='Job', income=1000, **fields):
+    return Job.objects.create(
+        title=title, client_email=f'{title.lower().replace(" ", "")}@example.com',
+        client_password='secret', over_all_income=income, **fields
+    )
+
+
+def make_task(job, title='Task', **fields):
+    fields.setdefault('task_percentage', 100)
+    return Task.objects.create(job=job, title=title, description='', **fields)
+
+
+def cursor_before(seconds=1):
+    return (timezone.now() - timedelta(seconds=seconds)).isoformat()
+
+
+class KeysetWalkMixin:
+    def walk(self, page_function, queryset, key, page_size=3):
+        """Follow next_cursor from the first page; returns the ids in the order seen."""
+        seen = []
+        params = QueryDict(f'page_size={page_size}')
+        while True:
+            page = page_function(queryset, params)
+            seen += [row.pk for row in page[key]]
+            if not page['has_next']:
+                return seen
+            self.assertLessEqual(len(page[key]), page_size)
+            params = QueryDict(page['next_query'])
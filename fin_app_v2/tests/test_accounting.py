@@ -0,0 +1,67 @@
+from io import StringIO
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import accounting, task_operations
+from ..models import AccountingPeriod, Job, Task, calculate_income_balance
+from .factories import make_job, make_task
+
+
+class AccountingSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)  # closed_through() is cached outside the test transaction
+        self.admin = User.objects.create_user('admin', 'Admin@dbr.org', 'pw')
+        self.developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.job = make_job(income=1000)
+        Job.objects.filter(pk=self.job.pk).update(created_at=datetime(2024, 1, 5, tzinfo=dt_timezone.utc))
+        self.task = make_task(self.job, money_for_task=300, progress=100)
+        Task.objects.filter(pk=self.task.pk).update(start_date=date(2024, 1, 3))
+        self.task.assigned_users.add(self.developer)
+        call_command('close_period', through='2024-03', stdout=StringIO())
+
+    def test_snapshots_match_live_figures(self):
+        self.assertEqual(accounting.closed_through(), date(2024, 3, 1))
+        self.assertEqual(
+            accounting.developer_totals()[self.developer.pk],
+            {'amount': 300, 'earned': 300, 'paid': 0, 'deductions': 0},
+        )
+        self.assertEqual(calculate_income_balance()['income_balance'], 700)
+
+    def test_edits_to_a_closed_month_keep_its_figures_until_reopened(self):
+        snapshot_rows = AccountingPeriod.objects.count()
+        task = Task.objects.get(pk=self.task.pk)
+        task.paid = True
+        task.save()
+        task_operations.confirm_tasks([self.task.pk], self.admin.pk)
+        make_task(Job.objects.get(pk=self.job.pk), 'late', money_for_task=200)
+
+        self.assertEqual(accounting.closed_through(), date(2024, 3, 1))
+        self.assertEqual(AccountingPeriod.objects.count(), snapshot_rows)
+        self.assertEqual(accounting.developer_totals()[self.developer.pk]['paid'], 0)
+        self.assertEqual(calculate_income_balance()['income_balance'], 700)
+
+        call_command('close_period', through='2024-03', reopen='2024-01', stdout=StringIO())
+        self.assertEqual(accounting.developer_totals()[self.developer.pk]['paid'], 300)
+        self.assertEqual(calculate_income_balance()['income_balance'], 500)
+
+    def test_saving_a_task_does_not_query_the_snapshots(self):
+        accounting.closed_through()  # Cached from here until the next close/reopen
+        task = Task.objects.get(pk=self.task.pk)
+        task.progress = 50
+        with self.assertNumQueries(1):  # The versioned UPDATE (progress events go on commit)
+            task.save()
+
+    def test_reopening_forgets_the_cached_month(self):
+        self.assertEqual(accounting.closed_through(), date(2024, 3, 1))
+        accounting.reopen_from(date(2024, 2, 1))
+        self.assertEqual(accounting.closed_through(), date(2024, 1, 1))
+
+    def test_current_month_cannot_be_closed(self):
+        with self.assertRaises(ValueError):
+            accounting.close_through(timezone.localdate())
@@ -0,0 +1,81 @@
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import background, task_operations
+from ..models import BackgroundJob, Task
+from .factories import make_job, make_task
+
+
+class BackgroundQueueTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'Admin@dbr.org', 'pw')
+        self.job = make_job()
+
+    def test_queued_job_runs_and_records_its_result(self):
+        task = make_task(self.job, progress=100)
+        queued = background.enqueue('confirm_tasks', {'task_ids': [task.pk], 'confirmed_by_id': self.admin.pk})
+
+        claimed = background.claim_next_job()
+        self.assertEqual(claimed.pk, queued.pk)
+        self.assertIsNone(background.claim_next_job())  # Already running
+        self.assertTrue(background.run_job(claimed))
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundJob.STATUS_SUCCEEDED)
+        self.assertEqual(queued.result, {'confirmed': 1})
+        task.refresh_from_db()
+        self.assertTrue(task.confirmed and task.paid)
+
+    def test_failed_job_is_retried_later_then_fails(self):
+        queued = background.enqueue('delete_job', {'job_id': self.job.pk, 'unexpected': 1}, max_attempts=2)
+
+        with self.assertLogs('fin_app_v2.background', 'ERROR'):
+            self.assertFalse(background.run_job(background.claim_next_job()))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundJob.STATUS_QUEUED)
+        self.assertGreater(queued.run_after, timezone.now())
+        self.assertIsNone(background.claim_next_job())  # Backing off
+
+        BackgroundJob.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        with self.assertLogs('fin_app_v2.background', 'ERROR'):
+            self.assertFalse(background.run_job(background.claim_next_job()))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, BackgroundJob.STATUS_FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    def test_unknown_job_name_is_refused(self):
+        with self.assertRaises(ValueError):
+            background.enqueue('no_such_job')
+
+    def test_failed_rebalance_rolls_back_the_series(self):
+        first = make_task(self.job, 'Report', task_type='PATPIS', deadline=date(2024, 1, 10))
+        queued = background.enqueue('patpis_series', {
+            'task_id': first.pk, 'start_date': '2024-01-10', 'end_date': '2024-04-10',
+        })
+        with mock.patch.object(task_operations, 'rebalance_task_percentages', side_effect=RuntimeError):
+            with self.assertLogs('fin_app_v2.background', 'ERROR'):
+                self.assertFalse(background.run_job(background.claim_next_job()))
+        self.assertEqual(Task.objects.filter(job=self.job).count(), 1)
+
+        BackgroundJob.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+        self.assertTrue(background.run_job(background.claim_next_job()))
+        self.assertEqual(Task.objects.filter(job=self.job).count(), 4)  # Created once
+
+    def test_rebalance_job_rounds_weights(self):
+        two = make_task(self.job, 'two', hours=2, task_percentage=0)
+        one = make_task(self.job, 'one', hours=1, task_percentage=0)
+        background.enqueue('rebalance', {'job_id': self.job.pk})
+        self.assertTrue(background.run_job(background.claim_next_job()))
+        self.assertEqual(Task.objects.get(pk=two.pk).task_percentage, 67)  # 66.7%, not truncated to 66
+        self.assertEqual(Task.objects.get(pk=one.pk).task_percentage, 33)
+
+    def test_bulk_confirm_rejects_non_numeric_ids(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('bulk_confirm_tasks'), {'task_ids': ['1', 'x'], 'async': '1'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(BackgroundJob.objects.exists())
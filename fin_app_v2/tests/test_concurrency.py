@@ -0,0 +1,50 @@
+import json
+
+from django.db import transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from ..concurrency import ConcurrencyConflict
+from ..models import Job, Task
+from .factories import make_job, make_task
+
+
+# The 409 answer reads the current row after the failed UPDATE, as it does in autocommit
+class OptimisticConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        self.job = make_job()
+        self.task = make_task(self.job)
+
+    def test_stale_save_raises_conflict(self):
+        first = Task.objects.get(pk=self.task.pk)
+        second = Task.objects.get(pk=self.task.pk)
+        first.title = 'first'
+        first.save()
+        self.assertEqual(first.version, 2)
+
+        second.title = 'second'
+        with self.assertRaises(ConcurrencyConflict), transaction.atomic():
+            second.save()
+        self.assertEqual(Task.objects.get(pk=self.task.pk).title, 'first')
+
+    def test_api_update_with_stale_version_answers_409(self):
+        url = reverse('api_job_detail', args=[self.job.pk])
+        response = self.client.patch(url, {'title': 'A', 'version': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['version'], 2)
+
+        response = self.client.patch(url, {'title': 'B', 'version': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['current']['title'], 'A')
+
+    def test_version_is_ignored_on_create(self):
+        body = {'title': 'New', 'client_email': 'new@example.com', 'client_password': 'x', 'over_all_income': 5, 'version': 7}
+        response = self.client.post(reverse('api_job_list'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['version'], 1)
+        self.assertEqual(Job.objects.get(pk=response.json()['id']).version, 1)
+
+        body = {'title': 'T', 'description': 'd', 'task_percentage': 10, 'job': self.job.pk, 'version': 7}
+        response = self.client.post(reverse('api_task_list'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['version'], 1)
@@ -0,0 +1,46 @@
+import json
+
+from django.test import RequestFactory, TestCase
+
+from ..api_job_crud import api_get_all_jobs
+from ..api_views import CrmJobViewSet
+from ..models_crm import CrmJob, CrmTask
+
+COUNT_FIELDS = ('task_count', 'project_count', 'comment_count', 'file_count')
+
+
+class CrmJobViewSetTests(TestCase):
+    def call(self, method, action, body, **kwargs):
+        view = CrmJobViewSet.as_view({method: action})
+        request = getattr(RequestFactory(), method)('/', json.dumps(body), content_type='application/json')
+        response = view(request, **kwargs)
+        response.render()
+        return response
+
+    def test_create_and_update_answer_with_the_counts(self):
+        response = self.call('post', 'create', {'title': 'Lead', 'client_email': 'lead@example.com'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual({field: response.data[field] for field in COUNT_FIELDS}, dict.fromkeys(COUNT_FIELDS, 0))
+
+        CrmTask.objects.create(job_id=response.data['id'], title='Call')
+        response = self.call('patch', 'partial_update', {'title': 'Renamed'}, pk=response.data['id'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['title'], response.data['task_count']), ('Renamed', 1))
+
+
+class CrmAllJobsTests(TestCase):
+    def setUp(self):
+        for title in ('A', 'B', 'C'):
+            CrmJob.objects.create(title=title, client_email=f'{title.lower()}@example.com')
+
+    def get(self, **params):
+        return json.loads(api_get_all_jobs(RequestFactory().get('/', params)).content)
+
+    def test_plain_get_is_still_a_bare_list(self):
+        data = self.get()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 3)
+
+    def test_page_parameters_switch_to_the_envelope(self):
+        data = self.get(page_size=2)
+        self.assertEqual((data['count'], data['num_pages'], len(data['results'])), (3, 2, 2))
@@ -0,0 +1,20 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .. import dashboard
+
+
+def _broken_widget(ctx):
+    raise RuntimeError("Table 'fin.secret_table' doesn't exist")
+
+
+class DashboardBundleTests(SimpleTestCase):
+    def test_widget_failure_is_logged_not_returned(self):
+        with mock.patch.dict(dashboard.WIDGETS, {'broken': _broken_widget, 'fine': lambda ctx: 42}):
+            with self.assertLogs('fin_app_v2.dashboard', 'ERROR') as logs:
+                bundle = dashboard.build_bundle(['broken', 'fine'])
+
+        self.assertEqual(bundle['widgets'], {'fine': 42})
+        self.assertEqual(bundle['errors'], {'broken': dashboard.WIDGET_ERROR})
+        self.assertIn('secret_table', logs.output[0])
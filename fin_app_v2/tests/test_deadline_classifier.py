@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import deadline_classifier as deadlines
+from ..models import Job, Task
+from ..serializers import JobSerializer
+from .factories import make_job, make_task
+
+
+class DeadlineClassifierTests(TestCase):
+    def test_sql_and_python_agree(self):
+        job = make_job()
+        today = timezone.localdate()
+        for offset in (None, -3, 0, 1, 2, 5, 6, 10, 11, 30):
+            deadline = today + timedelta(days=offset) if offset is not None else None
+            make_task(job, f'd{offset}', deadline=deadline, progress=0)
+            make_task(job, f'done{offset}', deadline=deadline, progress=100)
+
+        for options in ({}, {'completed': True}, {'completed': True, 'due_days': 1}, {'due_days': 2}):
+            classify = deadlines.classifier(today, **options)
+            rows = Task.objects.annotate(status=deadlines.status_case(today, **options)).values_list(
+                'deadline', 'progress', 'status'
+            )
+            for deadline, progress, status in rows:
+                self.assertEqual(status, classify(deadline, progress), (deadline, progress, options))
+
+    @override_settings(DEADLINE_STATUS_THRESHOLDS={'red': 1, 'yellow': 2})
+    def test_thresholds_come_from_settings(self):
+        today = date(2024, 1, 1)
+        self.assertEqual(deadlines.classify(date(2024, 1, 3), 0, today), deadlines.YELLOW)
+        self.assertEqual(deadlines.classify(date(2024, 1, 4), 0, today), deadlines.GREEN)
+
+    def test_job_overdue_count_follows_the_classifier(self):
+        job = make_job()
+        today = timezone.localdate()
+        make_task(job, 'late', deadline=today - timedelta(days=1))
+        make_task(job, 'late but done', deadline=today - timedelta(days=1), progress=100)
+        make_task(job, 'soon', deadline=today + timedelta(days=1))
+        job = Job.objects.prefetch_related('tasks').get(pk=job.pk)
+        self.assertEqual(JobSerializer(job).data['overdue_tasks'], 1)
+
+        with mock.patch.object(deadlines, 'classifier', return_value=lambda deadline, progress=0: deadlines.OVERDUE):
+            self.assertEqual(JobSerializer(job).data['overdue_tasks'], 3)
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.http import QueryDict
+from django.test import TestCase
+from django.utils import timezone
+
+from ..deduction_listing import deduction_log_page, deduction_log_queryset
+from ..models import DeductionLog
+from .factories import KeysetWalkMixin
+
+
+class DeductionLogPaginationTests(KeysetWalkMixin, TestCase):
+    def test_pages_cover_every_row_once(self):
+        admin = User.objects.create_user('admin', 'Admin@dbr.org', 'pw')
+        developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        DeductionLog.objects.bulk_create([
+            DeductionLog(developer=developer, deducted_by=admin, deduction_amount=i) for i in range(8)
+        ])
+        # Ties on the date are broken by id
+        DeductionLog.objects.update(deduction_date=timezone.now())
+
+        seen = self.walk(deduction_log_page, deduction_log_queryset(), 'logs')
+        self.assertEqual(seen, list(DeductionLog.objects.order_by('-deduction_date', '-id').values_list('id', flat=True)))
+
+    def test_garbage_cursor_starts_over(self):
+        page = deduction_log_page(deduction_log_queryset(), QueryDict('cursor=%%%'))
+        self.assertTrue(page['is_first_page'])
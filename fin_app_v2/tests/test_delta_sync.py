@@ -0,0 +1,96 @@
+from io import StringIO
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import DeletedRecord, Job, Task
+from .factories import cursor_before, make_job, make_task
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.job = make_job()
+        self.kept = make_task(self.job, 'kept')
+        self.unassigned = make_task(self.job, 'unassigned')
+        self.deleted = make_task(self.job, 'deleted')
+        for task in (self.kept, self.unassigned, self.deleted):
+            task.assigned_users.add(self.developer)
+        Task.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.client.force_login(self.developer)
+
+    def test_task_list_returns_changes_and_deletions(self):
+        since = cursor_before()
+        self.kept.progress = 40
+        self.kept.save()
+        deleted_id = self.deleted.pk
+        self.deleted.delete()
+
+        data = self.client.get(reverse('api_task_list'), {'updated_since': since}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.kept.pk])
+        self.assertEqual(data['deleted_ids'], [deleted_id])
+        self.assertIn('server_time', data)
+
+    def test_developer_list_reports_tasks_that_left_the_developer(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw')
+        foreign = make_task(self.job, 'foreign')
+        foreign.assigned_users.add(other)
+        since = cursor_before()
+        self.unassigned.assigned_users.remove(self.developer)
+        deleted_id = self.deleted.pk
+        self.deleted.delete()
+        foreign.delete()
+
+        data = self.client.get(reverse('api_developer_tasks'), {'updated_since': since}).json()
+        self.assertEqual(data['results'], [])
+        self.assertCountEqual(data['deleted_ids'], [self.unassigned.pk, deleted_id])
+
+    def test_reassigned_task_is_not_reported_as_removed(self):
+        since = cursor_before()
+        self.kept.assigned_users.clear()
+        self.kept.assigned_users.add(self.developer)
+
+        data = self.client.get(reverse('api_developer_tasks'), {'updated_since': since}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.kept.pk])
+        self.assertEqual(data['deleted_ids'], [])
+
+    def test_bad_cursor_is_rejected(self):
+        response = self.client.get(reverse('api_task_list'), {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_job_list_reports_jobs_whose_tasks_changed(self):
+        untouched = make_job('Untouched')
+        Job.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        since = cursor_before()
+        self.kept.progress = 40
+        self.kept.save()
+
+        data = self.client.get(reverse('api_job_list'), {'updated_since': since}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.job.pk])
+        self.assertEqual(data['results'][0]['tasks'][0]['progress'], 40)
+        self.assertNotIn(untouched.pk, [row['id'] for row in data['results']])
+
+        since = cursor_before()
+        self.deleted.delete()
+        data = self.client.get(reverse('api_job_list'), {'updated_since': since}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.job.pk])
+
+    def test_cursor_older_than_the_tombstones_is_rejected(self):
+        since = (timezone.now() - timedelta(days=31)).isoformat()
+        response = self.client.get(reverse('api_task_list'), {'updated_since': since})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DELETED_RECORD_TTL=60)
+    def test_purge_drops_expired_tombstones(self):
+        old_id, recent_id = self.deleted.pk, self.unassigned.pk
+        self.deleted.delete()
+        self.unassigned.delete()
+        DeletedRecord.objects.filter(object_id=old_id).update(deleted_at=timezone.now() - timedelta(minutes=2))
+        call_command('purge_deleted_records', stdout=StringIO())
+        self.assertEqual(set(DeletedRecord.objects.values_list('object_id', flat=True)), {recent_id})
@@ -0,0 +1,53 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..events import TaskEventSource
+from ..models import Task
+from ..querysets import assignment_exists
+from .factories import cursor_before, make_job, make_task
+
+
+class TaskEventSourceTests(TestCase):
+    def setUp(self):
+        self.developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.job = make_job()
+        self.task = make_task(self.job)
+        self.task.assigned_users.add(self.developer)
+
+    def test_first_event_is_the_full_row_then_only_diffs(self):
+        source = TaskEventSource(Task.objects.filter(job_id=self.job.pk), job_id=self.job.pk)
+        source.start(timezone.now() - timedelta(minutes=1))
+        first = source.poll()
+        self.assertEqual(first['changed'][0]['title'], 'Task')
+
+        self.task.progress = 30
+        self.task.save()
+        source.cursor = timezone.now() - timedelta(minutes=1)
+        self.assertEqual(source.poll(), {'changed': [{'id': self.task.pk, 'progress': 30, 'version': 2}], 'removed': []})
+
+    def test_developer_stream_reports_unassignment(self):
+        source = TaskEventSource(
+            Task.objects.filter(assignment_exists(self.developer)), removed_model='assignment', user_id=self.developer.pk
+        )
+        source.start(timezone.now() - timedelta(minutes=1))
+        self.task.assigned_users.remove(self.developer)
+        self.assertEqual(source.poll(), {'changed': [], 'removed': [self.task.pk]})
+
+    def test_client_portal_stream_sends_the_client_projection(self):
+        Task.objects.filter(pk=self.task.pk).update(money_for_task=500, feedback='internal note')
+        session = self.client.session
+        session['client_job_id'] = self.job.pk
+        session.save()
+
+        response = self.client.get(
+            reverse('api_job_task_events', args=[self.job.pk]), {'since': cursor_before(60)}
+        )
+        data = [line for line in b''.join(response.streaming_content).decode().splitlines() if line.startswith('data: ')]
+        self.assertEqual(json.loads(data[0][len('data: '):])['changed'], [
+            {'id': self.task.pk, 'title': 'Task', 'progress': 0, 'deadline': None, 'status': 'no_deadline'},
+        ])
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from ..forecasts import refresh_forecasts
+from ..models import JobForecast, JobProgressDaily
+from .factories import make_job, make_task
+
+
+class ForecastTests(TestCase):
+    def test_steady_job_gets_a_narrow_forecast(self):
+        job = make_job()
+        make_task(job, progress=50)
+        today = timezone.localdate()
+        JobProgressDaily.objects.bulk_create([
+            JobProgressDaily(job=job, day=today - timedelta(days=10 - i), progress=i * 5, tasks_total=1)
+            for i in range(10)
+        ])
+
+        self.assertEqual(refresh_forecasts(window_days=28, min_days=3), 1)
+        forecast = JobForecast.objects.get(job=job)
+        self.assertAlmostEqual(forecast.velocity, 5)
+        self.assertEqual(forecast.expected_date, today + timedelta(days=10))
+        self.assertEqual(forecast.earliest_date, forecast.latest_date)
+
+    def test_finished_and_new_jobs(self):
+        finished = make_job('Finished')
+        make_task(finished, progress=100)
+        JobForecast.objects.create(job=finished, progress=90)
+        new = make_job('New')
+        make_task(new, progress=10)
+
+        refresh_forecasts(window_days=28, min_days=3)
+        self.assertFalse(JobForecast.objects.filter(job=finished).exists())
+        self.assertIsNone(JobForecast.objects.get(job=new).expected_date)  # Not enough history
@@ -0,0 +1,38 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+
+from ..api_task_views import api_create_task
+from ..models import Task
+from .factories import make_job
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.job = make_job()
+        self.body = {'title': 'New', 'description': 'd', 'hours': 2, 'money_for_task': 50}
+
+    def post(self, body, key):
+        # Called directly: fin_app_v2.urls has an HTML view on the same path first
+        request = RequestFactory().post(
+            reverse('api_create_task', args=[self.job.pk]), json.dumps(body),
+            content_type='application/json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+        request.user = AnonymousUser()
+        return api_create_task(request, self.job.pk)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post(self.body, 'key-1')
+        retry = self.post(self.body, 'key-1')
+        self.assertEqual(retry.status_code, first.status_code)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Task.objects.filter(job=self.job).count(), 1)
+
+    def test_reused_key_with_another_body_is_rejected(self):
+        self.post(self.body, 'key-1')
+        response = self.post({**self.body, 'title': 'Other'}, 'key-1')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Task.objects.filter(job=self.job).count(), 1)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Task
+from ..overdue_monitor import overdue_page, overdue_queryset
+from .factories import KeysetWalkMixin, make_job, make_task
+
+
+class OverduePaginationTests(KeysetWalkMixin, TestCase):
+    def test_pages_cover_every_row_once(self):
+        job = make_job()
+        today = timezone.localdate()
+        for i in range(7):
+            make_task(job, f't{i}', deadline=today - timedelta(days=i % 3 + 1))
+        make_task(job, 'future', deadline=today + timedelta(days=1))
+
+        seen = self.walk(overdue_page, overdue_queryset({}), 'tasks')
+        expected = list(Task.objects.filter(is_overdue=True).order_by('deadline', 'id').values_list('id', flat=True))
+        self.assertEqual(len(expected), 7)
+        self.assertEqual(seen, expected)
+
+
+class OverdueMonitorPageTests(TestCase):
+    def setUp(self):
+        job = make_job()
+        make_task(job, 'late', deadline=timezone.localdate() - timedelta(days=3), money_for_task=777)
+
+    def test_money_is_shown_to_the_admin_only(self):
+        developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.client.force_login(developer)
+        response = self.client.get(reverse('overdue_tasks'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'late')
+        self.assertNotContains(response, '777')
+
+        admin = User.objects.create_user('admin', 'Admin@dbr.org', 'pw')
+        self.client.force_login(admin)
+        self.assertContains(self.client.get(reverse('overdue_tasks')), '777')
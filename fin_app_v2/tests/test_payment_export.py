@@ -0,0 +1,51 @@
+from io import StringIO
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import DeductionLog, Job, Task
+from ..payment_export import TOTAL_LABEL, payment_rows
+from .factories import make_job, make_task
+
+
+class PaymentRowsTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'Admin@dbr.org', 'pw')
+        self.newcomer = User.objects.create_user('newcomer', 'newcomer@example.com', 'pw')
+        self.first = User.objects.create_user('first', 'first@example.com', 'pw')
+        self.only_deductions = User.objects.create_user('deducted', 'deducted@example.com', 'pw')
+        self.last = User.objects.create_user('last', 'last@example.com', 'pw')
+        self.job = make_job()
+        for user, money in ((self.first, 100), (self.last, 300)):
+            make_task(self.job, f'{user.username} task', money_for_task=money, progress=100).assigned_users.add(user)
+        DeductionLog.objects.create(developer=self.only_deductions, deducted_by=self.admin, deduction_amount=20)
+
+    def rows(self, **filters):
+        rows = list(payment_rows(**filters))[1:]
+        return [(row[0], row[2], row[8], row[11]) for row in rows]
+
+    def test_every_developer_gets_task_rows_and_a_total(self):
+        self.assertEqual(self.rows(), [
+            ('first', 'Job', 100, None), ('first', TOTAL_LABEL, 100, 0),
+            ('deducted', TOTAL_LABEL, 0, 20),
+            ('last', 'Job', 300, None), ('last', TOTAL_LABEL, 300, 0),
+        ])
+
+    def test_developer_missing_from_the_totals_keeps_the_rest_of_the_sheet(self):
+        self.addCleanup(cache.clear)  # closed_through() is cached outside the test transaction
+        Job.objects.update(created_at=datetime(2024, 1, 5, tzinfo=dt_timezone.utc))
+        Task.objects.update(start_date=date(2024, 1, 3))
+        DeductionLog.objects.update(deduction_date=datetime(2024, 1, 7, tzinfo=dt_timezone.utc))
+        call_command('close_period', through='2024-01', stdout=StringIO())
+        # Assigned after the month was closed: in the task rows, not in the frozen totals
+        Task.objects.get(title='first task').assigned_users.add(self.newcomer)
+
+        self.assertEqual(self.rows(), [
+            ('newcomer', 'Job', 100, None), ('newcomer', TOTAL_LABEL, 0, 0),
+            ('first', 'Job', 100, None), ('first', TOTAL_LABEL, 100, 0),
+            ('deducted', TOTAL_LABEL, 0, 20),
+            ('last', 'Job', 300, None), ('last', TOTAL_LABEL, 300, 0),
+        ])
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import task_operations
+from ..models import Task, TaskProgressEvent
+from ..progress_events import compact
+from .factories import make_job, make_task
+
+
+class ProgressEventTests(TestCase):
+    def setUp(self):
+        self.job = make_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = make_task(self.job)
+
+    def test_progress_change_logs_an_event(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(pk=self.task.pk)
+            task.progress = 60
+            task.save()
+        self.assertEqual(list(TaskProgressEvent.objects.filter(task=task).values_list('progress', flat=True)), [0, 60])
+
+    def test_save_without_progress_change_logs_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(pk=self.task.pk)
+            task.title = 'renamed'
+            task.save()
+        self.assertEqual(TaskProgressEvent.objects.filter(task=self.task).count(), 1)  # Creation only
+
+    def test_batched_update_logs_events(self):
+        developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.task.assigned_users.add(developer)
+        with self.captureOnCommitCallbacks(execute=True):
+            states, errors = task_operations.update_tasks_progress(developer, [{'task_id': self.task.pk, 'progress': 100}])
+        self.assertEqual(errors, [])
+        self.assertEqual(TaskProgressEvent.objects.filter(task=self.task).latest('id').progress, 100)
+
+    def test_compaction_keeps_the_last_value_of_each_day(self):
+        TaskProgressEvent.objects.all().delete()
+        old = timezone.now().replace(hour=12) - timedelta(days=200)
+        TaskProgressEvent.objects.bulk_create([
+            TaskProgressEvent(task=self.task, progress=10, recorded_at=old),
+            TaskProgressEvent(task=self.task, progress=20, recorded_at=old + timedelta(hours=1)),
+            TaskProgressEvent(task=self.task, progress=20, recorded_at=old + timedelta(days=1)),  # Repeats
+            TaskProgressEvent(task=self.task, progress=30, recorded_at=old + timedelta(days=2)),
+            TaskProgressEvent(task=self.task, progress=35, recorded_at=timezone.now()),
+            TaskProgressEvent(task=self.task, progress=40, recorded_at=timezone.now()),
+        ])
+        self.assertEqual(compact(full_days=90), 2)
+        self.assertEqual(
+            list(TaskProgressEvent.objects.order_by('recorded_at', 'id').values_list('progress', flat=True)),
+            [20, 30, 35, 40],
+        )
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import job_rollups, task_operations
+from ..models import JobProgressDaily, Task
+from .factories import make_job, make_task
+
+
+class ProgressRollupTests(TestCase):
+    def setUp(self):
+        self.job = make_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = make_task(self.job)
+
+    def test_progress_change_rolls_up_the_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.get(pk=self.task.pk)
+            task.progress = 60
+            task.save()
+        rollup = JobProgressDaily.objects.get(job=self.job, day=timezone.localdate())
+        self.assertEqual((rollup.progress, rollup.tasks_total, rollup.tasks_done), (60, 1, 0))
+
+    def test_batched_update_rolls_up_the_job(self):
+        developer = User.objects.create_user('dev', 'dev@example.com', 'pw')
+        self.task.assigned_users.add(developer)
+        with self.captureOnCommitCallbacks(execute=True):
+            task_operations.update_tasks_progress(developer, [{'task_id': self.task.pk, 'progress': 100}])
+        self.assertEqual(JobProgressDaily.objects.get(job=self.job).tasks_done, 1)
+
+
+class RollupTests(TestCase):
+    def test_burndown_fills_days_without_a_row(self):
+        job = make_job()
+        task = make_task(job)
+        today = timezone.localdate()
+        Task.objects.filter(pk=task.pk).update(progress=20)
+        job_rollups.refresh_jobs([job.pk], day=today - timedelta(days=2))
+        Task.objects.filter(pk=task.pk).update(progress=50)
+        job_rollups.refresh_jobs([job.pk], day=today)
+        job_rollups.refresh_jobs([job.pk], day=today)  # Upsert, not a second row
+
+        points = job_rollups.burndown(job.pk, today - timedelta(days=5), today)
+        self.assertEqual([point['progress'] for point in points], [20, 20, 50])
+        self.assertEqual([point['velocity'] for point in points], [0, 0, 30])
+        self.assertEqual(JobProgressDaily.objects.filter(job=job).count(), 2)
+
+    def test_refresh_all_covers_jobs_without_tasks(self):
+        empty = make_job('Empty')
+        job_rollups.refresh_jobs()
+        self.assertEqual(JobProgressDaily.objects.get(job=empty).tasks_total, 0)
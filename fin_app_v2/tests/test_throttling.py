@@ -0,0 +1,37 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from ..throttling import client_id
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_CLIENT_BUDGET=6, THROTTLE_ENDPOINT_BUDGET=1000)
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_client_over_budget_gets_429(self):
+        # api_job_list costs 5, so the second call goes over a budget of 6
+        self.assertEqual(self.client.get(reverse('api_job_list')).status_code, 200)
+        response = self.client.get(reverse('api_job_list'))
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_forwarded_for_is_ignored_without_trusted_proxies(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 1.2.3.4', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        self.assertEqual(client_id(request), 'ip:10.0.0.1')
+        with override_settings(THROTTLE_TRUSTED_PROXIES=1):
+            self.assertEqual(client_id(request), 'ip:1.2.3.4')
+
+    def test_unverified_authorization_header_is_keyed_by_ip(self):
+        for token in ('a', 'b'):
+            request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}', REMOTE_ADDR='10.0.0.1')
+            request.user = AnonymousUser()
+            self.assertEqual(client_id(request), 'ip:10.0.0.1')
+
+    def test_rotating_authorization_headers_share_one_budget(self):
+        self.assertEqual(self.client.get(reverse('api_job_list'), HTTP_AUTHORIZATION='Bearer a').status_code, 200)
+        response = self.client.get(reverse('api_job_list'), HTTP_AUTHORIZATION='Bearer b')
+        self.assertEqual(response.status_code, 429)
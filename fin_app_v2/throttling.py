@@ -0,0 +1,192 @@
+"""
+Throttling and load shedding for the JSON API (ApiThrottleMiddleware).
+
+Every API request is charged its endpoint's cost (THROTTLE_COSTS, by URL name, default 1)
+against two fixed-window budgets kept in the shared cache:
+
+- per client (user id from the session or a valid API credential, else IP):
+  THROTTLE_CLIENT_BUDGET; see client_ip() for when X-Forwarded-For is believed
+- per endpoint, all clients together: THROTTLE_ENDPOINT_BUDGET
+
+Over budget answers 429 with Retry-After. Independently, the middleware times the SQL
+every request runs and keeps a moving average of query latency in this process;
+while it is above LOAD_SHED_DB_LATENCY_MS, endpoints costing LOAD_SHED_MIN_COST or more
+get 503 with Retry-After instead of piling more queries onto a slow database.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+API_VIEW_MODULES = (
+    'fin_app_v2.api_views',
+    'fin_app_v2.api_task_views',
+    'fin_app_v2.api_async_views',
+    'fin_app_v2.api_job_crud',
+    'fin_app_v2.events',
+)
+
+DEFAULT_COSTS = {
+    # Aggregates over all jobs/tasks
+    'api_dashboard_stats': 5,
+    'api_async_dashboard_stats': 5,
+    'api_dashboard_bundle': 10,
+    'api_monthly_revenue': 3,
+    'api_earnings_pivot': 3,
+    'api_developer_workload': 3,
+    'api_overdue_monitor': 3,
+    'api_project_distribution': 3,
+    'api_calendar_tasks': 3,
+    'api_async_calendar_tasks': 3,
+    'api_get_task_statistics': 3,
+    'api_async_get_task_statistics': 3,
+    # Listings with nested tasks
+    'api_job_list': 5,
+    'api_task_list': 3,
+    'api_get_all_tasks': 3,
+    'api_async_get_all_tasks': 3,
+    'crmjob-list': 3,
+    # Long-lived streams hold a worker and poll the DB
+    'api_task_events': 10,
+    'api_job_task_events': 5,
+    'api_developer_task_events': 5,
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def client_id(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    if request.headers.get('Authorization'):
+        # Only a credential that checks out names a client: random headers must not buy new budgets
+        user = credential_user(request)
+        if user is not None:
+            return f"user:{user.pk}"
+    return "ip:" + client_ip(request)
+
+
+def credential_user(request):
+    """
+    The user the Authorization header authenticates as with the API's own authentication
+    classes (DRF runs them again in the view), None if it is missing, invalid or inactive.
+    """
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        if issubclass(authentication_class, SessionAuthentication):
+            continue  # The session is request.user already
+        try:
+            result = authentication_class().authenticate(request)
+        except APIException:
+            return None
+        if result is not None:
+            return result[0]
+    return None
+
+
+def client_ip(request):
+    """
+    REMOTE_ADDR, or behind THROTTLE_TRUSTED_PROXIES reverse proxies the X-Forwarded-For hop
+    the outermost of them appended. Hops further left are whatever the client sent.
+    """
+    proxies = _setting('THROTTLE_TRUSTED_PROXIES', 0)
+    hops = [hop.strip() for hop in request.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+    if proxies and len(hops) >= proxies:
+        return hops[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def charge(key, cost, limit, window):
+    """
+    Add `cost` to the counter for the current window; returns seconds until the window
+    resets if that goes over `limit`, else None.
+    """
+    now = time.time()
+    window_start = int(now // window) * window
+    cache_key = f"throttle:{key}:{window_start}"
+    cache.add(cache_key, 0, window + 1)
+    try:
+        used = cache.incr(cache_key, cost)
+    except ValueError:  # Expired between add() and incr()
+        cache.add(cache_key, cost, window + 1)
+        used = cost
+    if used > limit:
+        return max(1, int(window_start + window - now) + 1)
+    return None
+
+
+class DbLatencyMonitor:
+    """Exponential moving average of query latency seen by this process."""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self.average_ms = 0.0
+        self.last_sample_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, duration_ms):
+        with self._lock:
+            self.average_ms += self.alpha * (duration_ms - self.average_ms)
+            self.last_sample_at = time.monotonic()
+
+    def overloaded(self):
+        threshold = _setting('LOAD_SHED_DB_LATENCY_MS', 500)
+        if not threshold or self.average_ms < threshold:
+            return False
+        # Nothing gets measured while everything is shed, so let a probe through now and then
+        if time.monotonic() - self.last_sample_at > _setting('LOAD_SHED_PROBE_SECONDS', 2):
+            self.last_sample_at = time.monotonic()
+            return False
+        return True
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record((time.perf_counter() - started) * 1000)
+
+
+db_latency = DbLatencyMonitor()
+
+
+def _too_many(message, retry_after, status):
+    response = JsonResponse({'error': message, 'retry_after': retry_after}, status=status)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class ApiThrottleMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.costs = {**DEFAULT_COSTS, **_setting('THROTTLE_COSTS', {})}
+
+    def __call__(self, request):
+        # Time every query of the request (sync views; async views query from other threads)
+        with connection.execute_wrapper(db_latency):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not _setting('THROTTLE_ENABLED', True) or view_func.__module__ not in API_VIEW_MODULES:
+            return None
+
+        endpoint = request.resolver_match.url_name or request.resolver_match.route
+        cost = self.costs.get(endpoint, 1)
+
+        if cost >= _setting('LOAD_SHED_MIN_COST', 2) and db_latency.overloaded():
+            return _too_many("Server is busy, retry later", _setting('LOAD_SHED_RETRY_AFTER', 5), 503)
+
+        window = _setting('THROTTLE_WINDOW_SECONDS', 60)
+        retry_after = charge(f"client:{client_id(request)}", cost, _setting('THROTTLE_CLIENT_BUDGET', 300), window)
+        if retry_after is None:
+            retry_after = charge(f"endpoint:{endpoint}", cost, _setting('THROTTLE_ENDPOINT_BUDGET', 3000), window)
+        if retry_after is not None:
+            return _too_many("Too many requests", retry_after, 429)
+        return None
@@ -7,6 +7,7 @@ from .views import (create_job, create_tasks, job_list, client_login, client_pro
 urlpatterns = [
     # Job creation (no developers assigned here)
     path('deduction_logs_admin/', views.deduction_logs_admin, name='deduction_logs_admin'),
+    path('deduction_logs_admin/export/', views.deduction_logs_export, name='deduction_logs_export'),
     path('job_details/<int:job_id>/', views.job_details, name='job_details'),
     path('deduct/', views.deduction_page, name='deduction_page'),
     path('payment_history/', views.payment_history, name='payment_history'),  # New URL for Payment History
@@ -84,6 +85,7 @@ urlpatterns = [
 
     path('job/<int:job_id>/delete/', views.delete_job, name='delete_job'),
     path('update-progress/', views.update_progress, name='update_progress'),
+    path('update-progress/bulk/', views.bulk_update_progress, name='bulk_update_progress'),
 
     path('admin/all-developer-tasks/', views.all_developer_tasks, name='all_developer_tasks'),
 
@@ -95,6 +97,7 @@ urlpatterns = [
 
 
     path('dev_history/', views.developer_payment_sheet, name='dev_history'),
+    path('dev_history/export/', views.developer_payment_sheet_export, name='dev_history_export'),
 
 
 # Add these to your urls.py file
@@ -1,6 +1,6 @@
 
 from datetime import timezone, datetime, date
-from django.db.models import F, Sum, Q
+from django.db.models import Count, F, Sum, Q
 from django.utils.timezone import now
 from django.core.paginator import Paginator
 from collections import Counter
@@ -12,17 +12,24 @@ from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.utils.timezone import now
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.urls import reverse
 import json
 
 from . import models
+from .querysets import with_assignment
+from . import accounting, background, deduction_listing, overdue_monitor, payment_export, task_operations
+from . import deadline_buckets as buckets
+from . import deadline_classifier as deadlines
+from .concurrency import ConcurrencyConflict
+from .idempotency import idempotent
 
 from .forms import JobForm, TaskFormSet, ClientLoginForm
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
-from .models import Job, calculate_income_balance
+from .models import Job, JobForecast, calculate_income_balance
 from .forms import TaskFormSet
 from django.core.paginator import Paginator
 from django.shortcuts import render
@@ -57,18 +64,13 @@ def login_view(request):
         email = request.POST.get('email')
         password = request.POST.get('password')
 
-        try:
-            # Fetch the user by email
-            user = User.objects.get(email=email)
-            # Authenticate using the username (Django default) and password
-            if user.check_password(password):
-                # Log the user in
-                login(request, user)
-                return redirect('admin_dashboard')
-            else:
-                messages.error(request, "Invalid password")
-        except User.DoesNotExist:
-            messages.error(request, "User with this email does not exist")
+        # One indexed lookup by email (see auth_backends.EmailBackend)
+        user = authenticate(request, email=email, password=password)
+        if user is not None:
+            # Log the user in
+            login(request, user)
+            return redirect('admin_dashboard')
+        messages.error(request, "Invalid email or password")
     return render(request, 'login.html')
 
 
@@ -174,7 +176,9 @@ def update_feedback(request):
         feedback = request.POST.get('feedback')
 
         # Получение задачи по идентификатору и проверка прав доступа
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(with_assignment(Task.objects.all(), request.user), id=task_id)
+        if not task.is_assigned and request.user.email != 'Admin@dbr.org':
+            return HttpResponseForbidden("You are not authorized to update this task.")
         if task:
             task.feedback = feedback
             task.save()
@@ -226,9 +230,13 @@ def client_progress(request):
 
 
     job = get_object_or_404(Job, id=job_id)
+    # Taken before reading tasks, so the live stream replays anything saved while rendering
+    stream_since = now().isoformat()
 
-    # Import Sum for calculating total hours
-    from django.db.models import Sum
+    # Import Sum for calculating total hours; Max and datetime are used below even
+    # when the job has no follow tasks
+    from datetime import datetime
+    from django.db.models import Max, Sum
 
     # Filter tasks by type - only get SIMPLE tasks for list view
     simple_tasks = Task.objects.filter(job=job, task_type='SIMPLE')
@@ -423,12 +431,16 @@ def client_progress(request):
     if latest_deadline:
         formatted_latest_deadline = latest_deadline.strftime("%b %d, %Y")  # e.g., "Mar 25, 2025"
 
+    # Completion forecast, precomputed nightly by `manage.py forecast_jobs`
+    forecast = JobForecast.objects.filter(job_id=job.id).first()
+
     # Add it to your context
     context = {
         'job': job,
         'tasks': mark_safe(json.dumps(simple_tasks_data)),  # Only simple tasks for list view
         'latest_deadline': latest_deadline,
         'formatted_latest_deadline': formatted_latest_deadline,
+        'forecast': forecast,
         'current_date': current_date,
 
         'show_follow_tasks': show_follow_tasks,
@@ -436,7 +448,8 @@ def client_progress(request):
         'task_matrix': task_matrix,
         'total_simple_hours': total_simple_hours,  # Add total hours to context
         'max_hours': max_hours,  # Add max hours to context
-        'hours_percentage': int((total_simple_hours / max_hours) * 100) if max_hours > 0 else 0  # Calculate percentage
+        'hours_percentage': int((total_simple_hours / max_hours) * 100) if max_hours > 0 else 0,  # Calculate percentage
+        'stream_since': stream_since,
     }
 
     return render(request, 'client_progress.html', context)
@@ -495,16 +508,12 @@ def developer_login(request):
         password = request.POST.get('password')
 
         # Authenticate based on email (developers log in using email)
-        try:
-            user = User.objects.get(email=email)
-            if user.check_password(password):
-                # Log the developer in
-                login(request, user)
-                return redirect('developer_tasks')  # Redirect to developer's tasks
-            else:
-                messages.error(request, 'Invalid password')
-        except User.DoesNotExist:
-            messages.error(request, 'User with this email does not exist')
+        user = authenticate(request, email=email, password=password)
+        if user is not None:
+            # Log the developer in
+            login(request, user)
+            return redirect('developer_tasks')  # Redirect to developer's tasks
+        messages.error(request, 'Invalid email or password')
     return render(request, 'developer_login.html')
 
 
@@ -545,10 +554,12 @@ from .models import Task, DeductionLog
 def developer_tasks(request):
     try:
         developer = request.user
+        today = buckets.ensure_buckets_fresh()
         # Get all tasks assigned to the developer with related job data
         tasks = Task.objects.filter(assigned_users=developer) \
             .select_related('job') \
             .prefetch_related('assigned_users') \
+            .annotate(status=deadlines.status_case(today)) \
             .order_by('deadline')
 
         # Get the section parameter from URL (if any)
@@ -563,21 +574,6 @@ def developer_tasks(request):
             # Calculate wave animation offset based on progress
             progress_offset = 125.6 - (task.progress / 100 * 125.6)
             task.progress_offset = progress_offset
-
-            # Calculate task status and deadline info
-            if task.deadline:
-                days_until_deadline = (task.deadline - timezone.now().date()).days
-                if days_until_deadline > 10:
-                    task.status = 'task_green'
-                elif 5 < days_until_deadline <= 10:
-                    task.status = 'task_yellow'
-                elif 0 <= days_until_deadline <= 5:
-                    task.status = 'task_red'
-                else:
-                    task.status = 'overdue'
-            else:
-                task.status = 'no_deadline'
-
             processed_tasks.append(task)
 
         # Paginate main task list
@@ -596,14 +592,14 @@ def developer_tasks(request):
         # Get recent notifications or updates
         recent_updates = DeductionLog.objects.filter(developer=developer).order_by('-deduction_date')[:5]
 
-        # Prepare task statistics
-        task_stats = {
-            'total_tasks': tasks.count(),
-            'completed_tasks': tasks.filter(progress=100).count(),
-            'in_progress_tasks': tasks.filter(progress__gt=0, progress__lt=100).count(),
-            'pending_tasks': tasks.filter(progress=0).count(),
-            'overdue_tasks': tasks.filter(deadline__lt=timezone.now().date(), progress__lt=100).count()
-        }
+        # Prepare task statistics (one aggregate query)
+        task_stats = Task.objects.filter(assigned_users=developer).aggregate(
+            total_tasks=Count('id'),
+            completed_tasks=Count('id', filter=Q(progress=100)),
+            in_progress_tasks=Count('id', filter=Q(progress__gt=0, progress__lt=100)),
+            pending_tasks=Count('id', filter=Q(progress=0)),
+            overdue_tasks=Count('id', filter=Q(is_overdue=True)),
+        )
 
         context = {
             'tasks': page_tasks,
@@ -613,7 +609,7 @@ def developer_tasks(request):
             'recent_updates': recent_updates,
             'task_stats': task_stats,
             'active_page': 'developer_tasks',
-            'today': timezone.now().date(),
+            'today': today,
         }
 
         return render(request, 'developer_tasks.html', context)
@@ -633,11 +629,13 @@ def developer_tasks(request):
 @login_required
 def payment_history(request):
     developer = request.user
-    deduction_logs = DeductionLog.objects.filter(developer=developer).order_by('-deduction_date')
+    logs = deduction_listing.deduction_log_queryset(developer=developer)
+    page = deduction_listing.deduction_log_page(logs, request.GET)
 
     return render(request, 'payment_history.html', {
         'developer': developer,
-        'deduction_logs': deduction_logs
+        'deduction_logs': page['logs'],
+        'page': page,
     })
 
 
@@ -659,7 +657,8 @@ def admin_dashboard(request):
     if request.user.email != 'Admin@dbr.org':
         return HttpResponseForbidden("You are not authorized to access this page.")
 
-    today = now().date()
+    stream_since = now().isoformat()  # Live updates start from here (see events.py)
+    today = buckets.ensure_buckets_fresh()
     current_month = today.month
     current_year = today.year
 
@@ -696,10 +695,7 @@ def admin_dashboard(request):
     in_time_processes_money = calculate_income_balance()["income_balance"]
 
     # Overdue task count
-    overdue_task_count = Task.objects.filter(
-        progress__lt=100,
-        deadline__lt=today
-    ).count()
+    overdue_task_count = Task.objects.filter(is_overdue=True).count()
 
     # Calculate monthly income (jobs created this month)
     monthly_income = Job.objects.filter(
@@ -708,48 +704,43 @@ def admin_dashboard(request):
     ).aggregate(monthly_total=Sum('over_all_income'))['monthly_total'] or 0
 
     # Get developer data with task status
-    developers = User.objects.prefetch_related('developer_tasks')
+    developers = list(User.objects.order_by('id')[:4])  # Show only 4 developers on dashboard
     developer_data = []
 
+    # Status counts of the shown developers' tasks, one GROUP BY over the assignments
+    status_labels = {deadlines.COMPLETED: 'done', deadlines.NO_DEADLINE: None}
+    status_counts = {}
+    for row in (
+        Task.assigned_users.through.objects.filter(user__in=developers)
+        .annotate(status=deadlines.status_case(today, completed=True, prefix='task__'))
+        .values('user_id', 'status')
+        .annotate(count=Count('id'))
+        .order_by()
+    ):
+        label = status_labels.get(row['status'], row['status'])
+        if label:
+            status_counts.setdefault(row['user_id'], Counter())[label] += row['count']
+
     for developer in developers:
         assigned_tasks = Task.objects.filter(assigned_users=developer).select_related('job')
         status_counter = Counter({'task_green': 0, 'task_yellow': 0, 'task_red': 0, 'overdue': 0, 'done': 0})
-        task_info = []
-
-        for task in assigned_tasks:
-            days_until_deadline = (task.deadline - today).days if task.deadline else None
-
-            if task.progress == 100:
-                task_color = 'done'
-                status_counter['done'] += 1
-            else:
-                if days_until_deadline is not None:
-                    if days_until_deadline > 10:
-                        task_color = 'task_green'
-                        status_counter['task_green'] += 1
-                    elif 5 < days_until_deadline <= 10:
-                        task_color = 'task_yellow'
-                        status_counter['task_yellow'] += 1
-                    elif 0 <= days_until_deadline <= 5:
-                        task_color = 'task_red'
-                        status_counter['task_red'] += 1
-                    else:
-                        task_color = 'overdue'
-                        status_counter['overdue'] += 1
-                else:
-                    task_color = None
-
-            task_info.append({
-                'task': task,
-                'days_until_deadline': days_until_deadline,
-                'color': task_color
-            })
+        status_counter.update(status_counts.get(developer.id, {}))
 
         # Get 5 most recent tasks for the detail view
         from django.core.paginator import Paginator
-        task_paginator = Paginator(task_info, 5)
+        task_paginator = Paginator(
+            assigned_tasks.annotate(status=deadlines.status_case(today, completed=True)).order_by('id'), 5
+        )
         page_number = request.GET.get(f'page_{developer.id}', 1)
         page_obj = task_paginator.get_page(page_number)
+        page_obj.object_list = [
+            {
+                'task': task,
+                'days_until_deadline': (task.deadline - today).days if task.deadline else None,
+                'color': status_labels.get(task.status, task.status),
+            }
+            for task in page_obj
+        ]
 
         # Calculate balance
         balance = assigned_tasks.filter(paid=True).aggregate(
@@ -763,9 +754,6 @@ def admin_dashboard(request):
             'status_counts': status_counter,
         })
 
-    # Limit developer data for dashboard display
-    developer_data = developer_data[:4]  # Show only 4 developers on dashboard
-
     # Get recent jobs (5 most recent)
     recent_jobs = Job.objects.order_by('-created_at')[:5]
 
@@ -777,11 +765,7 @@ def admin_dashboard(request):
             )['avg_progress'] or 0
 
         if not hasattr(job, 'get_overdue_tasks_count'):
-            job.get_overdue_tasks_count = Task.objects.filter(
-                job=job,
-                progress__lt=100,
-                deadline__lt=today
-            ).count()
+            job.get_overdue_tasks_count = Task.objects.filter(job=job, is_overdue=True).count()
 
         if not hasattr(job, 'get_latest_deadline'):
             job.get_latest_deadline = Task.objects.filter(job=job).aggregate(
@@ -791,8 +775,8 @@ def admin_dashboard(request):
     # Get upcoming deadlines (10 tasks with closest deadlines that aren't overdue)
     upcoming_tasks = Task.objects.filter(
         progress__lt=100,  # Not completed
-        deadline__gte=today  # Not overdue
-    ).order_by('deadline')[:8]
+        deadline_bucket__in=buckets.UPCOMING  # Not overdue
+    ).annotate(status=deadlines.status_case(today)).order_by('deadline')[:8]
 
     # Add days_until_deadline property to tasks
     for task in upcoming_tasks:
@@ -818,6 +802,7 @@ def admin_dashboard(request):
         'recent_jobs': recent_jobs,
         'upcoming_tasks': upcoming_tasks,
         'overall_completion_rate': overall_completion_rate,
+        'stream_since': stream_since,
     }
 
     return render(request, 'admin_dashboard.html', context)
@@ -1009,6 +994,7 @@ def job_details(request, job_id):
     # Get values from the aggregation
     latest_deadline = task_stats['latest_deadline']
     total_task_payment = task_stats['total_payment'] or 0
+    forecast = JobForecast.objects.filter(job_id=job.id).first()  # Written nightly by forecast_jobs
 
     # Get the overall progress of the job
     overall_progress = job.get_overall_progress() if job.get_overall_progress() else 0
@@ -1146,6 +1132,7 @@ def job_details(request, job_id):
         'regular_tasks': page_regular_tasks,
         'follow_tasks': page_follow_tasks,
         'latest_deadline': latest_deadline,
+        'forecast': forecast,
         'overall_progress': overall_progress,
         'total_task_payment': total_task_payment,
         'remaining_income': remaining_income,
@@ -1162,32 +1149,46 @@ def job_details(request, job_id):
 
 def deduction_logs_admin(request):
     # Fetch all users for the user filter dropdown
-    users = User.objects.all()
-
-    # Get unique months from DeductionLog dates
-    all_deduction_logs = DeductionLog.objects.all()
-    months = all_deduction_logs.dates('deduction_date', 'month')
+    users = User.objects.only('id', 'username')
 
     # Get selected user and month from the request parameters
     selected_user = request.GET.get('user')
     selected_month = request.GET.get('month')
 
-    # Apply filters
-    if selected_user:
-        all_deduction_logs = all_deduction_logs.filter(developer__id=selected_user)
-    if selected_month:
-        year, month = map(int, selected_month.split('-'))
-        all_deduction_logs = all_deduction_logs.filter(deduction_date__year=year, deduction_date__month=month)
+    filters = deduction_listing.parse_filters(request.GET)
+    logs = deduction_listing.deduction_log_queryset(filters)
+    page = deduction_listing.deduction_log_page(logs, request.GET)
+
+    # Totals per month for the selected user; also fills the month dropdown
+    user_filter = {'developer_id': filters['developer_id']} if 'developer_id' in filters else {}
+    monthly_totals = deduction_listing.monthly_totals(deduction_listing.deduction_log_queryset(user_filter))
 
     return render(request, 'deduction_logs_admin.html', {
-        'all_deduction_logs': all_deduction_logs,
+        'all_deduction_logs': page['logs'],
+        'page': page,
+        'monthly_totals': monthly_totals,
         'users': users,
-        'months': months,
+        'months': [row['month'] for row in monthly_totals],
         'selected_user': selected_user,
         'selected_month': selected_month,
     })
 
+
+@login_required
+def deduction_logs_export(request):
+    """All logs matching the deduction log filters as a streamed CSV."""
+    if request.user.email != 'Admin@dbr.org':
+        return HttpResponseForbidden("You are not authorized to export deduction logs.")
+
+    logs = deduction_listing.deduction_log_queryset(deduction_listing.parse_filters(request.GET))
+    response = StreamingHttpResponse(
+        deduction_listing.stream_deduction_csv(logs), content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = 'attachment; filename="deduction_logs.csv"'
+    return response
+
 @login_required
+@idempotent
 def deduct_balance(request, developer_id):
     developer = get_object_or_404(User, id=developer_id)
     tasks = Task.objects.filter(assigned_users=developer)
@@ -1243,17 +1244,25 @@ def deduction_page(request):
 @login_required
 def all_deduction_logs(request):
     # Retrieve all deduction logs, ordered by date (latest first)
-    logs = DeductionLog.objects.all().order_by('-deduction_date')
-    return render(request, 'all_deduction_logs.html', {'deduction_logs': logs})
+    logs = deduction_listing.deduction_log_queryset(deduction_listing.parse_filters(request.GET))
+    page = deduction_listing.deduction_log_page(logs, request.GET)
+    return render(request, 'all_deduction_logs.html', {
+        'deduction_logs': page['logs'],
+        'page': page,
+        'monthly_totals': deduction_listing.monthly_totals(logs),
+    })
 
 
 @login_required
 def deduction_logs(request, developer_id):
     developer = get_object_or_404(User, id=developer_id)
-    logs = DeductionLog.objects.filter(developer=developer).order_by('-deduction_date')
+    logs = deduction_listing.deduction_log_queryset(developer=developer)
+    page = deduction_listing.deduction_log_page(logs, request.GET)
     return render(request, 'deduction_logs.html', {
         'developer': developer,
-        'deduction_logs': logs,
+        'deduction_logs': page['logs'],
+        'page': page,
+        'monthly_totals': deduction_listing.monthly_totals(logs),
     })
 from django.shortcuts import render
 from .models import DeductionLog
@@ -1261,40 +1270,32 @@ from django.utils.dateparse import parse_date
 from django.db.models import Q
 
 def payment_history(request):
-    deduction_logs = DeductionLog.objects.all()
-
-    # Получение параметров фильтрации из запроса
-    amount = request.GET.get('amount')
-    username = request.GET.get('username')
-    start_date = request.GET.get('start_date')
-    end_date = request.GET.get('end_date')
+    # Фильтры ?amount=, ?username=, ?start_date=, ?end_date= (see deduction_listing.parse_filters)
+    deduction_logs = deduction_listing.deduction_log_queryset(deduction_listing.parse_filters(request.GET))
+    page = deduction_listing.deduction_log_page(deduction_logs, request.GET)
 
-    # Фильтрация по сумме, если указана
-    if amount:
-        deduction_logs = deduction_logs.filter(deduction_amount=amount)
-
-    # Фильтрация по имени пользователя, если указано
-    if username:
-        deduction_logs = deduction_logs.filter(deducted_by__username__icontains=username)
-
-    # Фильтрация по дате, если указаны значения
-    if start_date:
-        deduction_logs = deduction_logs.filter(deduction_date__gte=parse_date(start_date))
-    if end_date:
-        deduction_logs = deduction_logs.filter(deduction_date__lte=parse_date(end_date))
-
-    return render(request, 'payment_history.html', {'deduction_logs': deduction_logs})
+    return render(request, 'payment_history.html', {
+        'deduction_logs': page['logs'],
+        'page': page,
+        'monthly_totals': deduction_listing.monthly_totals(deduction_logs),
+    })
 
 @login_required
 def overdue_tasks(request):
-    # Fetch overdue tasks
-    overdue_tasks = Task.objects.filter(
-        progress__lt=100,  # Not completed
-        deadline__lt=now().date()  # Deadline in the past
-    ).select_related('job').prefetch_related('assigned_users')  # Use prefetch_related for many-to-many
+    today = buckets.ensure_buckets_fresh()
+    # Overdue tasks (not completed, deadline in the past), one page at a time; ?job= / ?developer= narrow it
+    filters = overdue_monitor.parse_filters(request.GET)
+    page = overdue_monitor.overdue_page(overdue_monitor.overdue_queryset(filters), request.GET)
+    for task in page['tasks']:
+        task.days_overdue = (today - task.deadline).days
 
     context = {
-        'overdue_tasks': overdue_tasks,
+        'overdue_tasks': page['tasks'],
+        'page': page,
+        'summary': overdue_monitor.overdue_summary(filters),
+        'filters': filters,
+        # Money at risk (per task, job and developer) is admin-only data
+        'show_money': request.user.email == 'Admin@dbr.org',
     }
     return render(request, 'overdue_tasks.html', context)
 from django.shortcuts import get_object_or_404, redirect, render
@@ -1325,9 +1326,21 @@ def update_job(request, job_id):
     if request.method == 'POST':
         # Check if both forms are valid
         if job_form.is_valid() and task_formset.is_valid():
-            job_form.save()  # Save the job changes
-            task_formset.save()  # Save changes to the tasks (add, edit, delete)
-            return redirect('job_list')  # Redirect to job list or another appropriate page
+            try:
+                with transaction.atomic():
+                    job_form.save()  # Save the job changes
+                    task_formset.save()  # Save changes to the tasks (add, edit, delete)
+                return redirect('job_list')  # Redirect to job list or another appropriate page
+            except ConcurrencyConflict:
+                # Nothing was saved; show what is in the database now
+                job = get_object_or_404(Job, id=job_id)
+                messages.error(request, "This job or one of its tasks was changed by someone else. "
+                                        "The form now shows the current values; re-apply your changes.")
+                return render(request, 'update_job.html', {
+                    'job_form': JobForm(instance=job),
+                    'task_formset': TaskFormSet(instance=job),
+                    'job': job,
+                }, status=409)
 
     return render(request, 'update_job.html', {
         'job_form': job_form,
@@ -1393,6 +1406,7 @@ logger = logging.getLogger(__name__)
 
 
 @login_required
+@idempotent
 def add_task_to_job(request, job_id):
     """Optimized view for adding tasks to a job without loading existing tasks in the form"""
     # Quick permission check
@@ -1490,6 +1504,7 @@ def add_task_to_job(request, job_id):
                         })
 
                     # Save new tasks
+                    queued_series = []
                     for form, task in new_tasks:
                         # Set percentage
                         task.task_percentage = (task.hours / total_hours) * 100
@@ -1498,14 +1513,9 @@ def add_task_to_job(request, job_id):
                         if task.task_type == 'PATPIS':
                             # Set deadline to start date
                             task.deadline = start_date
-
-                            # Format title for first task
-                            base_title = task.title
-                            if '(' in base_title and ')' in base_title:
-                                base_title = base_title[:base_title.rfind('(')].strip()
-
-                            month_year = start_date.strftime('%B %Y')
-                            task.title = f"{base_title} ({month_year})"
+                            task.title = task_operations.patpis_title(
+                                task_operations.patpis_base_title(task.title), start_date
+                            )
 
                         # Save first task
                         task.save()
@@ -1513,72 +1523,23 @@ def add_task_to_job(request, job_id):
                         # Save many-to-many relationships
                         form.save_m2m()
 
-                        # Create recurring tasks if needed
-                        if task.task_type == 'PATPIS' and start_date and end_date and start_date < end_date:
-                            from dateutil.relativedelta import relativedelta
-                            import calendar
-
-                            base_date = start_date
-                            day_of_month = base_date.day
-                            current_date = base_date + relativedelta(months=1)
-
-                            # Store assigned users
-                            assigned_users = list(task.assigned_users.all())
-
-                            # Create tasks for each month individually with proper assignments
-                            month_count = 0
-                            task_count = 1  # Starting at 1 to account for the first task
-
-                            while current_date <= end_date:
-                                month_count += 1
-                                if month_count > 100:  # Safety limit
-                                    break
-
-                                # Adjust day for month length
-                                max_day = calendar.monthrange(current_date.year, current_date.month)[1]
-                                actual_day = min(day_of_month, max_day)
-                                target_date = current_date.replace(day=actual_day)
-
-                                if target_date > end_date:
-                                    break
-
-                                month_year = target_date.strftime('%B %Y')
-
-                                # Create and save each recurring task individually
-                                recurring_task = Task(
-                                    job=job,
-                                    title=f"{base_title} ({month_year})",
-                                    hours=task.hours,
-                                    description=task.description,
-                                    task_percentage=task.task_percentage,
-                                    money_for_task=task.money_for_task,
-                                    task_type='PATPIS',
-                                    deadline=target_date
-                                )
-                                # Save immediately to get an ID
-                                recurring_task.save()
-                                task_count += 1
-
-                                # Assign users to the saved task
-                                if assigned_users:
-                                    for user in assigned_users:
-                                        recurring_task.assigned_users.add(user)
-
-                                # Move to next month
-                                current_date = current_date + relativedelta(months=1)
-
-                    # Update existing task percentages
-                    if existing_hours > 0 and new_tasks_hours > 0:
-                        # Update all existing tasks in one query using Django's update method
-                        from django.db.models import F, ExpressionWrapper, FloatField
-                        Task.objects.filter(job=job).exclude(
-                            id__in=[t[1].id for t in new_tasks]
-                        ).update(
-                            task_percentage=ExpressionWrapper(
-                                (F('hours') * 100) / total_hours,
-                                output_field=FloatField()
-                            )
-                        )
+                        # Create recurring tasks if needed (in the worker when the client asked for 202)
+                        if task.task_type == 'PATPIS' and start_date < end_date:
+                            if background.wants_async(request):
+                                queued_series.append(background.enqueue('patpis_series', {
+                                    'task_id': task.id,
+                                    'start_date': start_date.isoformat(),
+                                    'end_date': end_date.isoformat(),
+                                }, user=request.user))
+                            else:
+                                task_operations.create_patpis_series(task, start_date, end_date)
+
+                    # Update task percentages across the job
+                    task_operations.rebalance_task_percentages(job.id)
+
+                if queued_series:
+                    # One series job per PATPIS task; the client polls each of them
+                    return background.accepted_batch_response(queued_series)
 
                 # Success - redirect to job details
                 messages.success(request, "Tasks successfully added to the job.")
@@ -1603,7 +1564,7 @@ def add_task_to_job(request, job_id):
 
 
 
-from django.db.models import Sum
+from django.db.models import Prefetch, Sum
 from django.shortcuts import render
 from .models import Task, DeductionLog, User
 
@@ -1611,26 +1572,24 @@ def developer_payment_sheet(request):
     # Get the developer_id from query parameters
     developer_id = request.GET.get('developer_id')
 
-    # Fetch developers (all or filtered by ID if provided)
+    # Fetch developers (all or filtered by ID if provided), with their tasks and jobs in one prefetch
+    tasks_with_jobs = Prefetch('developer_tasks', queryset=Task.objects.select_related('job'))
     if developer_id:
-        developers = User.objects.filter(id=developer_id).prefetch_related('developer_tasks')
+        developers = User.objects.filter(id=developer_id).prefetch_related(tasks_with_jobs)
     else:
-        developers = User.objects.prefetch_related('developer_tasks')
+        developers = User.objects.prefetch_related(tasks_with_jobs)
+
+    # Earned / paid / deductions per developer; closed months come from the AccountingPeriod snapshots
+    totals = accounting.developer_totals(developer_id=developer_id)
 
     developer_data = []
 
     for developer in developers:
-        # Get all tasks assigned to this developer
-        tasks = Task.objects.filter(assigned_users=developer).select_related('job')
-
-        # Calculate total money earned by completed tasks (progress = 100%)
-        total_earned = tasks.filter(progress=100).aggregate(total=Sum('money_for_task'))['total'] or 0
-
-        # Calculate total money paid to the developer
-        total_paid = tasks.filter(paid=True).aggregate(total=Sum('money_for_task'))['total'] or 0
-
-        # Calculate total deductions for the developer
-        total_deductions = DeductionLog.objects.filter(developer=developer).aggregate(total=Sum('deduction_amount'))['total'] or 0
+        tasks = developer.developer_tasks.all()
+        developer_totals = totals.get(developer.pk, {})
+        total_earned = developer_totals.get('earned', 0)
+        total_paid = developer_totals.get('paid', 0)
+        total_deductions = developer_totals.get('deductions', 0)
 
         # Calculate remaining balance
         balance = total_paid - total_deductions
@@ -1663,6 +1622,36 @@ def developer_payment_sheet(request):
     })
 
 
+@login_required
+def developer_payment_sheet_export(request):
+    """
+    The payment sheet of all developers (or ?developer_id=) as a streamed CSV/XLSX file,
+    ?format=csv|xlsx, optional ?date_from= / ?date_to= (YYYY-MM-DD).
+    """
+    if request.user.email != 'Admin@dbr.org':
+        return HttpResponseForbidden("You are not authorized to export the payment sheet.")
+
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in payment_export.FORMATS:
+        return HttpResponseBadRequest("format must be csv or xlsx")
+    try:
+        developer_id = int(request.GET['developer_id']) if request.GET.get('developer_id') else None
+        date_from, date_to = (
+            parse_date(request.GET[name]) if request.GET.get(name) else None for name in ('date_from', 'date_to')
+        )
+    except ValueError:
+        return HttpResponseBadRequest("Invalid developer_id or date")
+    if (request.GET.get('date_from') and not date_from) or (request.GET.get('date_to') and not date_to):
+        return HttpResponseBadRequest("Dates must be YYYY-MM-DD")
+
+    writer, content_type = payment_export.FORMATS[export_format]
+    rows = payment_export.payment_rows(developer_id, date_from, date_to)
+    response = StreamingHttpResponse(writer(rows), content_type=content_type)
+    period = f"_{date_from or ''}_{date_to or ''}" if date_from or date_to else ''
+    response['Content-Disposition'] = f'attachment; filename="payment_sheet{period}.{export_format}"'
+    return response
+
+
 # Add this to views.py
 @login_required
 def delete_task(request, task_id):
@@ -1677,14 +1666,10 @@ def delete_task(request, task_id):
         # Delete the task
         task.delete()
 
-        # Recalculate percentages for remaining tasks in the job
-        remaining_tasks = Task.objects.filter(job=job)
-        total_hours = remaining_tasks.aggregate(Sum('hours'))['hours__sum'] or 0
-
-        if total_hours > 0:  # Only recalculate if there are remaining tasks
-            for remaining_task in remaining_tasks:
-                remaining_task.task_percentage = (remaining_task.hours / total_hours) * 100
-                remaining_task.save()
+        # Recalculate percentages for remaining tasks in the job (in the worker when the client asked for 202)
+        if background.wants_async(request):
+            return background.accepted_response(background.enqueue('rebalance', {'job_id': job.id}, user=request.user))
+        task_operations.rebalance_task_percentages(job.id)
 
         messages.success(request, f"Task '{task.title}' has been successfully deleted.")
 
@@ -1733,8 +1718,8 @@ def update_progress(request):
                 return redirect('developer_tasks')
 
             # Get the task and verify the current user is assigned to it
-            task = get_object_or_404(Task, id=task_id)
-            if request.user not in task.assigned_users.all():
+            task = get_object_or_404(with_assignment(Task.objects.all(), request.user), id=task_id)
+            if not task.is_assigned:
                 return HttpResponseForbidden("You are not authorized to update this task.")
 
             # Update the progress
@@ -1757,6 +1742,41 @@ def update_progress(request):
     return redirect('developer_tasks')
 
 
+@login_required
+def bulk_update_progress(request):
+    """
+    Update progress/feedback of many tasks at once.
+    POST JSON: {"entries": [{"task_id": 1, "progress": 50, "feedback": "..."}, ...]}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'error', 'message': 'Метод не поддерживается'}, status=405)
+
+    try:
+        entries = json.loads(request.body).get('entries')
+    except (ValueError, AttributeError):
+        entries = None
+    if not isinstance(entries, list) or not entries:
+        return JsonResponse({'status': 'error', 'message': 'Expected a non-empty "entries" list'}, status=400)
+    if len(entries) > task_operations.PROGRESS_BATCH_LIMIT:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'At most {task_operations.PROGRESS_BATCH_LIMIT} entries per request'
+        }, status=400)
+
+    tasks, errors = task_operations.update_tasks_progress(request.user, entries)
+    if tasks or not errors:
+        status_code = 200
+    elif any('current' in error for error in errors):
+        status_code = 409
+    else:
+        status_code = 400
+    return JsonResponse({
+        'status': 'success' if not errors else 'partial',
+        'tasks': tasks,
+        'errors': errors,
+    }, status=status_code)
+
+
 # @login_required
 # def delete_job(request, job_id):
 #     # Only allow POST requests for deletion
@@ -1782,7 +1802,11 @@ def delete_job(request, job_id):
         if request.user.email == 'Admin@dbr.org':
             job = get_object_or_404(Job, id=job_id)
             job_title = job.title
-            job.delete()
+            if background.wants_async(request):
+                return background.accepted_response(
+                    background.enqueue('delete_job', {'job_id': job.id}, user=request.user)
+                )
+            task_operations.delete_job_with_tasks(job.id)
             messages.success(request, f'Project "{job_title}" has been successfully deleted.')
         else:
             messages.error(request, 'You do not have permission to delete projects.')
@@ -1849,7 +1873,7 @@ def all_developer_tasks(request):
     if request.user.email != 'Admin@dbr.org':
         return HttpResponseForbidden("You are not authorized to view all developer tasks.")
 
-    today = timezone.now().date()
+    today = buckets.ensure_buckets_fresh()
 
     # Get selected filters
     selected_developer_id = request.GET.get('developer')
@@ -1859,16 +1883,13 @@ def all_developer_tasks(request):
     developers = User.objects.annotate(
         task_count=Count('developer_tasks'),
         overdue_count=Count('developer_tasks',
-                            filter=Q(developer_tasks__deadline__lt=today, developer_tasks__progress__lt=100)),
+                            filter=Q(developer_tasks__is_overdue=True)),
         today_count=Count('developer_tasks',
-                          filter=Q(developer_tasks__deadline=today)),
+                          filter=Q(developer_tasks__deadline_bucket=buckets.TODAY)),
         tomorrow_count=Count('developer_tasks',
-                             filter=Q(developer_tasks__deadline=today + timedelta(days=1))),
+                             filter=Q(developer_tasks__deadline_bucket=buckets.TOMORROW)),
         week_count=Count('developer_tasks',
-                         filter=Q(
-                             developer_tasks__deadline__gt=today + timedelta(days=1),
-                             developer_tasks__deadline__lte=today + timedelta(days=7)
-                         ))
+                         filter=Q(developer_tasks__deadline_bucket__in=buckets.NEXT_WEEK))
     ).order_by('username')
 
     # Filter developers if needed
@@ -1887,57 +1908,44 @@ def all_developer_tasks(request):
         if selected_category == 'overdue':
             tasks = Task.objects.filter(
                 assigned_users=developer,
-                deadline__lt=today,
-                progress__lt=100
+                is_overdue=True
             )
         elif selected_category == 'today':
             tasks = Task.objects.filter(
                 assigned_users=developer,
-                deadline=today
+                deadline_bucket=buckets.TODAY
             )
         elif selected_category == 'tomorrow':
             tasks = Task.objects.filter(
                 assigned_users=developer,
-                deadline=today + timedelta(days=1)
+                deadline_bucket=buckets.TOMORROW
             )
         elif selected_category == 'week':
             tasks = Task.objects.filter(
                 assigned_users=developer,
-                deadline__gt=today + timedelta(days=1),
-                deadline__lte=today + timedelta(days=7)
+                deadline_bucket__in=buckets.NEXT_WEEK
             )
         else:
             # Default to all tasks
             tasks = Task.objects.filter(assigned_users=developer)
 
-        # Select related data to reduce queries
-        tasks = tasks.select_related('job').order_by('deadline')
+        # Select related data to reduce queries; status comes from the shared classifier
+        tasks = tasks.select_related('job') \
+            .annotate(status=deadlines.status_case(today, due_days=2)) \
+            .order_by('deadline')
 
         # Process tasks to add status information
         for task in tasks:
-            if task.deadline:
-                days_until_deadline = (task.deadline - today).days
-                if days_until_deadline < 0:
-                    task.status = 'overdue'
-                    task.status_display = f'Overdue by {abs(days_until_deadline)} days'
-                elif days_until_deadline == 0:
-                    task.status = 'due_today'
-                    task.status_display = 'Due today'
-                elif days_until_deadline == 1:
-                    task.status = 'due_tomorrow'
-                    task.status_display = 'Due tomorrow'
-                elif days_until_deadline <= 5:
-                    task.status = 'task_red'
-                    task.status_display = f'Due in {days_until_deadline} days'
-                elif days_until_deadline <= 10:
-                    task.status = 'task_yellow'
-                    task.status_display = f'Due in {days_until_deadline} days'
-                else:
-                    task.status = 'task_green'
-                    task.status_display = f'Due in {days_until_deadline} days'
-            else:
-                task.status = 'no_deadline'
+            if task.status == deadlines.DUE_TODAY:
+                task.status_display = 'Due today'
+            elif task.status == deadlines.DUE_TOMORROW:
+                task.status_display = 'Due tomorrow'
+            elif task.status == deadlines.NO_DEADLINE:
                 task.status_display = 'No deadline'
+            elif task.status == deadlines.OVERDUE:
+                task.status_display = f'Overdue by {(today - task.deadline).days} days'
+            else:
+                task.status_display = f'Due in {(task.deadline - today).days} days'
 
         developer_tasks[developer] = tasks
 
@@ -1964,7 +1972,7 @@ def enhanced_tasks_view(request):
     if request.user.email != 'Admin@dbr.org':
         return HttpResponseForbidden("You are not authorized to view this page.")
 
-    today = timezone.now().date()
+    today = buckets.ensure_buckets_fresh()
 
     # Initialize date filtering variables
     filter_type = request.GET.get('filter_type', 'today')  # Default to today's tasks
@@ -1976,11 +1984,11 @@ def enhanced_tasks_view(request):
     # Set the title and tasks based on filter type
     if filter_type == 'today':
         title = f"Today's Tasks ({today.strftime('%A, %B %d, %Y')})"
-        tasks = Task.objects.filter(deadline=today)
+        tasks = Task.objects.filter(deadline_bucket=buckets.TODAY)
     elif filter_type == 'tomorrow':
         tomorrow = today + timedelta(days=1)
         title = f"Tomorrow's Tasks ({tomorrow.strftime('%A, %B %d, %Y')})"
-        tasks = Task.objects.filter(deadline=tomorrow)
+        tasks = Task.objects.filter(deadline_bucket=buckets.TOMORROW)
     elif filter_type == 'week':
         title = f"This Week's Tasks ({today.strftime('%b %d')} - {week_end.strftime('%b %d, %Y')})"
         tasks = Task.objects.filter(deadline__gte=today, deadline__lte=week_end)
@@ -1998,19 +2006,23 @@ def enhanced_tasks_view(request):
         except ValueError:
             # If date parsing fails, default to today
             title = f"Today's Tasks ({today.strftime('%A, %B %d, %Y')})"
-            tasks = Task.objects.filter(deadline=today)
+            tasks = Task.objects.filter(deadline_bucket=buckets.TODAY)
             messages.error(request, "Invalid date format. Showing today's tasks instead.")
     else:
         # Default fallback
         title = f"Today's Tasks ({today.strftime('%A, %B %d, %Y')})"
-        tasks = Task.objects.filter(deadline=today)
+        tasks = Task.objects.filter(deadline_bucket=buckets.TODAY)
 
     # Get full task data with prefetching to minimize database hits
     tasks = tasks.select_related('job').prefetch_related('assigned_users').order_by('job__title', 'title')
 
-    # Get stats for quick links
-    today_count = Task.objects.filter(deadline=today).count()
-    tomorrow_count = Task.objects.filter(deadline=today + timedelta(days=1)).count()
+    # Get stats for quick links (today/tomorrow from the stored buckets; week/future depend on the weekday)
+    bucket_counts = dict(
+        Task.objects.filter(deadline_bucket__in=[buckets.TODAY, buckets.TOMORROW])
+        .values_list('deadline_bucket').annotate(count=Count('id')).order_by()
+    )
+    today_count = bucket_counts.get(buckets.TODAY, 0)
+    tomorrow_count = bucket_counts.get(buckets.TOMORROW, 0)
     week_count = Task.objects.filter(deadline__gte=today, deadline__lte=week_end).count()
     future_count = Task.objects.filter(deadline__gt=week_end).count()
 
@@ -2097,28 +2109,29 @@ def edit_task(request, task_id):
                     # Save the form but don't commit yet
                     updated_task = form.save(commit=False)
 
-                    # Check if hours have changed
+                    updated_task.save()
+
+                    # Recalculate all task percentages for this job if hours have changed
                     if original_hours != updated_task.hours:
-                        # Recalculate all task percentages for this job
-                        all_job_tasks = Task.objects.filter(job=job)
-                        total_hours = sum(t.hours for t in all_job_tasks if t.id != task.id) + updated_task.hours
-
-                        # Update percentages
-                        for job_task in all_job_tasks:
-                            if job_task.id == task.id:
-                                job_task.task_percentage = (updated_task.hours / total_hours) * 100
-                            else:
-                                job_task.task_percentage = (job_task.hours / total_hours) * 100
-                            job_task.save()
-                    else:
-                        # If hours haven't changed, just save the task
-                        updated_task.save()
+                        task_operations.rebalance_task_percentages(job.id)
 
                     # Save many-to-many relationships
                     form.save_m2m()
 
                     messages.success(request, f"Task '{task.title}' has been successfully updated.")
                     return redirect('job_details', job_id=job.id)
+            except ConcurrencyConflict as conflict:
+                current = conflict.current()
+                if current is None:
+                    messages.error(request, "This task has been deleted by someone else.")
+                    return redirect('job_details', job_id=job.id)
+                messages.error(request, "This task was changed by someone else while you were editing. "
+                                        "The form now shows the current values; re-apply your changes.")
+                return render(request, 'edit_task.html', {
+                    'form': TaskForm(instance=current),
+                    'task': current,
+                    'job': job,
+                }, status=409)
             except Exception as e:
                 messages.error(request, f"An error occurred: {str(e)}")
                 import traceback
@@ -2382,7 +2395,7 @@ def confirm_completed_task(request, task_id):
             task.confirmed = True
             task.confirmation_date = timezone.now()
             task.confirmed_by = request.user
-            task.save(update_fields=['confirmed', 'confirmation_date', 'confirmed_by'])
+            task.save(update_fields=['confirmed', 'confirmation_date', 'confirmed_by', 'updated_at'])
 
             # Проверяем, должна ли быть произведена оплата
             task.check_and_pay_developer()
@@ -2400,7 +2413,7 @@ def confirm_completed_task(request, task_id):
                 task.confirmed = False
                 task.confirmation_date = None
                 task.confirmed_by = None
-                task.save(update_fields=['confirmed', 'confirmation_date', 'confirmed_by', 'paid'])
+                task.save(update_fields=['confirmed', 'confirmation_date', 'confirmed_by', 'paid', 'updated_at'])
 
                 messages.success(request, f"Подтверждение задачи '{task.title}' отменено.")
             else:
@@ -2493,6 +2506,7 @@ def tasks_pending_confirmation(request):
 
 # Оптимизированное представление для массового подтверждения задач
 @login_required
+@idempotent  # Снаружи transaction.atomic, чтобы повторы видели запись о ключе
 @require_POST
 @transaction.atomic  # Оборачиваем всю функцию в транзакцию для атомарности
 def bulk_confirm_tasks(request):
@@ -2511,30 +2525,21 @@ def bulk_confirm_tasks(request):
         messages.error(request, "Не выбрано ни одной задачи.")
         return redirect('tasks_pending_confirmation')
 
-    # Получаем текущее время для всех задач
-    now_time = timezone.now()
+    try:
+        task_ids = [int(pk) for pk in task_ids]
+    except ValueError:
+        return HttpResponseBadRequest("task_ids must be integers")
 
-    # Выбираем только задачи, которые соответствуют критериям
-    tasks_to_confirm = Task.objects.filter(
-        id__in=task_ids,
-        progress=100,
-        confirmed=False
-    )
+    if background.wants_async(request):
+        return background.accepted_response(background.enqueue(
+            'confirm_tasks', {'task_ids': task_ids, 'confirmed_by_id': request.user.id},
+            user=request.user
+        ))
 
-    confirm_count = tasks_to_confirm.count()
+    # Подтверждение и оплата пакетными UPDATE (см. task_operations.confirm_tasks)
+    confirm_count = task_operations.confirm_tasks(task_ids, request.user.id)
 
     if confirm_count > 0:
-        # Массовое обновление всех задач за один запрос
-        tasks_to_confirm.update(
-            confirmed=True,
-            confirmation_date=now_time,
-            confirmed_by=request.user
-        )
-
-        # Получаем обновленные задачи и обрабатываем оплату
-        for task in tasks_to_confirm:
-            task.check_and_pay_developer()
-
         messages.success(request, f"Успешно подтверждено {confirm_count} задач.")
     else:
         messages.warning(request, "Не найдено задач для подтверждения.")
@@ -0,0 +1,83 @@
+"""
+Developer × week workload: every task's `hours` spread evenly over its
+start_date..deadline window, summed per assignee and week (Monday to Sunday).
+
+The window arithmetic runs on NumPy arrays over all assignments at once: each task adds
+its daily rate at its first day and removes it after its last day in a per-developer
+difference array, a cumulative sum turns that into daily load, and reshaping to
+(developers, weeks, 7) gives the weekly totals. Tasks without a deadline aren't
+scheduled and are left out.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db.models.functions import Coalesce
+
+from .models import Task
+
+MAX_WEEKS = 106  # About two years
+CACHE_TIMEOUT = 600  # Safety net; the tasks data version does the real invalidation
+
+Assignment = Task.assigned_users.through
+
+
+def week_range(start, end):
+    """Monday of start's week and Sunday of end's week."""
+    return start - timedelta(days=start.weekday()), end + timedelta(days=6 - end.weekday())
+
+
+def assignment_rows(start, end):
+    """(user_id, username, first day, deadline, hours, progress) of tasks overlapping start..end."""
+    return (
+        Assignment.objects.annotate(first_day=Coalesce('task__start_date', 'task__deadline'))
+        .filter(task__deadline__isnull=False, first_day__lte=end, task__deadline__gte=start)
+        .values_list('user_id', 'user__username', 'first_day', 'task__deadline', 'task__hours', 'task__progress')
+    )
+
+
+def workload_matrix(start, end, remaining=False):
+    """
+    Columnar result: {'weeks': [Monday dates], 'developers': [ids], 'usernames': [...],
+    'hours': [[hours per week] per developer]}. With `remaining`, only the part of each
+    task not done yet counts (hours × (100 - progress) / 100).
+    """
+    start, end = week_range(start, end)
+    days = (end - start).days + 1
+    weeks = [(start + timedelta(weeks=i)).isoformat() for i in range(days // 7)]
+
+    rows = list(assignment_rows(start, end))
+    if not rows:
+        return {'start': start.isoformat(), 'end': end.isoformat(), 'weeks': weeks,
+                'developers': [], 'usernames': [], 'hours': []}
+
+    user_ids, usernames, first_days, deadlines, hours, progress = zip(*rows)
+    origin = np.datetime64(start, 'D')
+    first = (np.array(first_days, dtype='datetime64[D]') - origin).astype(np.int64)
+    last = (np.array(deadlines, dtype='datetime64[D]') - origin).astype(np.int64)
+    last = np.maximum(last, first)  # A deadline before the start date counts as one day
+    load = np.array(hours, dtype=np.float64)
+    if remaining:
+        load *= (100 - np.clip(np.array(progress, dtype=np.float64), 0, 100)) / 100
+    rate = load / (last - first + 1)  # Hours per day over the whole window
+
+    developers, developer_index = np.unique(np.array(user_ids), return_inverse=True)
+    diff = np.zeros((len(developers), days + 1))
+    # Windows may start before / end after the range; clipping keeps the in-range part
+    np.add.at(diff, (developer_index, np.clip(first, 0, days)), rate)
+    np.add.at(diff, (developer_index, np.clip(last + 1, 0, days)), -rate)
+    daily = np.cumsum(diff[:, :days], axis=1)
+    weekly = daily.reshape(len(developers), days // 7, 7).sum(axis=2)
+
+    username_of = dict(zip(user_ids, usernames))
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'weeks': weeks,
+        'developers': developers.tolist(),
+        'usernames': [username_of[user_id] for user_id in developers.tolist()],
+        'hours': np.round(weekly, 2).tolist(),
+    }
+
+
+def workload_cache_key(start, end, remaining, version):
+    return f'workload:{start.isoformat()}:{end.isoformat()}:{int(remaining)}:{version}'